@@ -1,30 +1,151 @@
-﻿import streamlit as st
+﻿import os
+import sys
+from pathlib import Path
+
+import streamlit as st
 import pandas as pd
 import numpy as np
 import altair as alt
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.utils.column_store import open_store, filter_mask, bin_2d, META_FILE
+from src.evaluators.columnar import quality_scores
+
 st.set_page_config(page_title='LLM Eval Dashboard', layout='wide')
 
 st.title('LLM Evaluation Dashboard')
 
-CSV_PATH = 'data/batch_results.csv'
+# A results .csv / .jsonl (converted once to a sibling .cols column store) or a .cols directory
+RESULTS_PATH = os.environ.get('LLM_EVAL_RESULTS', 'data/batch_results.csv')
+
+# Above this many filtered rows the scatter is drawn as server-side bins
+SCATTER_MAX_POINTS = 5000
+SCATTER_BINS = (80, 50)
+HIST_BINS = 10
+TABLE_ROWS = 1000
+SCORE_COLUMNS = ['relevance', 'completeness', 'factuality']
+
 
-# Load CSV safely
+def file_signature(path):
+    """Changes whenever the results file (or store) is rewritten; part of every cache key."""
+    path = Path(path)
+    st_ = os.stat(path / META_FILE if path.is_dir() else path)
+    return st_.st_mtime_ns, st_.st_size
+
+
+# ---------------------------
+# CACHED LOADS
+# ---------------------------
+
+@st.cache_resource(max_entries=2, show_spinner='Loading results...')
+def load_results(path, signature):
+    """
+    Memory-mapped column store + derived columns, computed once per file version.
+    `signature` only keys the cache: a rewritten file gets a fresh entry.
+    """
+    store = open_store(path)
+    if 'quality_score' in store.columns:
+        quality = np.asarray(store.column('quality_score'))
+    else:
+        quality = quality_scores(*(store.column(c) for c in SCORE_COLUMNS))
+    tokens = store.column('total_tokens')
+    bounds = {
+        'total_tokens': (float(np.nanmin(tokens)), float(np.nanmax(tokens))) if store.rows else (0.0, 0.0),
+    }
+    return store, {'quality_score': quality}, bounds
+
+
+def describe(columns: dict) -> pd.DataFrame:
+    """df.describe() for already-filtered NumPy columns."""
+    stats = {}
+    for name, v in columns.items():
+        v = v[~np.isnan(v)]
+        if not v.size:
+            stats[name] = [0] + [np.nan] * 7
+            continue
+        q = np.percentile(v, [25, 50, 75])
+        stats[name] = [v.size, v.mean(), v.std(ddof=1) if v.size > 1 else np.nan, v.min(), *q, v.max()]
+    return pd.DataFrame(stats, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def query(path, signature, verdicts, quality_range, token_range):
+    """Everything the page draws, for one filter combination. Only small aggregates leave here."""
+    store, derived, _ = load_results(path, signature)
+    mask = filter_mask(
+        store,
+        categories={'verdict': list(verdicts)},
+        ranges={'quality_score': quality_range, 'total_tokens': token_range},
+        derived=derived,
+    )
+    n = int(mask.sum())
+    quality = derived['quality_score'][mask]
+    codes = store.column('verdict')[mask]
+    labels = store.categories('verdict')
+    pass_code = labels.index('PASS') if 'PASS' in labels else -1
+
+    counts, edges = np.histogram(quality, bins=HIST_BINS, range=quality_range)
+    hist = pd.Series(counts, index=[f'({lo:.3f}, {hi:.3f}]' for lo, hi in zip(edges[:-1], edges[1:])])
+
+    verdict_counts = pd.Series(np.bincount(codes, minlength=len(labels)), index=labels)
+    verdict_counts = verdict_counts[verdict_counts > 0].sort_values(ascending=False)
+
+    if n <= SCATTER_MAX_POINTS:
+        rows = np.flatnonzero(mask)
+        scatter = pd.DataFrame(store.take(rows, ['chat_file', 'verdict', 'total_tokens']))
+        scatter['quality_score'] = quality
+        binned = False
+    else:
+        tokens = store.column('total_tokens')[mask]
+        bins = bin_2d(tokens, quality, SCATTER_BINS, y_range=quality_range, groups=codes, n_groups=len(labels))
+        g, xi, yi = np.nonzero(bins['counts'])
+        xe, ye = bins['x_edges'], bins['y_edges']
+        scatter = pd.DataFrame({
+            'verdict': np.asarray(labels)[g],
+            'tokens_lo': xe[xi], 'tokens_hi': xe[xi + 1],
+            'quality_lo': ye[yi], 'quality_hi': ye[yi + 1],
+            'count': bins['counts'][g, xi, yi],
+        })
+        binned = True
+
+    table_rows = np.flatnonzero(mask)[:TABLE_ROWS]
+    table = pd.DataFrame(store.take(table_rows))
+    table['quality_score'] = derived['quality_score'][table_rows]
+
+    return {
+        'rows': n,
+        'avg_quality': float(quality.mean()) if n else float('nan'),
+        'pass_rate': float((codes == pass_code).mean()) if n else 0.0,
+        'hist': hist,
+        'stats': describe({c: store.column(c)[mask] for c in SCORE_COLUMNS}),
+        'verdict_counts': verdict_counts,
+        'scatter': scatter,
+        'binned': binned,
+        'table': table,
+    }
+
+
+# Load results safely
 try:
-    df = pd.read_csv(CSV_PATH)
+    signature = file_signature(RESULTS_PATH)
+    store, derived, bounds = load_results(RESULTS_PATH, signature)
 except Exception as e:
-    st.error(f'Cannot load CSV at {CSV_PATH}: {e}')
+    st.error(f'Cannot load results at {RESULTS_PATH}: {e}')
     st.stop()
 
-# Compute quality_score if not present
-def compute_quality(row):
-    rel = float(row.get('relevance', 0))
-    comp = float(row.get('completeness', 0))
-    fact = float(row.get('factuality', row.get('factuality_avg', 0)))
-    return 0.4 * rel + 0.3 * comp + 0.3 * fact
+# ---------------------------
+# FILTERS (applied to the mapped columns before anything is materialized)
+# ---------------------------
+st.sidebar.header('Filters')
+all_verdicts = store.categories('verdict')
+verdicts = st.sidebar.multiselect('Verdict', all_verdicts, default=all_verdicts)
+quality_range = st.sidebar.slider('Quality score', 0.0, 1.0, (0.0, 1.0), step=0.01)
+tok_lo, tok_hi = bounds['total_tokens']
+token_range = (tok_lo, tok_hi) if tok_hi <= tok_lo else st.sidebar.slider(
+    'Total tokens', tok_lo, tok_hi, (tok_lo, tok_hi))
 
-if "quality_score" not in df.columns:
-    df["quality_score"] = df.apply(compute_quality, axis=1)
+result = query(RESULTS_PATH, signature, tuple(verdicts), tuple(quality_range), tuple(token_range))
 
 # ---------------------------
 # SUMMARY BOXES
@@ -32,15 +153,17 @@ if "quality_score" not in df.columns:
 st.header('Batch Summary')
 col1, col2, col3 = st.columns(3)
 
-col1.metric("Files evaluated", len(df))
-col2.metric("Avg quality", f"{df['quality_score'].mean():.3f}")
-col3.metric("PASS rate", f"{(df['verdict'] == 'PASS').mean():.2%}")
+col1.metric("Files evaluated", f"{result['rows']:,} of {store.rows:,}")
+col2.metric("Avg quality", f"{result['avg_quality']:.3f}")
+col3.metric("PASS rate", f"{result['pass_rate']:.2%}")
 
 # ---------------------------
 # DATA TABLE
 # ---------------------------
 st.header("Scores Table")
-st.dataframe(df)
+if result['rows'] > TABLE_ROWS:
+    st.caption(f"First {TABLE_ROWS:,} of {result['rows']:,} matching rows.")
+st.dataframe(result['table'])
 
 # ---------------------------
 # DISTRIBUTIONS
@@ -50,38 +173,46 @@ c1, c2 = st.columns(2)
 
 with c1:
     st.subheader("Histogram: Quality Score")
-
-    # FIX: Convert IntervalIndex → string
-    hist = (
-        pd.cut(df["quality_score"], bins=10)
-        .value_counts()
-        .sort_index()
-    )
-    hist.index = hist.index.astype(str)
-
-    st.bar_chart(hist)
+    st.bar_chart(result['hist'])
 
 with c2:
     st.subheader("Summary Statistics")
-    st.write(df[["relevance", "completeness", "factuality"]].describe())
+    st.write(result['stats'])
 
 # ---------------------------
 # SCATTER PLOT
 # ---------------------------
 st.header("Scatter: Quality vs Total Tokens")
 
-chart = (
-    alt.Chart(df)
-    .mark_circle(size=60)
-    .encode(
-        x="total_tokens:Q",
-        y="quality_score:Q",
-        color="verdict:N",
-        tooltip=["chat_file", "quality_score", "verdict", "total_tokens"],
+if result['binned']:
+    st.caption(f"{result['rows']:,} rows binned server-side into a {SCATTER_BINS[0]}x{SCATTER_BINS[1]} grid per verdict.")
+    chart = (
+        alt.Chart(result['scatter'])
+        .mark_rect(opacity=0.7)
+        .encode(
+            x=alt.X("tokens_lo:Q", title="total_tokens"),
+            x2="tokens_hi:Q",
+            y=alt.Y("quality_lo:Q", title="quality_score"),
+            y2="quality_hi:Q",
+            color="verdict:N",
+            opacity=alt.Opacity("count:Q", scale=alt.Scale(type="log")),
+            tooltip=["verdict", "count", "tokens_lo", "tokens_hi", "quality_lo", "quality_hi"],
+        )
+        .properties(width=800, height=400)
+    )
+else:
+    chart = (
+        alt.Chart(result['scatter'])
+        .mark_circle(size=60)
+        .encode(
+            x="total_tokens:Q",
+            y="quality_score:Q",
+            color="verdict:N",
+            tooltip=["chat_file", "quality_score", "verdict", "total_tokens"],
+        )
+        .interactive()
+        .properties(width=800, height=400)
     )
-    .interactive()
-    .properties(width=800, height=400)
-)
 
 st.altair_chart(chart, use_container_width=True)
 
@@ -89,4 +220,4 @@ st.altair_chart(chart, use_container_width=True)
 # VERDICT COUNTS
 # ---------------------------
 st.header("Verdict Counts")
-st.bar_chart(df["verdict"].value_counts())
+st.bar_chart(result['verdict_counts'])
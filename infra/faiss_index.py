@@ -1,13 +1,38 @@
-import faiss
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
 import numpy as np
-from src.utils.embeddings import embed_batch
+from src.utils.embeddings import embed_batch, embedder_name
+
+INDEX_DIR = Path("data/indexes")
+
+# Corpora at or above this many vectors get an approximate HNSW index instead of a flat one
+HNSW_THRESHOLD = 50_000
+HNSW_M = 32
+
+# In-memory budget for cached indexes (bytes); least recently used ones are dropped first
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# faiss is imported on first use inside the functions below; the import is slow
+# and short CLI runs should not pay for it up front.
+
 
-def build_faiss_index(context_texts):
+def build_faiss_index(context_texts, precomputed=None):
     """
     context_texts: list of strings
+    precomputed: optional (len(context_texts), dim) matrix of their embeddings
+                 (e.g. a context sidecar from src.utils.context_vectors.load_context_vectors)
     returns: (index, vectors)
     """
-    vectors = embed_batch(context_texts)
+    import faiss
+    if precomputed is None:
+        vectors = embed_batch(context_texts)
+    else:
+        vectors = np.ascontiguousarray(precomputed, dtype=np.float32)
     dim = vectors.shape[1]
 
     index = faiss.IndexFlatL2(dim)
@@ -16,6 +41,187 @@ def build_faiss_index(context_texts):
     return index, vectors
 
 
-def search_index(index, query_vector, top_k=3):
-    distances, indices = index.search(np.array([query_vector]), top_k)
+def search_index(index, query_vectors, top_k=3):
+    """
+    query_vectors: a single vector or a (n_queries, dim) matrix.
+    Always returns (distances, indices) with one row per query.
+    """
+    queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+    distances, indices = index.search(np.ascontiguousarray(queries), top_k)
     return distances, indices
+
+
+# -----------------------------
+# Normalized inner-product indexes
+# -----------------------------
+
+def normalize_rows(vectors) -> np.ndarray:
+    """L2-normalizes rows as float32 so inner product == cosine similarity."""
+    import faiss
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def context_key(texts, namespace: str = None) -> str:
+    """
+    Stable hash of an ordered list of context texts. `namespace` (the embedder
+    identity, active backend by default) is part of the key so a model or
+    backend change never reuses a stale index.
+    """
+    h = hashlib.sha256((namespace or embedder_name()).encode("utf-8"))
+    for t in texts:
+        data = t.encode("utf-8")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def build_ip_index(vectors, hnsw_threshold: int = HNSW_THRESHOLD):
+    """
+    Builds a cosine (inner product on normalized vectors) index.
+    Small corpora use exact IndexFlatIP; large ones switch to IndexHNSWFlat.
+    """
+    import faiss
+    vectors = normalize_rows(vectors)
+    dim = vectors.shape[1]
+
+    if len(vectors) >= hnsw_threshold:
+        index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexFlatIP(dim)
+
+    index.add(vectors)
+    return index
+
+
+def _index_bytes(index) -> int:
+    import faiss
+    size = index.ntotal * index.d * 4
+    if isinstance(index, faiss.IndexHNSW):
+        size += index.ntotal * HNSW_M * 2 * 4  # neighbour links, roughly
+    return size
+
+
+class IndexRegistry:
+    """
+    Reusable context indexes keyed by context_key(texts).
+
+    Lookup order: in-memory LRU -> on-disk copy (memory-mapped) -> build.
+    Built indexes are saved under `path` so other processes and restarts reuse
+    them. Indexes are dropped from memory (not disk) once their total size
+    exceeds `memory_budget`.
+    """
+
+    def __init__(self, path=INDEX_DIR, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 hnsw_threshold: int = HNSW_THRESHOLD, persist: bool = True):
+        self.path = Path(path)
+        self.memory_budget = memory_budget
+        self.hnsw_threshold = hnsw_threshold
+        self.persist = persist
+
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+        self._building = {}  # key -> lock held while that index is loaded or built
+        self._bytes = 0
+
+        self.hits = 0
+        self.loads = 0
+        self.builds = 0
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{key}.faiss"
+
+    def get_or_build(self, texts, vectors=None):
+        """
+        Returns the index for `texts`. `vectors` (their embeddings, in order) is
+        only used when the index has to be built; without it they are embedded.
+        """
+        key = context_key(texts)
+
+        index = self._cached(key)
+        if index is not None:
+            return index
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+
+        # One thread loads or builds a given key; the others wait and then hit the cache
+        with build_lock:
+            index = self._cached(key)
+            if index is None:
+                index = self._load_or_build(key, texts, vectors)
+        with self._lock:
+            self._building.pop(key, None)
+        return index
+
+    def _cached(self, key: str):
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                self.hits += 1
+            return index
+
+    def _load_or_build(self, key: str, texts, vectors):
+        file = self._file(key)
+        if self.persist and file.exists():
+            import faiss
+            # Memory-map flat codes (older faiss builds only know IO_FLAG_MMAP)
+            index = faiss.read_index(str(file), getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP))
+            self.loads += 1
+        else:
+            if vectors is None:
+                vectors = embed_batch(list(texts))
+            index = build_ip_index(vectors, self.hnsw_threshold)
+            self.builds += 1
+            if self.persist:
+                self._save(index, file)
+
+        with self._lock:
+            if key not in self._indexes:
+                self._indexes[key] = index
+                self._bytes += _index_bytes(index)
+                self._evict()
+            return self._indexes[key]
+
+    def _save(self, index, file: Path):
+        import faiss
+        self.path.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=f"{file.stem}.", suffix=".tmp")
+        os.close(fd)
+        try:
+            faiss.write_index(index, tmp)
+            os.replace(tmp, file)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _evict(self):
+        # Always keep the most recent index, even if it alone exceeds the budget
+        while self._bytes > self.memory_budget and len(self._indexes) > 1:
+            _, old = self._indexes.popitem(last=False)
+            self._bytes -= _index_bytes(old)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "indexes": len(self._indexes),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "builds": self.builds,
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> IndexRegistry:
+    """Process-wide default registry under INDEX_DIR."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = IndexRegistry()
+    return _registry
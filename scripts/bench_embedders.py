@@ -0,0 +1,119 @@
+"""
+Embedder backend benchmark: throughput and score drift against the fp32 reference.
+
+For every backend (see src/utils/embedders.py) it times encoding --texts
+synthetic sentences, then compares the cosine similarities it assigns to
+--pairs question/answer-style text pairs with those of the fp32
+SentenceTransformer. Drift is what changes in relevance/completeness scores:
+mean and max |delta cosine| and the correlation of the two score lists.
+Backends sharing the reference's vector space (int8) also report the
+per-text cosine between their vector and the reference vector.
+
+The cache is bypassed; every backend encodes every text.
+
+    python scripts/bench_embedders.py --texts 2000 --backends sentence-transformers int8 hashing
+"""
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.utils.embedders import BACKENDS, DEFAULT_BACKEND, create_embedder  # noqa: E402
+
+TOPICS = ["artificial intelligence", "machine learning", "neural networks", "databases", "climate change",
+          "photosynthesis", "the French revolution", "quantum computing", "vaccines", "black holes"]
+VERBS = ["explains", "describes", "summarizes", "questions", "compares", "introduces"]
+EXTRAS = ["in simple terms", "with an example", "for beginners", "in detail", "briefly", "using an analogy"]
+
+
+def make_texts(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        f"This answer {rng.choice(VERBS)} {rng.choice(TOPICS)} {rng.choice(EXTRAS)} (#{i})."
+        for i in range(n)
+    ]
+
+
+def row_cosines(a, b):
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return np.sum(a * b, axis=1)
+
+
+def encode_timed(embedder, texts, batch_size: int):
+    load_s = 0.0
+    if hasattr(embedder, "load"):
+        start = time.perf_counter()
+        embedder.load()
+        load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectors = np.vstack([embedder.encode(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
+    encode_s = time.perf_counter() - start
+    return vectors, {"load_seconds": load_s, "encode_seconds": encode_s, "texts_per_sec": len(texts) / encode_s}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and score drift per embedder backend")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--pairs", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backends", nargs="*", default=list(BACKENDS))
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+    rng = np.random.default_rng(0)
+    pairs = rng.integers(0, len(texts), size=(args.pairs, 2))
+
+    results = {}
+    reference = None
+    for backend in [DEFAULT_BACKEND] + [b for b in args.backends if b != DEFAULT_BACKEND]:
+        embedder = create_embedder(backend)
+        try:
+            vectors, stats = encode_timed(embedder, texts, args.batch_size)
+        except Exception as e:  # e.g. offline without the model weights
+            results[backend] = {"name": embedder.name, "error": f"{type(e).__name__}: {e}"}
+            continue
+
+        stats["name"] = embedder.name
+        scores = row_cosines(vectors[pairs[:, 0]], vectors[pairs[:, 1]])
+        if backend == DEFAULT_BACKEND:
+            reference = (vectors, scores)
+        elif reference is not None:
+            delta = np.abs(scores - reference[1])
+            stats["score_drift"] = {
+                "mean_abs": float(delta.mean()),
+                "max_abs": float(delta.max()),
+                "pearson_r": float(np.corrcoef(scores, reference[1])[0, 1]),
+            }
+            if vectors.shape == reference[0].shape:
+                stats["vector_cosine_to_reference"] = float(row_cosines(vectors, reference[0]).mean())
+        if backend in args.backends:
+            results[backend] = stats
+
+    for backend, stats in results.items():
+        if "error" in stats:
+            print(f"{backend:22s} unavailable: {stats['error'][:100]}")
+            continue
+        line = f"{backend:22s} {stats['texts_per_sec']:10.1f} texts/s  (load {stats['load_seconds']:.2f}s)"
+        if "score_drift" in stats:
+            d = stats["score_drift"]
+            line += f"  drift mean {d['mean_abs']:.4f} max {d['max_abs']:.4f} r={d['pearson_r']:.4f}"
+        print(line)
+    if reference is None:
+        print("(fp32 reference unavailable, no drift numbers)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
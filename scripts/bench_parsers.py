@@ -0,0 +1,92 @@
+"""
+Context parser benchmark: the reference loader (json.load + ContextDocument
+validation of the whole document) against the streaming parse_context, in
+validated and trusted mode, on generated context files of growing size.
+
+Reports wall time, items/sec and peak traced Python memory per parser.
+Every parser must return the same ids and texts as the reference.
+
+    python scripts/bench_parsers.py --items 1000 10000 100000 --words 80
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.utils.parsers import ContextChunk, parse_context, _parse_context_document  # noqa: E402
+
+WORDS = ("context retrieval chunk model answer claim source evidence document vector "
+         "index query latency token cost score user assistant system policy").split()
+
+PARSERS = {
+    "reference": _parse_context_document,
+    "streaming": lambda path: parse_context(path, trusted=False),
+    "trusted": lambda path: parse_context(path, trusted=True),
+}
+
+
+def write_contexts(path: Path, items: int, words: int, seed: int = 0):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"source": "bench", "contexts": [\n')
+        for i in range(items):
+            text = " ".join(rng.choice(WORDS) for _ in range(words))
+            f.write(("," if i else "") + json.dumps({"id": f"chunk-{i}", "text": text, "score": rng.random()}) + "\n")
+        f.write("]}\n")
+
+
+def measure(fn, path: Path, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        doc = fn(path)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return doc, best, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000, 100000], help="Context chunks per file")
+    parser.add_argument("--words", type=int, default=80, help="Words per chunk")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per parser (best is reported)")
+    parser.add_argument("--output", help="Write results as JSON here")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.items:
+            path = Path(tmp) / f"contexts-{n}.json"
+            write_contexts(path, n, args.words)
+            size_mb = path.stat().st_size / 2**20
+            print(f"\n{n} items ({size_mb:.1f} MB)")
+
+            expected = None
+            for name, fn in PARSERS.items():
+                doc, seconds, peak_mb = measure(fn, path, args.repeat)
+                items = [(c.id, c.text) for c in doc.contexts]
+                if expected is None:
+                    expected = items
+                elif items != expected:
+                    raise SystemExit(f"{name} parser disagrees with the reference on {path.name}")
+                if name == "trusted" and not isinstance(doc.contexts[0], ContextChunk):
+                    raise SystemExit("trusted parser fell back to the reference loader")
+                results.append({"parser": name, "items": n, "file_mb": size_mb, "seconds": seconds,
+                                "items_per_sec": n / seconds, "peak_mb": peak_mb})
+                print(f"  {name:10s} {seconds * 1000:9.1f} ms  {n / seconds:12,.0f} items/s  peak {peak_mb:7.1f} MB")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
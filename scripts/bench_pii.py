@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: single-pass PII engine vs the previous 4x findall + 4x sub.
+
+    python scripts/bench_pii.py --texts 5000 --big-mb 4
+"""
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.utils.pii import (  # noqa: E402
+    EMAIL_PATTERN, PHONE_PATTERN, NAME_PATTERN, ID_PATTERN,
+    analyze_pii, analyze_pii_many, iter_pii_chunked, redact_spans,
+)
+
+WORDS = [
+    "the", "order", "was", "shipped", "to", "John Smith", "on", "Monday", "call",
+    "+1 555 222 3333", "or", "mail", "jane.doe@example.com", "ticket", "98765432",
+    "please", "confirm", "your", "address", "thanks", "Alice", "support",
+]
+
+
+def legacy_detect_and_redact(text):
+    """The previous implementation: four findall passes plus four sub passes."""
+    detected = {
+        "emails": re.findall(EMAIL_PATTERN, text),
+        "phones": re.findall(PHONE_PATTERN, text),
+        "ids": re.findall(ID_PATTERN, text),
+        "names": re.findall(NAME_PATTERN, text),
+    }
+    text = re.sub(EMAIL_PATTERN, "[REDACTED_EMAIL]", text)
+    text = re.sub(PHONE_PATTERN, "[REDACTED_PHONE]", text)
+    text = re.sub(ID_PATTERN, "[REDACTED_ID]", text)
+    text = re.sub(NAME_PATTERN, "[REDACTED_NAME]", text)
+    return detected, text
+
+
+def make_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+
+def bench(label, fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:9.1f} ms")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--texts", type=int, default=5000, help="Chat-sized texts")
+    parser.add_argument("--words", type=int, default=60, help="Words per text")
+    parser.add_argument("--big-mb", type=float, default=4.0, help="Size of the single large transcript")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [make_text(rng, args.words) for _ in range(args.texts)]
+
+    print(f"{args.texts} texts x {args.words} words")
+    old = bench("legacy (4 findall + 4 sub)", lambda: [legacy_detect_and_redact(t) for t in texts])
+    new = bench("single pass", lambda: [analyze_pii(t) for t in texts])
+    bench(f"single pass, {args.workers} processes", lambda: analyze_pii_many(texts, workers=args.workers, processes=True))
+    print(f"speed-up (single pass vs legacy): {old / new:.2f}x\n")
+
+    big = " ".join(texts)
+    while len(big) < args.big_mb * (1 << 20):
+        big += " " + big
+    print(f"one transcript of {len(big) / (1 << 20):.1f} MB")
+    bench("legacy (4 findall + 4 sub)", lambda: legacy_detect_and_redact(big), repeat=1)
+    bench("single pass", lambda: analyze_pii(big), repeat=1)
+    bench("single pass, chunked", lambda: redact_spans(big, iter_pii_chunked(big)), repeat=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+CLI startup benchmark: in-process evaluation vs. a warm daemon.
+
+Times `python -m src.main` end to end (interpreter start, imports, model/index
+loading, evaluation, JSON output) --runs times each way and reports the median.
+A temporary daemon is started on its own socket for the second half, and the
+stdlib-only client (`python -m src.daemon evaluate`) is timed against it too.
+
+    python scripts/bench_startup.py --runs 5
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+CHAT = "data/samples/sample-chat-conversation-01.json"
+CTX = "data/samples/sample_context_vectors-01.json"
+
+
+def time_command(cmd, env, runs: int):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def wait_for_daemon(env, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = subprocess.run([sys.executable, "-m", "src.daemon", "status"], cwd=ROOT, env=env,
+                                capture_output=True, text=True)
+        if status.stdout.strip().startswith("{"):
+            return
+        time.sleep(0.2)
+    raise RuntimeError("Daemon did not come up in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure CLI startup with and without the daemon")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--chat", default=CHAT)
+    parser.add_argument("--ctx", default=CTX)
+    parser.add_argument("--profile", help="Config profile (e.g. bulk to skip loading a tokenizer)")
+    parser.add_argument("--no-warm", action="store_true", help="Start the daemon without preloading the model")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    cli = [sys.executable, "-m", "src.main", "--chat", args.chat, "--ctx", args.ctx]
+    thin = [sys.executable, "-m", "src.daemon", "evaluate", "--chat", args.chat, "--ctx", args.ctx]
+    if args.profile:
+        cli += ["--profile", args.profile]
+        thin += ["--profile", args.profile]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "LLM_EVAL_SOCKET": str(Path(tmp) / "bench.sock")}
+
+        imports = time_command([sys.executable, "-c", "import src.main"], env, args.runs)
+        in_process = time_command(cli + ["--no-daemon"], env, args.runs)
+
+        serve = [sys.executable, "-m", "src.daemon", "serve"] + (["--no-warm"] if args.no_warm else [])
+        daemon = subprocess.Popen(serve, cwd=ROOT, env=env, stdout=subprocess.DEVNULL)
+        try:
+            wait_for_daemon(env, args.startup_timeout)
+            via_daemon = time_command(cli, env, args.runs)
+            thin_client = time_command(thin, env, args.runs)
+        finally:
+            subprocess.run([sys.executable, "-m", "src.daemon", "stop"], cwd=ROOT, env=env,
+                           stdout=subprocess.DEVNULL)
+            daemon.wait(timeout=30)
+
+    print(f"import src.main:      {imports * 1000:8.1f} ms")
+    print(f"CLI, in-process:      {in_process * 1000:8.1f} ms")
+    print(f"CLI, via daemon:      {via_daemon * 1000:8.1f} ms")
+    print(f"thin client + daemon: {thin_client * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,64 @@
-﻿import csv
+﻿import sys
+import csv
+import itertools
 from pathlib import Path
-import statistics
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.evaluators.aggregate import aggregate_file
 
 CSV = Path('data/batch_results.csv')
 OUT = Path('docs/benchmark_results.md')
 
+# Score means + latency/tokens/cost quantiles, streamed in constant memory
+METRICS = ('relevance', 'completeness', 'factuality', 'latency', 'total_tokens', 'cost_usd')
+DETAIL_ROWS = 100
+
 if not CSV.exists():
     print('No batch_results.csv found. Run batch eval first (scripts/run_batch_eval.ps1).')
     exit(1)
 
-rows = []
-with open(CSV, newline='', encoding='utf-8') as f:
-    reader = csv.DictReader(f)
-    for r in reader:
-        rows.append(r)
+agg = aggregate_file(CSV, group_by='verdict', metrics=METRICS)
+summary = agg.summary()
+overall = summary['overall']
+
 
-# compute stats (convert strings to floats where applicable)
-relevance = [float(r['relevance']) for r in rows]
-completeness = [float(r['completeness']) for r in rows]
-factuality = [float(r.get('factuality', r.get('factuality_avg', 0))) for r in rows]
+def fmt(value, spec='.3f'):
+    return '' if value is None else format(value, spec)
 
+
+OUT.parent.mkdir(parents=True, exist_ok=True)
 with open(OUT, 'w', encoding='utf-8') as f:
-    f.write('# Benchmark Results\\n\\n')
-    f.write(f'*Total evaluated files:* {len(rows)}\\n\\n')
-    if rows:
-        f.write('## Summary Statistics\\n\\n')
-        f.write(f'- Average relevance: {statistics.mean(relevance):.3f}\\n')
-        f.write(f'- Average completeness: {statistics.mean(completeness):.3f}\\n')
-        f.write(f'- Average factuality: {statistics.mean(factuality):.3f}\\n\\n')
-
-        f.write('## Detailed results\\n\\n')
-        f.write('| chat_file | relevance | completeness | factuality | verdict | total_tokens |\\n')
-        f.write('|---|---:|---:|---:|---|---:|\\n')
-        for r in rows:
-            f.write(f"| {r['chat_file']} | {r['relevance']} | {r['completeness']} | {r.get('factuality', r.get('factuality_avg', ''))} | {r['verdict']} | {r.get('total_tokens','')} |\\n")
+    f.write('# Benchmark Results\n\n')
+    f.write(f'*Total evaluated files:* {summary["rows"]}\n\n')
+    if summary['rows']:
+        f.write('## Summary Statistics\n\n')
+        f.write(f'- Average relevance: {fmt(overall["relevance"]["mean"])}\n')
+        f.write(f'- Average completeness: {fmt(overall["completeness"]["mean"])}\n')
+        f.write(f'- Average factuality: {fmt(overall["factuality"]["mean"])}\n\n')
+
+        f.write('## Latency, tokens and cost\n\n')
+        f.write('| group | metric | n | mean | p50 | p95 | p99 |\n')
+        f.write('|---|---|---:|---:|---:|---:|---:|\n')
+        groups = [('all', overall)] + list(summary['groups'].items())
+        for group, stats in groups:
+            for metric in ('latency', 'total_tokens', 'cost_usd'):
+                m = stats[metric]
+                if not m['count']:
+                    continue
+                f.write(f"| {group} | {metric} | {m['count']} | {fmt(m['mean'], '.4g')} | "
+                        f"{fmt(m['p50'], '.4g')} | {fmt(m['p95'], '.4g')} | {fmt(m['p99'], '.4g')} |\n")
+        f.write('\n')
+
+        f.write('## Detailed results\n\n')
+        if summary['rows'] > DETAIL_ROWS:
+            f.write(f'First {DETAIL_ROWS} of {summary["rows"]} rows.\n\n')
+        f.write('| chat_file | relevance | completeness | factuality | verdict | total_tokens |\n')
+        f.write('|---|---:|---:|---:|---|---:|\n')
+        with open(CSV, newline='', encoding='utf-8') as src:
+            for r in itertools.islice(csv.DictReader(src), DETAIL_ROWS):
+                f.write(f"| {r['chat_file']} | {r['relevance']} | {r['completeness']} | {r.get('factuality', r.get('factuality_avg', ''))} | {r['verdict']} | {r.get('total_tokens','')} |\n")
     else:
-        f.write('No rows found in CSV.\\n')
+        f.write('No rows found in CSV.\n')
 
 print('Wrote', OUT)
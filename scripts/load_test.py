@@ -0,0 +1,105 @@
+"""
+Load test for POST /evaluate with the micro-batcher on and off.
+
+Runs the app in-process (httpx ASGI transport) unless --url is given, fires
+--requests unique chats with --concurrency in flight, and reports p50/p99
+latency and requests/sec for each mode.
+
+    python scripts/load_test.py --requests 200 --concurrency 32
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.app import create_app  # noqa: E402
+
+CTX = Path("data/samples/sample_context_vectors-01.json")
+
+
+def make_chats(folder: Path, n: int):
+    """Unique chats so the embedding cache cannot hide the encoder cost."""
+    paths = []
+    for i in range(n):
+        chat = {"messages": [
+            {"role": "user", "content": f"What is AI? (load test question {i})"},
+            {"role": "assistant", "content": f"AI means artificial intelligence. This is answer number {i}."},
+        ]}
+        path = folder / f"chat-{i:05d}.json"
+        path.write_text(json.dumps(chat))
+        paths.append(path)
+    return paths
+
+
+async def run_load(client: httpx.AsyncClient, chats, concurrency: int):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(chat):
+        async with sem:
+            start = time.perf_counter()
+            resp = await client.post("/evaluate", json={"chat_path": str(chat), "ctx_path": str(CTX)})
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(c) for c in chats))
+    wall = time.perf_counter() - start
+
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / wall,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+    }
+
+
+async def run_mode(batching: bool, args, chats):
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+            return await run_load(client, chats, args.concurrency)
+
+    app = create_app(batching=batching, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            result = await run_load(client, chats, args.concurrency)
+        if app.state.batcher is not None:
+            b = app.state.batcher
+            result["encoder_batches"] = b.batches
+            result["avg_batch_texts"] = b.batched_texts / b.batches if b.batches else 0.0
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /evaluate with and without micro-batching")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--url", help="Test a running server instead (mode is whatever it runs)")
+    args = parser.parse_args()
+
+    modes = [None] if args.url else [False, True]
+    with tempfile.TemporaryDirectory() as tmp:
+        for batching in modes:
+            # Fresh texts per mode so neither run benefits from the other's cache
+            folder = Path(tmp) / f"mode-{batching}"
+            folder.mkdir()
+            chats = make_chats(folder, args.requests)
+            result = asyncio.run(run_mode(batching, args, chats))
+            label = "server" if batching is None else ("batcher on " if batching else "batcher off")
+            print(f"{label}: " + ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,235 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-from src.main import evaluate
+import os
+import json
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from src.main import evaluate, evaluate_async, evaluate_documents_async, embed_async
+from src.utils.batching import MicroBatcher, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+from src.utils.embeddings import VectorTable, get_embedding_stats
+from src.utils.context_vectors import get_sidecar_stats
+from src.utils.caching import get_remote_stats
+from src.utils.parsers import ChatDocument, ContextDocument
+from src.utils.config import get_config
+from src.utils import metrics
+from infra.faiss_index import get_registry
+
+# Cross-request micro-batching of encoder calls (LLM_EVAL_BATCHING=0 disables it)
+BATCHING = os.getenv("LLM_EVAL_BATCHING", "1") != "0"
+MAX_BATCH_SIZE = int(os.getenv("LLM_EVAL_MAX_BATCH_SIZE", DEFAULT_MAX_BATCH_SIZE))
+MAX_WAIT_MS = float(os.getenv("LLM_EVAL_MAX_WAIT_MS", DEFAULT_MAX_WAIT_MS))
+
+# Pairs of one /evaluate/batch call evaluated concurrently
+BATCH_CONCURRENCY = int(os.getenv("LLM_EVAL_BATCH_CONCURRENCY", 16))
 
-app = FastAPI()
 
 class EvalRequest(BaseModel):
     chat_path: str
     ctx_path: str
+    profile: Optional[str] = None
+    # Include per-stage wall/CPU timings in the report
+    timings: bool = False
+
+
+class InlineEvalRequest(BaseModel):
+    chat: ChatDocument
+    context: ContextDocument
+    profile: Optional[str] = None
+    timings: bool = False
+
+
+class BatchPair(BaseModel):
+    id: Optional[str] = None
+    chat: ChatDocument
+    # Either an inline context document or the name of one in BatchEvalRequest.contexts
+    context: Optional[ContextDocument] = None
+    context_ref: Optional[str] = None
+
+
+class BatchEvalRequest(BaseModel):
+    # Context documents shared by several pairs, sent (and embedded) once
+    contexts: Dict[str, ContextDocument] = Field(default_factory=dict)
+    pairs: List[BatchPair]
+    profile: Optional[str] = None
+    timings: bool = False
+
+
+def _config_for(profile: Optional[str]):
+    try:
+        return get_config(profile)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _inline_context(doc: ContextDocument) -> ContextDocument:
+    """Request bodies may not point the server at embeddings sidecar files."""
+    if doc.embeddings is None:
+        return doc
+    return doc.model_copy(update={"embeddings": None})
+
+
+def _resolve_contexts(req: BatchEvalRequest) -> List[ContextDocument]:
+    resolved = []
+    for i, pair in enumerate(req.pairs):
+        if pair.context is not None:
+            resolved.append(_inline_context(pair.context))
+        elif pair.context_ref in req.contexts:
+            resolved.append(_inline_context(req.contexts[pair.context_ref]))
+        else:
+            raise HTTPException(status_code=422, detail=f"Pair {i}: unknown or missing context_ref {pair.context_ref!r}")
+    return resolved
+
+
+def _metric_families(batcher) -> list:
+    """Scrape-time gauges/counters: embedding cache, context sidecars, FAISS index reuse, batcher queue."""
+    emb = get_embedding_stats()
+    sidecars = get_sidecar_stats()
+    lookups = emb["hits"] + emb["misses"]
+    idx = get_registry().stats()
+    served = idx["hits"] + idx["loads"] + idx["builds"]
+
+    families = [
+        metrics.render_family(
+            "llm_eval_embedding_lookups_total", "counter", "Unique texts looked up in the embedding cache.",
+            [({"result": "hit"}, emb["hits"]), ({"result": "miss"}, emb["misses"])]),
+        metrics.render_family(
+            "llm_eval_embedding_cache_hit_ratio", "gauge", "Embedding cache hits / lookups since start.",
+            [({}, emb["hits"] / lookups if lookups else 0.0)]),
+        metrics.render_family(
+            "llm_eval_encoder_calls_total", "counter", "Encoder (model.encode) calls.",
+            [({}, emb["encode_calls"])]),
+        metrics.render_family(
+            "llm_eval_context_sidecars_total", "counter", "Context embeddings sidecars opened, by outcome.",
+            [({"result": "loaded"}, sidecars["loaded"]), ({"result": "rejected"}, sidecars["rejected"])]),
+        metrics.render_family(
+            "llm_eval_faiss_index_requests_total", "counter", "Context index lookups by where the index came from.",
+            [({"source": "memory"}, idx["hits"]), ({"source": "disk"}, idx["loads"]),
+             ({"source": "built"}, idx["builds"])]),
+        metrics.render_family(
+            "llm_eval_faiss_index_reuse_ratio", "gauge", "Index lookups served without building.",
+            [({}, (idx["hits"] + idx["loads"]) / served if served else 0.0)]),
+        metrics.render_family(
+            "llm_eval_faiss_indexes_resident", "gauge", "Indexes held in memory.",
+            [({}, idx["indexes"])]),
+        metrics.render_family(
+            "llm_eval_batcher_queue_depth", "gauge", "Embedding requests waiting for the micro-batcher.",
+            [({}, batcher.queue_depth if batcher is not None else 0)]),
+    ]
+
+    remote = get_remote_stats()
+    if remote is not None:
+        families += [
+            metrics.render_family(
+                "llm_eval_redis_cache_lookups_total", "counter", "Local cache misses looked up in Redis.",
+                [({"result": "hit"}, remote["hits"]), ({"result": "miss"}, remote["misses"])]),
+            metrics.render_family(
+                "llm_eval_redis_cache_writes_total", "counter", "Vectors sent to Redis, or not sent and why.",
+                [({"result": "written"}, remote["writes"]), ({"result": "dropped"}, remote["dropped"]),
+                 ({"result": "memory_full"}, remote["skipped_full"])]),
+            metrics.render_family(
+                "llm_eval_redis_cache_errors_total", "counter", "Redis errors (each marks the tier down for a while).",
+                [({}, remote["errors"])]),
+            metrics.render_family(
+                "llm_eval_redis_cache_up", "gauge", "1 while the Redis tier is in use.",
+                [({}, int(remote["available"]))]),
+        ]
+    return families
+
+
+def create_app(batching: bool = BATCHING, max_batch_size: int = MAX_BATCH_SIZE,
+               max_wait_ms: float = MAX_WAIT_MS) -> FastAPI:
+    """
+    batching=True: async handlers share one MicroBatcher for their embeddings.
+    batching=False: each request runs evaluate() on the threadpool, as before.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if app.state.batcher is not None:
+            await app.state.batcher.start()
+        yield
+        if app.state.batcher is not None:
+            await app.state.batcher.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.batcher = MicroBatcher(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms) if batching else None
+
+    @app.middleware("http")
+    async def record_latency(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Route template, not the raw URL: one series per endpoint however many URLs clients send
+            route = request.scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            metrics.REQUEST_LATENCY.observe(time.perf_counter() - start, request.method, path, status)
+
+    @app.get("/metrics")
+    async def metrics_endpoint():
+        body = metrics.render(_metric_families(app.state.batcher))
+        return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+    @app.post("/evaluate")
+    async def eval_endpoint(req: EvalRequest):
+        config = _config_for(req.profile)
+        if app.state.batcher is not None:
+            return await evaluate_async(req.chat_path, req.ctx_path, app.state.batcher, config=config,
+                                        timings=req.timings)
+        return await run_in_threadpool(evaluate, req.chat_path, req.ctx_path, profile=req.profile,
+                                       timings=req.timings)
+
+    @app.post("/evaluate/inline")
+    async def eval_inline_endpoint(req: InlineEvalRequest):
+        config = _config_for(req.profile)
+        ctx = _inline_context(req.context)
+        return await evaluate_documents_async(req.chat, ctx, app.state.batcher, config=config,
+                                              timings=req.timings)
+
+    @app.post("/evaluate/batch")
+    async def eval_batch_endpoint(req: BatchEvalRequest):
+        """
+        Streams one NDJSON line per pair, in completion order:
+        {"index": i, "id": ..., "report": {...}} or {"index": i, "id": ..., "error": "..."}
+        """
+        config = _config_for(req.profile)
+        contexts = _resolve_contexts(req)
+        batcher = app.state.batcher
+
+        # Every distinct context text in the batch is embedded exactly once
+        ctx_texts = list(dict.fromkeys(c.text for doc in contexts for c in doc.contexts))
+        shared = VectorTable(ctx_texts, await embed_async(ctx_texts, batcher))
+
+        sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def run_pair(i, pair, ctx):
+            async with sem:
+                try:
+                    report = await evaluate_documents_async(pair.chat, ctx, batcher, shared=shared, config=config,
+                                                            timings=req.timings)
+                    return {"index": i, "id": pair.id, "report": report}
+                except Exception as e:
+                    return {"index": i, "id": pair.id, "error": str(e)}
+
+        async def stream():
+            tasks = [asyncio.create_task(run_pair(i, p, c)) for i, (p, c) in enumerate(zip(req.pairs, contexts))]
+            try:
+                for done in asyncio.as_completed(tasks):
+                    yield json.dumps(await done) + "\n"
+            finally:
+                for t in tasks:
+                    t.cancel()
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    return app
+
 
-@app.post("/evaluate")
-def eval_endpoint(req: EvalRequest):
-    result = evaluate(req.chat_path, req.ctx_path)
-    return result
+app = create_app()
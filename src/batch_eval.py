@@ -1,59 +1,604 @@
-import json
+import io
+import os
+import sys
 import csv
+import json
+import time
+import sqlite3
+import hashlib
+import itertools
+import threading
+from functools import partial
+from collections import OrderedDict, deque, defaultdict, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from src.main import evaluate
+from src.main import evaluate, EVALUATOR_VERSION
+from src.utils.embeddings import get_model, embedder_name
+from src.utils.config import get_config
+from src.results_db import ResultsDB
+from src.evaluators.aggregate import StreamingAggregator, aggregate_file, save_state
 
 BATCH_FOLDER = Path("data/samples")
 OUTPUT_FILE = Path("data/batch_results.csv")
 
-def find_pairs():
+DEFAULT_CHUNK_SIZE = 8
+DEFAULT_FLUSH_EVERY = 100
+
+# Content-manifest entries not seen for this many complete runs are dropped
+KEEP_GENERATIONS = 3
+# File digests remembered per run (most recently used first out)
+DIGEST_CACHE_SIZE = 65536
+
+# Fixed output schema (CSV header / JSONL keys)
+RESULT_FIELDS = [
+    "chat_file",
+    "context_file",
+    "relevance",
+    "completeness",
+    "factuality",
+    "verdict",
+    "latency",
+    "total_tokens",
+    "cost_usd",
+]
+
+
+def find_pairs(folder: Path = BATCH_FOLDER):
     """
     Finds chat + context file pairs by matching index numbers.
     Example:
     sample-chat-conversation-01.json with sample_context_vectors-01.json
     """
-    chat_files = sorted(BATCH_FOLDER.glob("sample-chat-conversation-*.json"))
-    ctx_files  = sorted(BATCH_FOLDER.glob("sample_context_vectors-*.json"))
+    folder = Path(folder)
+    chat_files = sorted(folder.glob("sample-chat-conversation-*.json"))
 
     pairs = []
     for c in chat_files:
         idx = c.stem.split("-")[-1]
-        ctx = BATCH_FOLDER / f"sample_context_vectors-{idx}.json"
+        ctx = folder / f"sample_context_vectors-{idx}.json"
         if ctx.exists():
             pairs.append((c, ctx))
     return pairs
 
 
-def run_batch():
-    pairs = find_pairs()
-    print(f"Found {len(pairs)} pairs.")
+def iter_manifest(source):
+    """
+    Yields (chat, ctx) path pairs from a JSONL manifest, one
+    {"chat": "...", "ctx": "..."} object per line. source="-" reads stdin.
+    """
+    f = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if "chat" not in item or not ("ctx" in item or "context" in item):
+                raise ValueError(f"Manifest line {line_no} must contain 'chat' and 'ctx' fields.")
+            yield Path(item["chat"]), Path(item.get("ctx", item.get("context")))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def evaluate_pair(pair, profile: str = None) -> dict:
+    """
+    Evaluates one (chat, ctx) pair and flattens the report into a CSV row.
+    The row also carries quality_score and per-claim results for the results
+    database; the CSV / JSONL writer keeps only RESULT_FIELDS.
+    """
+    chat, ctx = Path(pair[0]), Path(pair[1])
+    report = evaluate(str(chat), str(ctx), profile=profile)
+    fact = report["scores"]["factuality"]
+    hallucinated = set(fact["hallucinated_claims"])
+
+    return {
+        "chat_file": chat.name,
+        "context_file": ctx.name,
+        "chat_path": str(chat),
+        "context_path": str(ctx),
+        "relevance": report["scores"]["relevance"],
+        "completeness": report["scores"]["completeness"],
+        "factuality": report["scores"]["factuality"]["avg_score"],
+        "verdict": report["verdict"],
+        "latency": report["latency_seconds"],
+        "total_tokens": report["token_usage"]["total_tokens"],
+        "cost_usd": report["token_usage"]["estimated_cost_usd"],
+        "quality_score": report["scores"]["quality_score"],
+        "claims": [
+            {"claim": c, "score": score, "source": source, "hallucinated": c in hallucinated}
+            for c, score, source in itertools.zip_longest(fact["claims"], fact["claim_scores"], fact["claim_sources"])
+        ],
+    }
+
+
+# -----------------------------
+# Incremental runs
+# -----------------------------
+
+# A pair planned by an incremental run: its content key and, when the
+# manifest already holds a result for that key, the row to reuse.
+PairTask = namedtuple("PairTask", ["pair", "key", "row"])
+
+
+def run_version(profile: str = None) -> str:
+    """Everything besides the input files that decides a pair's scores."""
+    return f"v{EVALUATOR_VERSION}:{get_config(profile).fingerprint()}:{embedder_name()}"
+
+
+def _file_hash(path, digests: OrderedDict = None) -> bytes:
+    """
+    SHA-256 of a file. With `digests` (one OrderedDict per run), a file whose
+    (path, mtime, size) was hashed recently is not read again.
+    """
+    if digests is not None:
+        st = os.stat(path)
+        version = (str(path), st.st_mtime_ns, st.st_size)
+        if version in digests:
+            digests.move_to_end(version)
+            return digests[version]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    if digests is not None:
+        digests[version] = h.digest()
+        if len(digests) > DIGEST_CACHE_SIZE:
+            digests.popitem(last=False)
+    return h.digest()
+
+
+def pair_key(pair, version: str, digests: OrderedDict = None) -> str:
+    """Content key of a pair: chat bytes, context bytes and run_version()."""
+    h = hashlib.sha256(version.encode("utf-8"))
+    h.update(_file_hash(pair[0], digests))
+    h.update(_file_hash(pair[1], digests))
+    return h.hexdigest()
+
+
+def content_manifest_path(output: Path) -> Path:
+    output = Path(output)
+    return output.with_name(output.name + ".hashes.db")
 
-    rows = []
 
-    for chat, ctx in pairs:
-        print(f"Evaluating {chat.name} ...")
+class ContentManifest:
+    """
+    Result rows of earlier runs keyed by pair_key(), in a SQLite file next to
+    the output. Each complete run is one generation. Entries a run reuses or
+    computes are stamped with it, and prune() drops those unseen for
+    KEEP_GENERATIONS runs. Writes are buffered until commit(), which run_batch
+    calls at every checkpoint.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, generation INTEGER NOT NULL,"
+            " row TEXT NOT NULL) WITHOUT ROWID;")
+        self._touched = []
+        self._rows = []
+
+    def begin(self, generation: int = None) -> int:
+        """Starts (or, given a checkpointed number, resumes) a generation."""
+        if generation is None:
+            last = self.conn.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+            generation = (last[0] if last else 0) + 1
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (generation,))
+        self.generation = generation
+        return generation
+
+    def get(self, key: str):
+        found = self.conn.execute("SELECT row FROM entries WHERE key = ?", (key,)).fetchone()
+        if found is None:
+            return None
+        self._touched.append(key)
+        return json.loads(found[0])
+
+    def put(self, key: str, row: dict):
+        self._rows.append((key, json.dumps(row)))
+
+    def commit(self):
+        with self.conn:
+            self.conn.executemany("UPDATE entries SET generation = ? WHERE key = ?",
+                                  [(self.generation, k) for k in self._touched])
+            self.conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)",
+                                  [(k, self.generation, r) for k, r in self._rows])
+        self._touched, self._rows = [], []
+
+    def prune(self, keep: int = KEEP_GENERATIONS) -> int:
+        with self.conn:
+            return self.conn.execute("DELETE FROM entries WHERE generation <= ?",
+                                     (self.generation - keep,)).rowcount
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def plan_pairs(pairs, manifest: ContentManifest, version: str, force: bool = False):
+    """
+    Yields a PairTask per pair; `row` is None when the pair must be (re)computed.
+    File digests are memoized for the run, so a context shared by many pairs
+    is hashed once.
+    """
+    digests = OrderedDict()
+    for pair in pairs:
+        key = pair_key(pair, version, digests)
+        yield PairTask(pair, key, None if force else manifest.get(key))
+
+
+# -----------------------------
+# Parallel execution
+# -----------------------------
+
+def _warm_worker():
+    """Pool initializer: load the embedding model once per worker, not per pair."""
+    get_model()
 
-        report = evaluate(str(chat), str(ctx))
 
-        rows.append({
-            "chat_file": chat.name,
-            "context_file": ctx.name,
-            "relevance": report["scores"]["relevance"],
-            "completeness": report["scores"]["completeness"],
-            "factuality": report["scores"]["factuality"]["avg_score"],
-            "verdict": report["verdict"],
-            "latency": report["latency_seconds"],
-            "total_tokens": report["token_usage"]["total_tokens"]
-        })
+def _run_task(item, profile: str = None) -> dict:
+    """A pair's row: evaluated, or reused from a PairTask (under the current file names)."""
+    if not isinstance(item, PairTask):
+        return evaluate_pair(item, profile)
+    if item.row is None:
+        row = evaluate_pair(item.pair, profile)
+    else:
+        chat, ctx = Path(item.pair[0]), Path(item.pair[1])
+        row = dict(item.row, chat_file=chat.name, context_file=ctx.name, chat_path=str(chat), context_path=str(ctx))
+    row["pair_key"] = item.key
+    row["reused"] = item.row is not None
+    return row
 
-    # Save CSV
-    with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
 
-    print(f"Batch results saved to {OUTPUT_FILE}")
+def _is_reused(chunk) -> bool:
+    return all(isinstance(item, PairTask) and item.row is not None for item in chunk)
+
+
+def _evaluate_chunk(chunk, profile: str = None):
+    """
+    Runs in a worker. Returns (worker_id, busy_seconds, rows) so the parent can
+    report per-worker utilization.
+    """
+    start = time.perf_counter()
+    rows = [_run_task(p, profile) for p in chunk]
+    worker_id = f"{os.getpid()}:{threading.current_thread().name}"
+    return worker_id, time.perf_counter() - start, rows
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ordered_map(executor, fn, iterable, window: int, inline=None):
+    """
+    Like executor.map, but keeps at most `window` tasks in flight so the input
+    iterable is consumed lazily. Results are yielded in input order.
+    Items for which inline(item) is true are cheap: fn runs on them right here.
+    """
+    pending = deque()
+    for item in iterable:
+        if inline is not None and inline(item):
+            done = Future()
+            done.set_result(fn(item))
+            pending.append(done)
+        else:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending and pending[0].done():
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def iter_rows(pairs, workers: int = 1, threads: bool = False,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, busy: dict = None, profile: str = None):
+    """
+    Yields result rows in the same order as `pairs`.
+    workers > 1 uses a process pool (or a thread pool with threads=True, for
+    encoders that release the GIL). `busy` collects seconds of work per worker.
+    `pairs` may hold PairTasks (see plan_pairs); chunks that are entirely
+    reused never go to the pool.
+    """
+    busy = busy if busy is not None else defaultdict(float)
+    run_chunk = partial(_evaluate_chunk, profile=profile)
+
+    if workers <= 1:
+        for chunk in _chunks(pairs, chunk_size):
+            worker_id, seconds, rows = run_chunk(chunk)
+            if not all(r.get("reused") for r in rows):
+                busy[worker_id] += seconds
+            yield from rows
+        return
+
+    pool_cls = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with pool_cls(max_workers=workers, initializer=_warm_worker) as pool:
+        for worker_id, seconds, rows in ordered_map(pool, run_chunk, _chunks(pairs, chunk_size),
+                                                    window=workers * 2, inline=_is_reused):
+            if not all(r.get("reused") for r in rows):
+                busy[worker_id] += seconds
+            yield from rows
+
+
+# -----------------------------
+# Streaming output + checkpointing
+# -----------------------------
+
+class ResultWriter:
+    """
+    Appends result rows to a CSV or JSONL file (chosen by suffix).
+    Starts at byte `offset`, dropping anything after it (a partial tail from a crash).
+    """
+
+    def __init__(self, path: Path, offset: int = 0):
+        self.path = Path(path)
+        self.fmt = "jsonl" if self.path.suffix in (".jsonl", ".ndjson") else "csv"
+
+        if offset and self.path.exists():
+            os.truncate(self.path, offset)
+            self._f = open(self.path, "ab")
+        else:
+            self._f = open(self.path, "wb")
+            if self.fmt == "csv":
+                self._f.write((",".join(RESULT_FIELDS) + "\r\n").encode("utf-8"))
+
+    def write(self, row: dict):
+        if self.fmt == "jsonl":
+            data = json.dumps({k: row.get(k) for k in RESULT_FIELDS}) + "\n"
+        else:
+            buf = io.StringIO()
+            csv.DictWriter(buf, fieldnames=RESULT_FIELDS, extrasaction="ignore").writerow(row)
+            data = buf.getvalue()
+        self._f.write(data.encode("utf-8"))
+
+    def flush(self) -> int:
+        """Flushes to disk and returns the durable byte offset."""
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        return self._f.tell()
+
+    def close(self):
+        self.flush()
+        self._f.close()
+
+
+def checkpoint_path(output: Path) -> Path:
+    output = Path(output)
+    return output.with_name(output.name + ".ckpt")
+
+
+def sketch_path(output: Path) -> Path:
+    """Where a run's mergeable latency/tokens/cost sketches are written."""
+    output = Path(output)
+    return output.with_name(output.name + ".sketch.json")
+
+
+EMPTY_CHECKPOINT = {"done": 0, "offset": 0, "aggregate": None, "run_id": None, "generation": None,
+                    "reused": 0, "fingerprint": None}
+
+
+def input_fingerprint(manifest=None, pairs=None, profile: str = None) -> str:
+    """
+    Identity of a run's input and settings: the manifest's bytes (just "-" for
+    stdin) or the folder's pair list, plus run_version(profile). A checkpoint
+    only resumes a run with the same fingerprint.
+    """
+    h = hashlib.sha256(run_version(profile).encode("utf-8"))
+    if manifest == "-":
+        h.update(b"stdin")
+    elif manifest:
+        h.update(_file_hash(manifest))
+    else:
+        for chat, ctx in pairs:
+            h.update(f"{chat}\x00{ctx}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_checkpoint(path: Path) -> dict:
+    """
+    Checkpoint state: pairs done (and how many of them were reused), durable
+    output byte offset, aggregator state, results-database run id,
+    content-manifest generation and the input_fingerprint() it belongs to.
+    Zero / None everywhere when there is nothing to resume.
+    """
+    state = dict(EMPTY_CHECKPOINT)
+    path = Path(path)
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            state.update(json.load(f))
+    return state
+
+
+def save_checkpoint(path: Path, done: int, offset: int, aggregate: dict = None, run_id: int = None,
+                    generation: int = None, reused: int = 0, fingerprint: str = None):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"done": done, "offset": offset, "aggregate": aggregate, "run_id": run_id,
+                   "generation": generation, "reused": reused, "fingerprint": fingerprint}, f)
+    os.replace(tmp, path)
+
+
+def run_batch(workers: int = 1, threads: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              folder: Path = BATCH_FOLDER, output: Path = OUTPUT_FILE, manifest=None,
+              flush_every: int = DEFAULT_FLUSH_EVERY, resume: bool = True, profile: str = None,
+              group_by: str = None, db=None, run_name: str = None, incremental: bool = True,
+              force: bool = False):
+    """
+    Streams pairs -> rows -> output file. Nothing but the in-flight chunks is held
+    in memory. Every `flush_every` rows the output is flushed and a checkpoint
+    (pairs done + byte offset) is written next to it. A rerun resumes from the
+    checkpoint and skips the pairs already written. The checkpoint is removed
+    once the run completes. `profile` selects a named config profile for the whole run.
+    A checkpoint left by a different input (another folder or manifest, an
+    edited manifest) or different settings is discarded and the run starts over.
+
+    Every row also feeds a StreamingAggregator (latency / tokens / cost
+    quantiles, overall and per `group_by` column). Its state rides along in the
+    checkpoint and is written to <output>.sketch.json at the end, for merging
+    with other shards (python -m src.evaluators.aggregate merge).
+
+    With `db` (a ResultsDB or a path) the run is also recorded in the SQLite
+    results store under `run_name`: pairs and claims are inserted in one
+    transaction per `flush_every` rows, just before each checkpoint. A resumed
+    run continues the same database run.
+
+    Incremental runs (the default) keep a ContentManifest next to the output.
+    Pairs whose content key (chat and context bytes, evaluator version, config
+    fingerprint, embedder) is in it reuse the stored row instead of being
+    evaluated. `force` recomputes every pair and refreshes the manifest.
+    """
+    output = Path(output)
+    ckpt = checkpoint_path(output)
+
+    folder_pairs = None if manifest else find_pairs(folder)
+    pairs = iter_manifest(manifest) if manifest else iter(folder_pairs)
+    fingerprint = input_fingerprint(manifest, folder_pairs, profile)
+
+    state = load_checkpoint(ckpt) if resume and output.exists() else dict(EMPTY_CHECKPOINT)
+    if state["done"] and state["fingerprint"] != fingerprint:
+        print(f"Checkpoint {ckpt} is for a different input or settings; starting over.")
+        state = dict(EMPTY_CHECKPOINT)
+    done, offset, agg_state = state["done"], state["offset"], state["aggregate"]
+    if done:
+        print(f"Resuming after {done} pairs.")
+    if db is not None and not isinstance(db, ResultsDB):
+        db = ResultsDB(db)
+    run_id = state["run_id"] if db is not None and done else None
+    if db is not None:
+        if run_id is None:
+            run_id = db.start_run(run_name, config=get_config(profile), embedder=embedder_name(),
+                                  source=str(manifest or folder))
+        else:
+            db.truncate_run(run_id, done)
+    pairs = itertools.islice(pairs, done, None)
+    manifest_db = None
+    if incremental:
+        manifest_db = ContentManifest(content_manifest_path(output))
+        generation = manifest_db.begin(state["generation"] if done else None)
+        pairs = plan_pairs(pairs, manifest_db, run_version(profile), force)
+    aggregator = None
+    if agg_state and agg_state["group_by"] == group_by:
+        aggregator = StreamingAggregator.from_dict(agg_state)
+
+    pending = []
+
+    busy = defaultdict(float)
+    start = time.perf_counter()
+    writer = ResultWriter(output, offset)
+    if aggregator is None and done:
+        # Checkpointed sketches are grouped differently: rebuild them from the rows kept
+        print(f"Rebuilding quantile sketches from the {done} rows already written (--group-by changed).")
+        writer.flush()
+        aggregator = aggregate_file(output, group_by)
+    elif aggregator is None:
+        aggregator = StreamingAggregator(group_by)
+    evaluated = 0
+    reused = state["reused"] if done else 0
+
+    try:
+        for row in iter_rows(pairs, workers, threads, chunk_size, busy, profile):
+            writer.write(row)
+            aggregator.add(row)
+            if db is not None:
+                pending.append(row)
+            if manifest_db is not None:
+                key, was_reused = row.pop("pair_key"), row.pop("reused")
+                reused += was_reused
+                if not was_reused:
+                    manifest_db.put(key, row)
+            evaluated += 1
+            if evaluated % flush_every == 0:
+                if pending:
+                    db.insert_pairs(run_id, pending, start_index=done + evaluated - len(pending))
+                    pending = []
+                if manifest_db is not None:
+                    manifest_db.commit()
+                save_checkpoint(ckpt, done + evaluated, writer.flush(), aggregator.to_dict(), run_id,
+                                generation if manifest_db is not None else None, reused, fingerprint)
+    finally:
+        offset = writer.flush()
+        writer.close()
+
+    if db is not None:
+        db.insert_pairs(run_id, pending, start_index=done + evaluated - len(pending))
+        db.finish_run(run_id)
+    if manifest_db is not None:
+        manifest_db.commit()
+        manifest_db.prune()
+        manifest_db.close()
+
+    save_state(aggregator, sketch_path(output))
+    ckpt.unlink(missing_ok=True)
+    wall = time.perf_counter() - start
+
+    stats = {
+        "pairs": evaluated,
+        "skipped": done,
+        "reused": reused,
+        "recomputed": done + evaluated - reused,
+        "wall_seconds": wall,
+        "pairs_per_sec": evaluated / wall if wall > 0 else 0.0,
+        "worker_utilization": {w: s / wall for w, s in busy.items()} if wall > 0 else {},
+        "summary": aggregator.summary(),
+        "run_id": run_id,
+    }
+
+    print(f"Batch results saved to {output}")
+    print(f"{stats['pairs']} pairs in {wall:.2f}s ({stats['pairs_per_sec']:.1f} pairs/sec)")
+    if manifest_db is not None:
+        print(f"  {stats['reused']} reused, {stats['recomputed']} recomputed")
+    for w, u in sorted(stats["worker_utilization"].items()):
+        print(f"  worker {w}: {u:.0%} busy")
+    for metric, m in stats["summary"]["overall"].items():
+        if m["count"]:
+            print(f"  {metric}: p50={m['p50']:.4g} p95={m['p95']:.4g} p99={m['p99']:.4g} (n={m['count']})")
+    return stats
 
 
 if __name__ == "__main__":
-    run_batch()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batch evaluation over data/samples or a JSONL manifest")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel workers (default: serial)")
+    parser.add_argument("--threads", action="store_true", help="Use threads instead of processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Pairs per task")
+    parser.add_argument("--manifest", help="JSONL file of {\"chat\", \"ctx\"} pairs, or - for stdin")
+    parser.add_argument("--output", default=str(OUTPUT_FILE), help="Output .csv or .jsonl")
+    parser.add_argument("--flush-every", type=int, default=DEFAULT_FLUSH_EVERY, help="Rows between checkpoints")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any checkpoint and start over")
+    parser.add_argument("--profile", help="Named config profile from configs/thresholds.yaml")
+    parser.add_argument("--group-by", help="Result column for per-group quantiles (e.g. verdict)")
+    parser.add_argument("--db", help="Also record the run in this SQLite results store (e.g. data/results.db)")
+    parser.add_argument("--run-name", help="Name for the run in the results store")
+    parser.add_argument("--force", action="store_true", help="Re-evaluate pairs whose content has not changed")
+    args = parser.parse_args()
+
+    run_batch(
+        workers=args.workers,
+        threads=args.threads,
+        chunk_size=args.chunk_size,
+        output=Path(args.output),
+        manifest=args.manifest,
+        flush_every=args.flush_every,
+        resume=not args.no_resume,
+        profile=args.profile,
+        group_by=args.group_by,
+        db=args.db,
+        run_name=args.run_name,
+        force=args.force,
+    )
@@ -0,0 +1,337 @@
+import sys
+import json
+import time
+import random
+import platform
+import datetime
+import tempfile
+import dataclasses
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+import src.utils.caching as caching
+import infra.faiss_index as faiss_index
+from src.utils.embedders import create_embedder
+from src.utils.embeddings import get_embedding_stats, reset_embedding_stats, set_embedder
+from src.utils.config import get_config
+from src.utils.stages import StageRecorder
+from src.main import evaluate_conversation
+
+# Span names recorded by src.main.evaluate_conversation (completeness = FAISS search)
+STAGES = ("parse", "pii", "embed", "relevance", "completeness", "factuality", "tokens", "report")
+
+# Default regression tolerance (relative) and noise floor for stage timings
+DEFAULT_TOLERANCE = 0.10
+MIN_STAGE_SECONDS = 0.005
+
+TOPICS = {
+    "ai": "artificial intelligence machine learning model training data neural network inference",
+    "space": "planet orbit star galaxy telescope rocket gravity mission astronaut satellite",
+    "health": "vaccine immune virus doctor patient trial dose hospital symptom treatment",
+    "finance": "market stock interest rate bank loan inflation bond investor portfolio",
+    "climate": "carbon emission temperature ocean ice energy solar wind policy forest",
+}
+NAMES = ["Alice Johnson", "Ravi Kumar", "Maria Lopez", "Chen Wei", "Tom Baker"]
+
+
+# -----------------------------
+# Synthetic data
+# -----------------------------
+
+def _sentence(rng: random.Random, words, n: int) -> str:
+    return " ".join(rng.choice(words) for _ in range(n)).capitalize() + "."
+
+
+def generate_dataset(out_dir, pairs: int = 100, turns: int = 1, contexts: int = 5,
+                     context_words: int = 40, shared_contexts: int = 0,
+                     pii_rate: float = 0.2, seed: int = 0) -> Path:
+    """
+    Writes `pairs` chat files with `turns` user/assistant turns each, their
+    context files with `contexts` chunks of ~`context_words` words, and a
+    manifest.jsonl usable by `python -m src.batch_eval --manifest`.
+    shared_contexts > 0 makes all pairs draw from that many context documents
+    (exercises index reuse). Returns the manifest path.
+    """
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    (out_dir / "chats").mkdir(parents=True, exist_ok=True)
+    (out_dir / "contexts").mkdir(parents=True, exist_ok=True)
+
+    def make_context(i):
+        topic = rng.choice(list(TOPICS))
+        words = TOPICS[topic].split()
+        doc = {"contexts": [
+            {"id": f"{topic}-{i}-{j}", "text": " ".join(
+                _sentence(rng, words, 10) for _ in range(max(1, context_words // 10)))}
+            for j in range(contexts)
+        ]}
+        path = out_dir / "contexts" / f"ctx-{i:06d}.json"
+        path.write_text(json.dumps(doc), encoding="utf-8")
+        return path, doc
+
+    shared = [make_context(i) for i in range(shared_contexts)]
+
+    manifest = out_dir / "manifest.jsonl"
+    with open(manifest, "w", encoding="utf-8") as mf:
+        for i in range(pairs):
+            ctx_path, ctx_doc = rng.choice(shared) if shared else make_context(i)
+            chunks = [c["text"] for c in ctx_doc["contexts"]]
+            messages = [{"role": "system", "content": "You are a helpful assistant."}]
+            clock = datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=rng.randrange(86400))
+            for t in range(turns):
+                question = f"Can you explain {rng.choice(chunks).split('.')[0].lower()}?"
+                if rng.random() < pii_rate:
+                    question += f" I am {rng.choice(NAMES)}, reach me at user{i}@example.com or +1 555 010 {t:04d}."
+                # Mostly supported sentences, some unsupported ones
+                answer = " ".join(
+                    rng.choice(rng.choice(chunks).split(". ")).rstrip(".") + "."
+                    if rng.random() < 0.8 else _sentence(rng, TOPICS[rng.choice(list(TOPICS))].split(), 8)
+                    for _ in range(3)
+                )
+                # Model latency: log-normal around ~2 s with a long tail
+                asked = clock + datetime.timedelta(seconds=rng.uniform(5, 60))
+                clock = asked + datetime.timedelta(seconds=rng.lognormvariate(0.7, 0.6))
+                messages += [
+                    {"role": "user", "content": question, "timestamp": asked.isoformat()},
+                    {"role": "assistant", "content": answer, "timestamp": clock.isoformat()},
+                ]
+
+            chat_path = out_dir / "chats" / f"chat-{i:06d}.json"
+            chat_path.write_text(json.dumps({"messages": messages}), encoding="utf-8")
+            mf.write(json.dumps({"chat": str(chat_path), "ctx": str(ctx_path)}) + "\n")
+    return manifest
+
+
+def load_manifest(manifest):
+    with open(manifest, "r", encoding="utf-8") as f:
+        return [(r["chat"], r["ctx"]) for r in map(json.loads, f) if r]
+
+
+# -----------------------------
+# Timed pipeline
+# -----------------------------
+
+def evaluate_timed(chat_path, ctx_path, seconds: dict, config) -> dict:
+    """
+    src.main.evaluate_conversation with a StageRecorder; each span's wall time
+    is added to seconds[stage].
+    """
+    recorder = StageRecorder()
+    out = evaluate_conversation(chat_path, ctx_path, config=config, recorder=recorder)
+    for span in recorder.spans:
+        seconds[span["stage"]] += span["wall_ms"] / 1000
+    return out
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _rate(hits, misses):
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+def run_benchmark(manifest, passes: int = 2, embedder: str = "hashing",
+                  token_counting: str = "approximate", work_dir=None) -> dict:
+    """
+    Evaluates every pair in `manifest` `passes` times against a fresh vector
+    cache and index registry (pass 1 cold, later passes warm). Returns the
+    results dict written by `run`.
+    """
+    pairs = load_manifest(manifest)
+    config = dataclasses.replace(get_config(), token_counting=token_counting)
+    backend = create_embedder(embedder)
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        previous = set_embedder(backend)
+        saved = caching._cache, faiss_index._registry
+        caching._cache = caching.MmapVectorCache(Path(tmp) / "cache")
+        faiss_index._registry = faiss_index.IndexRegistry(Path(tmp) / "indexes")
+        try:
+            results = []
+            for n in range(1, passes + 1):
+                reset_embedding_stats()
+                cache_before = caching._cache.stats()
+                index_before = faiss_index._registry.stats()
+                seconds = dict.fromkeys(STAGES, 0.0)
+                turns = 0
+                verdicts = {"PASS": 0, "WARN": 0, "FAIL": 0}
+
+                start = time.perf_counter()
+                cpu_start = time.process_time()
+                for chat_path, ctx_path in pairs:
+                    out = evaluate_timed(chat_path, ctx_path, seconds, config)
+                    turns += out["summary"]["turns"]
+                    verdicts[out["summary"]["verdict"]] += 1
+                wall = time.perf_counter() - start
+                cpu = time.process_time() - cpu_start
+
+                emb = get_embedding_stats()
+                cache_after = caching._cache.stats()
+                index_after = faiss_index._registry.stats()
+                index_hits = index_after["hits"] - index_before["hits"]
+                index_loads = index_after["loads"] - index_before["loads"]
+                index_builds = index_after["builds"] - index_before["builds"]
+
+                results.append({
+                    "pass": n,
+                    "pairs": len(pairs),
+                    "turns": turns,
+                    "wall_seconds": wall,
+                    "cpu_seconds": cpu,
+                    "pairs_per_sec": len(pairs) / wall if wall else 0.0,
+                    "turns_per_sec": turns / wall if wall else 0.0,
+                    "stages": {
+                        s: {"seconds": t, "per_pair_ms": t / len(pairs) * 1000 if pairs else 0.0}
+                        for s, t in seconds.items()
+                    },
+                    "cache": {
+                        "embedding_hit_rate": _rate(emb["hits"], emb["misses"]),
+                        "embedding_duplicates": emb["duplicates"],
+                        "encode_calls": emb["encode_calls"],
+                        "vector_cache_hit_rate": _rate(cache_after["hits"] - cache_before["hits"],
+                                                       cache_after["misses"] - cache_before["misses"]),
+                        "index_hit_rate": _rate(index_hits + index_loads, index_builds),
+                        "index_builds": index_builds,
+                    },
+                    "verdicts": verdicts,
+                })
+        finally:
+            caching._cache, faiss_index._registry = saved
+            set_embedder(previous)
+
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "embedder": backend.name,
+            "token_counting": token_counting,
+            "manifest": str(manifest),
+        },
+        "passes": results,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# -----------------------------
+# Baseline comparison
+# -----------------------------
+
+def compare_results(baseline: dict, current: dict, tolerance: float = DEFAULT_TOLERANCE,
+                    min_seconds: float = MIN_STAGE_SECONDS):
+    """
+    Lists regressions of `current` against `baseline`, per pass:
+    stage times or wall time more than `tolerance` slower (ignoring stages
+    under `min_seconds` in both), throughput more than `tolerance` lower, and
+    peak RSS more than `tolerance` higher. Returns (regressions, rows) where
+    rows describe every compared metric.
+    """
+    rows = []
+
+    def check(metric, old, new, higher_is_worse=True):
+        if old is None or new is None:
+            return
+        change = (new - old) / old if old else 0.0
+        worse = change > tolerance if higher_is_worse else change < -tolerance
+        rows.append({"metric": metric, "baseline": old, "current": new, "change": change, "regression": worse})
+
+    for old, new in zip(baseline["passes"], current["passes"]):
+        p = f"pass{old['pass']}"
+        check(f"{p}.pairs_per_sec", old["pairs_per_sec"], new["pairs_per_sec"], higher_is_worse=False)
+        check(f"{p}.wall_seconds", old["wall_seconds"], new["wall_seconds"])
+        for stage, o in old["stages"].items():
+            n = new["stages"].get(stage)
+            if n is None or max(o["seconds"], n["seconds"]) < min_seconds:
+                continue
+            check(f"{p}.stage.{stage}", o["seconds"], n["seconds"])
+    check("peak_rss_mb", baseline.get("peak_rss_mb"), current.get("peak_rss_mb"))
+
+    return [r for r in rows if r["regression"]], rows
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def _print_results(results: dict):
+    print(f"embedder={results['meta']['embedder']}  peak RSS={results['peak_rss_mb'] or 0:.1f} MB")
+    for p in results["passes"]:
+        c = p["cache"]
+        print(f"\npass {p['pass']}: {p['pairs']} pairs / {p['turns']} turns in {p['wall_seconds']:.2f}s "
+              f"({p['pairs_per_sec']:.1f} pairs/s, {p['turns_per_sec']:.1f} turns/s)")
+        for stage, t in p["stages"].items():
+            print(f"  {stage:12s} {t['seconds']:8.3f}s  {t['per_pair_ms']:8.2f} ms/pair")
+        print(f"  cache: embeddings {c['embedding_hit_rate']:.1%}, vector cache {c['vector_cache_hit_rate']:.1%}, "
+              f"FAISS indexes {c['index_hit_rate']:.1%} ({c['index_builds']} built)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline performance benchmark")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_gen = sub.add_parser("generate", help="Write a synthetic dataset + manifest")
+    p_run = sub.add_parser("run", help="Time every stage over a dataset")
+    for p in (p_gen, p_run):
+        p.add_argument("--pairs", type=int, default=200)
+        p.add_argument("--turns", type=int, default=1)
+        p.add_argument("--contexts", type=int, default=5, help="Context chunks per pair")
+        p.add_argument("--context-words", type=int, default=40)
+        p.add_argument("--shared-contexts", type=int, default=0, help="Distinct context docs shared by all pairs")
+        p.add_argument("--seed", type=int, default=0)
+    p_gen.add_argument("--out", required=True)
+
+    p_run.add_argument("--manifest", help="Existing manifest (otherwise a dataset is generated in a temp dir)")
+    p_run.add_argument("--passes", type=int, default=2, help="Pass 1 runs cold, later passes reuse caches")
+    p_run.add_argument("--embedder", default="hashing", help="Backend; 'hashing' runs offline")
+    p_run.add_argument("--token-counting", default="approximate", choices=["exact", "approximate"])
+    p_run.add_argument("--output", help="Write results JSON here")
+
+    p_cmp = sub.add_parser("compare", help="Flag regressions against a baseline results JSON")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    args = parser.parse_args()
+
+    if args.cmd == "generate":
+        manifest = generate_dataset(args.out, args.pairs, args.turns, args.contexts, args.context_words,
+                                    args.shared_contexts, seed=args.seed)
+        print(f"Wrote {args.pairs} pairs, manifest: {manifest}")
+
+    elif args.cmd == "run":
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = args.manifest or generate_dataset(
+                tmp, args.pairs, args.turns, args.contexts, args.context_words, args.shared_contexts, seed=args.seed)
+            results = run_benchmark(manifest, args.passes, args.embedder, args.token_counting)
+        if not args.manifest:
+            results["meta"]["dataset"] = {k: getattr(args, k) for k in
+                                          ("pairs", "turns", "contexts", "context_words", "shared_contexts", "seed")}
+        _print_results(results)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"\nWrote {args.output}")
+
+    elif args.cmd == "compare":
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, "r", encoding="utf-8") as f:
+            current = json.load(f)
+        regressions, rows = compare_results(baseline, current, args.tolerance)
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else "ok"
+            print(f"{r['metric']:32s} {r['baseline']:12.4f} -> {r['current']:12.4f} ({r['change']:+7.1%})  {flag}")
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import signal
+import socket
+import threading
+import socketserver
+from pathlib import Path
+
+# Unix socket the daemon listens on (override with LLM_EVAL_SOCKET)
+DEFAULT_SOCKET = Path(os.environ.get("LLM_EVAL_SOCKET", "data/llm-eval.sock"))
+
+# Seconds a client waits for a reply (a cold daemon may still be loading the model)
+DEFAULT_TIMEOUT = 300.0
+PING_TIMEOUT = 1.0
+
+
+class DaemonError(RuntimeError):
+    """The daemon received the request but evaluating it failed."""
+
+
+# -----------------------------
+# Client
+# -----------------------------
+
+def request_daemon(request: dict, socket_path=None, timeout: float = DEFAULT_TIMEOUT):
+    """
+    Sends one request to a running daemon and returns its result.
+    Returns None when no daemon is listening, so callers can fall back to
+    in-process evaluation. Raises DaemonError if the request itself failed.
+    """
+    path = Path(socket_path or DEFAULT_SOCKET)
+    if not path.exists():
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None  # stale socket file, daemon is gone
+
+    if not chunks:
+        raise DaemonError("Daemon closed the connection without replying")
+    reply = json.loads(b"".join(chunks))
+    if not reply["ok"]:
+        raise DaemonError(reply["error"])
+    return reply["result"]
+
+
+def evaluate_request(chat_path: str, ctx_path: str, profile: str = None,
+                     trace: bool = False, conversation: bool = False, timings: bool = False) -> dict:
+    """Builds an "evaluate" request; paths are made absolute since the daemon may run elsewhere."""
+    return {
+        "op": "evaluate",
+        "chat": str(Path(chat_path).resolve()),
+        "ctx": str(Path(ctx_path).resolve()),
+        "profile": profile,
+        "trace": trace,
+        "conversation": conversation,
+        "timings": timings,
+    }
+
+
+def ping(socket_path=None):
+    """Daemon status dict, or None when none is running."""
+    try:
+        return request_daemon({"op": "ping"}, socket_path, timeout=PING_TIMEOUT)
+    except (socket.timeout, OSError):
+        return None
+
+
+# -----------------------------
+# Server
+# -----------------------------
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = {}
+        try:
+            request = json.loads(self.rfile.readline())
+            reply = {"ok": True, "result": self.server.dispatch(request)}
+        except Exception as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+
+        # Only stop once the client has its reply
+        if request.get("op") == "shutdown":
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class EvalDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Long-lived evaluator: the embedding model, tokenizer, vector cache and FAISS
+    index registry stay loaded between requests. One JSON request per
+    connection, one JSON reply.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path=DEFAULT_SOCKET):
+        self.socket_path = Path(socket_path)
+        self.started = time.time()
+        self.served = 0
+        self._served_lock = threading.Lock()
+        super().__init__(str(self.socket_path), _Handler)
+
+    def server_bind(self):
+        # Owner-only socket: a client can make the daemon read any path it can, or stop it
+        old_umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.server_address, 0o600)
+
+    def dispatch(self, request: dict):
+        op = request.get("op", "evaluate")
+
+        if op == "ping":
+            return {"pid": os.getpid(), "uptime_seconds": time.time() - self.started, "served": self.served}
+
+        if op == "shutdown":
+            return {"pid": os.getpid()}
+
+        if op == "evaluate":
+            from src.main import evaluate, evaluate_conversation
+
+            if request.get("conversation"):
+                result = evaluate_conversation(request["chat"], request["ctx"], profile=request.get("profile"),
+                                               trace=request.get("trace", False),
+                                               timings=request.get("timings", False))
+            else:
+                result = evaluate(request["chat"], request["ctx"], trace=request.get("trace", False),
+                                  profile=request.get("profile"), timings=request.get("timings", False))
+            with self._served_lock:
+                self.served += 1
+            return result
+
+        raise ValueError(f"Unknown op: {op}")
+
+
+def warm_up(profile: str = None):
+    """Loads everything the first request would otherwise pay for."""
+    from src.utils.config import get_config
+    from src.utils.embeddings import get_model
+    from src.utils.caching import get_cache
+    from src.utils.token_utils import get_encoding
+    from infra.faiss_index import get_registry
+    import src.main  # noqa: F401  (evaluators, pydantic schemas)
+    import faiss  # noqa: F401
+
+    config = get_config(profile)
+    get_cache()
+    get_registry()
+    get_model()
+    if config.token_counting == "exact":
+        get_encoding(config.model)
+
+
+def serve(socket_path=DEFAULT_SOCKET, warm: bool = True):
+    """Runs the daemon in the foreground until Ctrl+C, SIGTERM or a "shutdown" request."""
+    socket_path = Path(socket_path)
+    if socket_path.exists():
+        if ping(socket_path) is not None:
+            raise RuntimeError(f"A daemon is already listening on {socket_path}")
+        socket_path.unlink()  # left behind by a crashed daemon
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if warm:
+        start = time.perf_counter()
+        warm_up()
+        print(f"Warmed up in {time.perf_counter() - start:.2f}s")
+
+    server = EvalDaemon(socket_path)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    print(f"Listening on {socket_path} (pid {os.getpid()})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Warm local evaluation daemon")
+    parser.add_argument("--socket", default=str(DEFAULT_SOCKET), help="Unix socket path")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_serve = sub.add_parser("serve", help="Run the daemon in the foreground")
+    p_serve.add_argument("--no-warm", action="store_true", help="Load the model on the first request instead")
+    p_eval = sub.add_parser("evaluate", help="Evaluate via the daemon (stdlib-only client), in-process if none runs")
+    p_eval.add_argument("--chat", required=True)
+    p_eval.add_argument("--ctx", required=True)
+    p_eval.add_argument("--profile")
+    p_eval.add_argument("--trace", action="store_true")
+    p_eval.add_argument("--conversation", action="store_true")
+    p_eval.add_argument("--timings", action="store_true")
+    sub.add_parser("status", help="Show whether a daemon is running")
+    sub.add_parser("stop", help="Ask a running daemon to exit")
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        serve(args.socket, warm=not args.no_warm)
+    elif args.cmd == "evaluate":
+        request = evaluate_request(args.chat, args.ctx, args.profile, args.trace, args.conversation, args.timings)
+        result = request_daemon(request, args.socket)
+        if result is None:
+            from src.main import evaluate, evaluate_conversation
+            if args.conversation:
+                result = evaluate_conversation(args.chat, args.ctx, profile=args.profile, trace=args.trace,
+                                               timings=args.timings)
+            else:
+                result = evaluate(args.chat, args.ctx, trace=args.trace, profile=args.profile, timings=args.timings)
+        print(json.dumps(result, indent=2))
+    elif args.cmd == "status":
+        status = ping(args.socket)
+        print(json.dumps(status, indent=2) if status else "No daemon running")
+    elif args.cmd == "stop":
+        print("Stopped" if request_daemon({"op": "shutdown"}, args.socket, PING_TIMEOUT) else "No daemon running")
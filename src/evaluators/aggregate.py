@@ -0,0 +1,237 @@
+import csv
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+from src.utils.sketches import QuantileSketch, DEFAULT_RELATIVE_ACCURACY
+
+# Result columns summarized by default (see src.batch_eval.RESULT_FIELDS)
+METRICS = ("latency", "total_tokens", "cost_usd")
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Rows per chunk when streaming a results file
+CHUNK_ROWS = 1 << 18
+
+
+def _number(value) -> float:
+    """Row value -> float; missing / empty cells become NaN (skipped by the sketches)."""
+    if value is None or value == "":
+        return math.nan
+    return float(value)
+
+
+def _quantile_label(q: float) -> str:
+    return f"p{q * 100:g}"
+
+
+# -----------------------------
+# Aggregator
+# -----------------------------
+
+class StreamingAggregator:
+    """
+    Constant-memory summary of a results stream: one QuantileSketch per metric,
+    overall and per value of the `group_by` column. Memory grows with the
+    number of groups, never with the number of rows. Aggregators built over
+    different shards merge into the summary of the whole run.
+    """
+
+    def __init__(self, group_by: str = None, metrics=METRICS,
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.group_by = group_by
+        self.metrics = tuple(metrics)
+        self.relative_accuracy = relative_accuracy
+        self.rows = 0
+        self.overall = self._new_sketches()
+        self.groups = {}
+
+    def _new_sketches(self) -> dict:
+        return {m: QuantileSketch(self.relative_accuracy) for m in self.metrics}
+
+    def _group(self, key) -> dict:
+        key = "" if key is None else str(key)
+        sketches = self.groups.get(key)
+        if sketches is None:
+            sketches = self.groups[key] = self._new_sketches()
+        return sketches
+
+    def add(self, row: dict):
+        """Adds one result row (dict with the metric columns)."""
+        self.rows += 1
+        targets = [self.overall]
+        if self.group_by:
+            targets.append(self._group(row.get(self.group_by)))
+        for m in self.metrics:
+            value = _number(row.get(m))
+            if not math.isnan(value):
+                for sketches in targets:
+                    sketches[m].add(value)
+
+    def add_columns(self, columns: dict, groups=None):
+        """
+        Vectorized add() for a block of rows: `columns` maps metric -> array
+        (NaN = missing), `groups` is the matching array of group keys.
+        """
+        n = len(next(iter(columns.values()))) if columns else 0
+        self.rows += n
+        values = {m: np.asarray(columns[m], dtype=np.float64) for m in self.metrics}
+        for m in self.metrics:
+            self.overall[m].add_many(values[m])
+
+        if self.group_by and groups is not None:
+            groups = np.array(["" if g is None else str(g) for g in groups])
+            keys, inverse = np.unique(groups, return_inverse=True)
+            for i, key in enumerate(keys.tolist()):
+                mask = inverse == i
+                sketches = self._group(key)
+                for m in self.metrics:
+                    sketches[m].add_many(values[m][mask])
+
+    def merge(self, other: "StreamingAggregator"):
+        """Adds another aggregator (e.g. another shard's) into this one."""
+        if other.metrics != self.metrics or other.group_by != self.group_by:
+            raise ValueError("Cannot merge aggregators with different metrics or group_by.")
+        self.rows += other.rows
+        for m in self.metrics:
+            self.overall[m].merge(other.overall[m])
+        for key, sketches in other.groups.items():
+            mine = self._group(key)
+            for m in self.metrics:
+                mine[m].merge(sketches[m])
+        return self
+
+    # -----------------------------
+    # Output
+    # -----------------------------
+
+    def summary(self, quantiles=QUANTILES) -> dict:
+        """count / mean / min / max and quantiles per metric, overall and per group."""
+
+        def describe(sketches):
+            out = {}
+            for m, s in sketches.items():
+                stats = {"count": s.count, "mean": s.mean,
+                         "min": s.min if s.count else None, "max": s.max if s.count else None}
+                stats.update({_quantile_label(q): s.quantile(q) for q in quantiles})
+                out[m] = stats
+            return out
+
+        result = {"rows": self.rows, "overall": describe(self.overall)}
+        if self.group_by:
+            result["group_by"] = self.group_by
+            result["groups"] = {k: describe(v) for k, v in sorted(self.groups.items())}
+        return result
+
+    def to_dict(self) -> dict:
+        """Serializable sketch state (for checkpoints and shard merging)."""
+        return {
+            "group_by": self.group_by,
+            "metrics": list(self.metrics),
+            "relative_accuracy": self.relative_accuracy,
+            "rows": self.rows,
+            "overall": {m: s.to_dict() for m, s in self.overall.items()},
+            "groups": {k: {m: s.to_dict() for m, s in v.items()} for k, v in self.groups.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "StreamingAggregator":
+        agg = cls(state["group_by"], state["metrics"], state["relative_accuracy"])
+        agg.rows = state["rows"]
+        agg.overall = {m: QuantileSketch.from_dict(s) for m, s in state["overall"].items()}
+        agg.groups = {k: {m: QuantileSketch.from_dict(s) for m, s in v.items()}
+                      for k, v in state["groups"].items()}
+        return agg
+
+
+# -----------------------------
+# Files
+# -----------------------------
+
+def save_state(agg: StreamingAggregator, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(agg.to_dict(), f)
+
+
+def load_state(path) -> StreamingAggregator:
+    with open(path, "r", encoding="utf-8") as f:
+        return StreamingAggregator.from_dict(json.load(f))
+
+
+def aggregate_file(path, group_by: str = None, metrics=METRICS,
+                   chunk_rows: int = CHUNK_ROWS) -> StreamingAggregator:
+    """
+    Streams a batch results file (.csv or .jsonl) through a StreamingAggregator,
+    `chunk_rows` rows at a time. CSV goes through pandas' C parser when pandas
+    is installed.
+    """
+    path = Path(path)
+    agg = StreamingAggregator(group_by, metrics)
+    columns = list(metrics) + ([group_by] if group_by else [])
+
+    if path.suffix not in (".jsonl", ".ndjson"):
+        try:
+            import pandas as pd
+        except ImportError:
+            pd = None
+        if pd is not None:
+            dtypes = dict.fromkeys(metrics, "float64")
+            if group_by:
+                dtypes[group_by] = "str"
+            # Metric columns missing from older results files count as all-missing
+            reader = pd.read_csv(path, usecols=lambda c: c in columns, dtype=dtypes,
+                                 chunksize=chunk_rows, engine="c")
+            for chunk in reader:
+                missing = np.full(len(chunk), np.nan)
+                agg.add_columns({m: chunk[m].to_numpy() if m in chunk else missing for m in metrics},
+                                chunk[group_by].fillna("").to_numpy() if group_by else None)
+            return agg
+
+    def flush(block):
+        agg.add_columns({m: [_number(r.get(m)) for r in block] for m in metrics},
+                        [r.get(group_by) for r in block] if group_by else None)
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.suffix in (".jsonl", ".ndjson"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        block = []
+        for r in rows:
+            block.append(r)
+            if len(block) == chunk_rows:
+                flush(block)
+                block = []
+        if block:
+            flush(block)
+    return agg
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Streaming p50/p95/p99 summaries of batch results")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_sum = sub.add_parser("summarize", help="Summarize a results file")
+    p_sum.add_argument("results", help="Batch results .csv or .jsonl")
+    p_sum.add_argument("--group-by", help="Column to group by (e.g. verdict, context_file)")
+    p_sum.add_argument("--metrics", nargs="+", default=list(METRICS), help="Numeric columns to sketch")
+    p_sum.add_argument("--state", help="Also write the mergeable sketch state here")
+
+    p_merge = sub.add_parser("merge", help="Merge sketch states from sharded runs")
+    p_merge.add_argument("states", nargs="+", help="Sketch state files (.sketch.json)")
+    p_merge.add_argument("--state", help="Write the merged state here")
+
+    args = parser.parse_args()
+
+    if args.command == "summarize":
+        agg = aggregate_file(args.results, args.group_by, args.metrics)
+    else:
+        agg = load_state(args.states[0])
+        for path in args.states[1:]:
+            agg.merge(load_state(path))
+
+    if args.state:
+        save_state(agg, args.state)
+    print(json.dumps(agg.summary(), indent=2))
@@ -0,0 +1,272 @@
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+from src.utils.config import get_config
+from src.utils.column_store import ColumnStore
+
+VERDICT_LABELS = np.array(["PASS", "WARN", "FAIL"])
+PASS, WARN, FAIL = 0, 1, 2
+
+SCORE_COLUMNS = ("relevance", "completeness", "factuality")
+
+# Rows per block when materializing (weights x rows) quality matrices
+WEIGHT_SWEEP_BLOCK = 1 << 16
+
+
+# -----------------------------
+# Loading stored results
+# -----------------------------
+
+def load_score_columns(path) -> dict:
+    """
+    Reads relevance / completeness / factuality from a batch results file
+    (.csv or .jsonl) or column store directory into float64 arrays. CSV goes
+    through pandas' C parser when pandas is installed.
+    """
+    path = Path(path)
+    if path.is_dir():
+        store = ColumnStore(path)
+        return {c: np.asarray(store.column(c)) for c in SCORE_COLUMNS}
+    if path.suffix not in (".jsonl", ".ndjson"):
+        try:
+            import pandas as pd
+        except ImportError:
+            pd = None
+        if pd is not None:
+            df = pd.read_csv(path, usecols=list(SCORE_COLUMNS), dtype="float64", engine="c")
+            return {c: df[c].to_numpy() for c in SCORE_COLUMNS}
+
+    cols = {c: [] for c in SCORE_COLUMNS}
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.suffix in (".jsonl", ".ndjson"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for r in rows:
+            cols["relevance"].append(r["relevance"])
+            cols["completeness"].append(r["completeness"])
+            cols["factuality"].append(r["factuality"])
+
+    return {c: np.asarray(v, dtype=np.float64) for c, v in cols.items()}
+
+
+# -----------------------------
+# Vectorized scoring (same rules as reporter.py)
+# -----------------------------
+
+def quality_scores(rel, comp, fact, weights=None) -> np.ndarray:
+    """compute_quality_score() for N rows at once."""
+    w = weights or get_config().weights
+    score = w.relevance * np.asarray(rel) + w.completeness * np.asarray(comp) + w.factuality * np.asarray(fact)
+    return np.clip(score, 0.0, 1.0)
+
+
+def verdict_codes(rel, comp, fact, config=None) -> np.ndarray:
+    """make_verdict() for N rows at once; returns PASS/WARN/FAIL codes (0/1/2)."""
+    th = config or get_config()
+    rel_ok = np.asarray(rel) >= th.relevance_min
+    comp_ok = np.asarray(comp) >= th.completeness_min
+    fact_ok = np.asarray(fact) >= th.factuality_min
+
+    codes = np.full(rel_ok.shape, WARN, dtype=np.int8)
+    codes[rel_ok & comp_ok] = PASS
+    codes[~fact_ok] = FAIL
+    return codes
+
+
+def verdicts(rel, comp, fact, config=None) -> np.ndarray:
+    """Verdict labels ("PASS"/"WARN"/"FAIL") for N rows."""
+    return VERDICT_LABELS[verdict_codes(rel, comp, fact, config)]
+
+
+# -----------------------------
+# Sweeps
+# -----------------------------
+
+def sweep_thresholds(rel, comp, fact, relevance_min, completeness_min, factuality_min) -> dict:
+    """
+    PASS/WARN/FAIL rates for every combination of the three threshold grids.
+
+    Each row is binned once per axis (how many thresholds it clears), one
+    bincount builds the 3-D histogram, and suffix sums turn it into "rows
+    clearing thresholds (i, j, k)" for the whole grid. Cost is O(N) plus the
+    grid size, independent of how many combinations are swept.
+
+    Returns arrays of shape (len(relevance_min), len(completeness_min), len(factuality_min)).
+    """
+    grids = [np.sort(np.asarray(g, dtype=np.float64)) for g in (relevance_min, completeness_min, factuality_min)]
+    # A missing (NaN) score clears no threshold, as in make_verdict()
+    cols = [np.nan_to_num(np.asarray(c, dtype=np.float64), nan=-np.inf) for c in (rel, comp, fact)]
+    n = len(cols[0])
+    shape = tuple(len(g) + 1 for g in grids)
+
+    # bin b = number of thresholds <= value, i.e. the row clears thresholds [0, b)
+    bins = [np.searchsorted(g, c, side="right") for g, c in zip(grids, cols)]
+    hist = np.bincount(np.ravel_multi_index(bins, shape), minlength=int(np.prod(shape))).reshape(shape)
+
+    # cleared[i, j, k] = rows with bin_r > i, bin_c > j, bin_f > k
+    cleared = hist[::-1, ::-1, ::-1].cumsum(0).cumsum(1).cumsum(2)[::-1, ::-1, ::-1][1:, 1:, 1:]
+    fact_cleared = np.bincount(bins[2], minlength=shape[2])[::-1].cumsum()[::-1][1:]
+
+    denom = max(n, 1)
+    fail = (n - fact_cleared)[None, None, :] / denom
+    pass_rate = cleared / denom
+    fail_rate = np.broadcast_to(fail, pass_rate.shape)
+
+    return {
+        "relevance_min": grids[0],
+        "completeness_min": grids[1],
+        "factuality_min": grids[2],
+        "pass_rate": pass_rate,
+        "warn_rate": 1.0 - pass_rate - fail_rate if n else np.zeros_like(pass_rate),
+        "fail_rate": fail_rate.copy(),
+        "rows": n,
+    }
+
+
+def sweep_weights(rel, comp, fact, weight_grid, quality_min=None) -> dict:
+    """
+    Quality scores under many weight triples at once.
+    weight_grid: (G, 3) array of (relevance, completeness, factuality) weights.
+    Returns mean quality per triple and, if `quality_min` is given, the
+    (G, T) fraction of rows with quality >= each threshold.
+    """
+    W = np.asarray(weight_grid, dtype=np.float64).reshape(-1, 3)
+    X = np.vstack([np.asarray(c, dtype=np.float64) for c in (rel, comp, fact)])
+    n = X.shape[1]
+    thresholds = None if quality_min is None else np.asarray(quality_min, dtype=np.float64)
+
+    total = np.zeros(len(W))
+    above = None if thresholds is None else np.zeros((len(W), len(thresholds)))
+
+    for start in range(0, n, WEIGHT_SWEEP_BLOCK):
+        Q = np.clip(W @ X[:, start:start + WEIGHT_SWEEP_BLOCK], 0.0, 1.0)
+        total += Q.sum(axis=1)
+        if thresholds is not None:
+            Q.sort(axis=1)
+            for g in range(len(W)):
+                above[g] += Q.shape[1] - np.searchsorted(Q[g], thresholds, side="left")
+
+    denom = max(n, 1)
+    out = {"weights": W, "mean_quality": total / denom, "rows": n}
+    if thresholds is not None:
+        out["quality_min"] = thresholds
+        out["pass_rate"] = above / denom
+    return out
+
+
+def pass_rate_curves(rel, comp, fact, grids: dict, config=None) -> dict:
+    """
+    One curve per threshold axis: pass/fail rate as that threshold varies while
+    the other two stay at their configured values.
+    """
+    th = config or get_config()
+    base = {
+        "relevance_min": [th.relevance_min],
+        "completeness_min": [th.completeness_min],
+        "factuality_min": [th.factuality_min],
+    }
+    curves = {}
+    for axis, values in grids.items():
+        res = sweep_thresholds(rel, comp, fact, **{**base, axis: values})
+        curves[axis] = {
+            "threshold": res[axis].tolist(),
+            "pass_rate": res["pass_rate"].ravel().tolist(),
+            "fail_rate": res["fail_rate"].ravel().tolist(),
+        }
+    return curves
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+
+def _parse_grid(spec: str) -> np.ndarray:
+    """'0.5:0.8:0.05' (inclusive range) or '0.5,0.6,0.7'."""
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        return np.round(np.arange(start, stop + step / 2, step), 10)
+    return np.array([float(x) for x in spec.split(",")])
+
+
+def _to_json(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, dict):
+        return {k: _to_json(v) for k, v in obj.items()}
+    return obj
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="What-if verdict analysis over stored scores")
+    parser.add_argument("--results", default="data/batch_results.csv", help="Batch results (.csv, .jsonl or .cols store)")
+    parser.add_argument("--profile", help="Config profile providing the baseline thresholds/weights")
+    parser.add_argument("--relevance-min", help="Grid, e.g. 0.5:0.8:0.05")
+    parser.add_argument("--completeness-min", help="Grid, e.g. 0.4:0.8:0.05")
+    parser.add_argument("--factuality-min", help="Grid, e.g. 0.4:0.8:0.05")
+    parser.add_argument("--weights", nargs="*", default=[], help="Weight triples, e.g. 0.4,0.3,0.3 0.5,0.25,0.25")
+    parser.add_argument("--quality-min", help="Quality thresholds for the weight sweep, e.g. 0.5:0.9:0.1")
+    parser.add_argument("--output", help="Write the full result as JSON")
+    args = parser.parse_args()
+
+    config = get_config(args.profile)
+    start = time.perf_counter()
+    cols = load_score_columns(args.results)
+    rel, comp, fact = cols["relevance"], cols["completeness"], cols["factuality"]
+    print(f"Loaded {len(rel)} rows in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    codes = verdict_codes(rel, comp, fact, config)
+    result = {
+        "rows": len(rel),
+        "profile": config.profile,
+        "current": {
+            "mean_quality": float(quality_scores(rel, comp, fact, config.weights).mean()) if len(rel) else 0.0,
+            "verdicts": {str(label): int((codes == i).sum()) for i, label in enumerate(VERDICT_LABELS)},
+        },
+    }
+
+    grids = {
+        axis: _parse_grid(spec)
+        for axis, spec in (
+            ("relevance_min", args.relevance_min),
+            ("completeness_min", args.completeness_min),
+            ("factuality_min", args.factuality_min),
+        )
+        if spec
+    }
+    if grids:
+        result["curves"] = pass_rate_curves(rel, comp, fact, grids, config)
+        full = {
+            "relevance_min": grids.get("relevance_min", [config.relevance_min]),
+            "completeness_min": grids.get("completeness_min", [config.completeness_min]),
+            "factuality_min": grids.get("factuality_min", [config.factuality_min]),
+        }
+        result["grid"] = sweep_thresholds(rel, comp, fact, **full)
+
+    if args.weights:
+        weight_grid = [[float(x) for x in w.split(",")] for w in args.weights]
+        quality_min = _parse_grid(args.quality_min) if args.quality_min else None
+        result["weights"] = sweep_weights(rel, comp, fact, weight_grid, quality_min)
+
+    print(f"Scored in {time.perf_counter() - start:.2f}s")
+    print(f"Current verdicts ({config.profile}): {result['current']['verdicts']}")
+    for axis, curve in result.get("curves", {}).items():
+        print(f"\n{axis}:")
+        for t, p, fl in zip(curve["threshold"], curve["pass_rate"], curve["fail_rate"]):
+            print(f"  {t:6.3f}  pass {p:7.2%}  fail {fl:7.2%}")
+    if "weights" in result:
+        print("\nweights (rel, comp, fact) -> mean quality:")
+        for w, q in zip(result["weights"]["weights"], result["weights"]["mean_quality"]):
+            print(f"  {tuple(w.tolist())} -> {q:.4f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(_to_json(result), f, indent=2)
+        print(f"\nWrote {args.output}")
@@ -1,6 +1,8 @@
 import re
 from typing import List, Dict
-from src.utils.embeddings import embed_text, cosine_similarity
+import numpy as np
+from src.utils.embeddings import lookup_vectors, cosine_similarity_matrix
+from src.utils.config import get_config
 
 
 def split_into_claims(text: str) -> List[str]:
@@ -14,44 +16,72 @@ def split_into_claims(text: str) -> List[str]:
     return claims
 
 
-def score_claim_against_context(claim: str, contexts: List) -> float:
+def claim_context_matrix(claims: List[str], contexts: List, vectors=None) -> np.ndarray:
     """
-    Computes maximum similarity between a claim and all context chunks.
+    Embeds all claims and all context chunks once (two batched encodes, or
+    lookups in a precomputed VectorTable) and returns the (claims x contexts)
+    cosine similarity matrix.
+    """
+    if not claims or not contexts:
+        return np.zeros((len(claims), len(contexts)), dtype=np.float32)
+
+    claim_vecs = lookup_vectors(claims, vectors)
+    ctx_vecs = lookup_vectors([c.text for c in contexts], vectors)
+    return cosine_similarity_matrix(claim_vecs, ctx_vecs)
+
+
+def score_claims_against_contexts(claims: List[str], contexts: List, vectors=None):
+    """
+    Scores every claim against every context chunk in one pass.
+
+    Returns (scores, best_ids): the max similarity per claim and the id of
+    the context chunk that supports it best (None when there are no contexts).
     """
-    claim_vec = embed_text(claim)
-    sims = []
+    sims = claim_context_matrix(claims, contexts, vectors)
 
-    for ctx in contexts:
-        ctx_vec = embed_text(ctx.text)
-        sims.append(cosine_similarity(claim_vec, ctx_vec))
+    if sims.shape[1] == 0:
+        return [0.0] * len(claims), [None] * len(claims)
 
-    return max(sims) if sims else 0.0
+    best = sims.argmax(axis=1)
+    scores = [float(sims[i, j]) for i, j in enumerate(best)]
+    best_ids = [contexts[j].id for j in best]
+    return scores, best_ids
 
 
-def factuality_report(answer: str, contexts: List) -> Dict:
+def score_claim_against_context(claim: str, contexts: List) -> float:
+    """
+    Computes maximum similarity between a claim and all context chunks.
+    """
+    scores, _ = score_claims_against_contexts([claim], contexts)
+    return scores[0]
+
+
+def factuality_report(answer: str, contexts: List, vectors=None, config=None) -> Dict:
     """
+    vectors: optional precomputed VectorTable (see evaluate()).
+    config: EvalConfig providing hallucination_threshold (current default when None).
+
     Returns:
     {
         "claims": [...],
         "claim_scores": [...],
+        "claim_sources": [...],
         "avg_score": float,
         "hallucinated_claims": [...]
     }
     """
 
     claims = split_into_claims(answer)
-    scores = []
-
-    for c in claims:
-        s = score_claim_against_context(c, contexts)
-        scores.append(s)
+    scores, sources = score_claims_against_contexts(claims, contexts, vectors)
 
-    # Determine hallucinations (threshold = 0.55 but adjustable later)
-    hallucinated = [claims[i] for i, s in enumerate(scores) if s < 0.55]
+    # Determine hallucinations (threshold from configs/thresholds.yaml)
+    threshold = (config or get_config()).hallucination_threshold
+    hallucinated = [claims[i] for i, s in enumerate(scores) if s < threshold]
 
     return {
         "claims": claims,
         "claim_scores": scores,
+        "claim_sources": sources,
         "avg_score": sum(scores) / len(scores) if scores else 0.0,
         "hallucinated_claims": hallucinated,
     }
@@ -1,6 +1,6 @@
-import tiktoken
 from typing import Dict
-from datetime import datetime
+from datetime import datetime, timezone
+from src.utils import token_utils
 
 
 # ------------------------------
@@ -9,13 +9,10 @@ from datetime import datetime
 
 def count_tokens(text: str, model_name: str = "gpt-3.5-turbo") -> int:
     """
-    Uses free tiktoken library to approximate token count.
+    Uses free tiktoken library to count tokens (encoder cached per model,
+    see src/utils/token_utils.py).
     """
-    try:
-        enc = tiktoken.encoding_for_model(model_name)
-    except KeyError:
-        enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
+    return token_utils.count_tokens(text, model_name)
 
 
 def estimate_cost(tokens: int, price_per_1k_tokens: float) -> float:
@@ -30,12 +27,33 @@ def estimate_cost(tokens: int, price_per_1k_tokens: float) -> float:
 # Latency calculation
 # ------------------------------
 
-def calculate_latency(start_ts: str, end_ts: str) -> float:
+def _as_utc(ts) -> datetime:
+    """ISO string or datetime -> aware UTC datetime (naive values are taken as UTC)."""
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def calculate_latency(start_ts, end_ts) -> float:
     """
-    Timestamps must be ISO strings like '2024-01-01T12:00:05'.
+    Timestamps are ISO strings like '2024-01-01T12:00:05' (or datetimes).
+    Naive and offset-aware values may be mixed: naive ones are taken as UTC.
     Returns latency in seconds.
     """
-    t1 = datetime.fromisoformat(start_ts)
-    t2 = datetime.fromisoformat(end_ts)
+    t1 = _as_utc(start_ts)
+    t2 = _as_utc(end_ts)
     delta = (t2 - t1).total_seconds()
     return float(delta)
+
+
+def turn_latency(user_msg, replies):
+    """
+    Seconds from a user message to the last assistant message answering it,
+    taken from the messages' own timestamps. None when either side has no
+    timestamp (no latency is reported rather than a made-up one).
+    """
+    if not replies or user_msg.timestamp is None or replies[-1].timestamp is None:
+        return None
+    return calculate_latency(user_msg.timestamp, replies[-1].timestamp)
@@ -1,39 +1,38 @@
-from src.utils.embeddings import embed_text, cosine_similarity
-from infra.faiss_index import build_faiss_index, search_index
+from src.utils.embeddings import lookup_vectors, cosine_similarity
+from infra.faiss_index import get_registry, normalize_rows, search_index
 
 
-def relevance_score(user_question: str, answer: str) -> float:
+def relevance_score(user_question: str, answer: str, vectors=None) -> float:
     """
     Measures semantic similarity between the user question and assistant answer.
+    vectors: optional precomputed VectorTable (see evaluate()).
     """
-    q_vec = embed_text(user_question)
-    a_vec = embed_text(answer)
+    q_vec, a_vec = lookup_vectors([user_question, answer], vectors)
     return cosine_similarity(q_vec, a_vec)
 
 
-def completeness_check(answer: str, contexts: list) -> float:
+def completeness_check(answer: str, contexts: list, vectors=None) -> float:
     """
-    Uses FAISS to quickly find the most relevant context chunk.
-    Converts FAISS L2 distance into a similarity-like score.
+    Uses a cached FAISS index to quickly find the most relevant context chunk.
+    vectors: optional precomputed VectorTable (see evaluate()).
     """
     # Prepare list of context strings
     ctx_texts = [c.text for c in contexts]
 
-    # 1️⃣ Build FAISS index (fast, uses embed_batch internally)
-    index, vectors = build_faiss_index(ctx_texts)
+    # 1️⃣ Reuse (or build once) the normalized inner-product index for this context set
+    ctx_vecs = vectors.matrix(ctx_texts) if vectors is not None else None
+    index = get_registry().get_or_build(ctx_texts, ctx_vecs)
 
     # 2️⃣ Embed the answer
-    ans_vec = embed_text(answer)
+    ans_vec = normalize_rows(lookup_vectors([answer], vectors))
 
-    # 3️⃣ Find top-1 closest context chunk
-    distances, indices = search_index(index, ans_vec, top_k=1)
+    # 3️⃣ Find top-1 closest context chunk (cosine similarity)
+    sims, indices = search_index(index, ans_vec, top_k=1)
+    sim = float(sims[0][0])
 
-    # FAISS returns L2 distance:
-    # distance = 0 → perfect match
-    # distance = large → unrelated
-    d = distances[0][0]
-
-    # Convert L2 distance to a similarity-like score (bounded 0..1)
+    # Keep the score on the scale the thresholds were tuned for: on unit vectors
+    # squared L2 distance is 2 - 2*cos, squashed into 0..1 as 1 / (1 + d).
+    d = max(0.0, 2.0 - 2.0 * sim)
     sim_score = 1 / (1 + d)
 
     return float(sim_score)
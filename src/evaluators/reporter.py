@@ -1,30 +1,33 @@
-﻿import yaml
+﻿from src.utils.config import get_config
 
-def load_thresholds():
-    with open('configs/thresholds.yaml', 'r') as f:
-        return yaml.safe_load(f)
 
+def load_thresholds(profile=None):
+    """Thresholds/pricing/weights as a plain dict (from the cached config registry)."""
+    return get_config(profile).to_dict()
 
-def compute_quality_score(rel: float, comp: float, factual_avg: float) -> float:
+
+def compute_quality_score(rel: float, comp: float, factual_avg: float, weights=None) -> float:
     """
-    Weighted quality score between 0 and 1:
-      40% relevance, 30% completeness, 30% factuality
+    Weighted quality score between 0 and 1.
+    Default weights (configs/thresholds.yaml): 40% relevance, 30% completeness, 30% factuality
     """
-    score = 0.4 * rel + 0.3 * comp + 0.3 * factual_avg
+    w = weights or get_config().weights
+    score = w.relevance * rel + w.completeness * comp + w.factuality * factual_avg
     # clamp 0..1
     return max(0.0, min(1.0, float(score)))
 
 
-def make_verdict(rel, comp, factual):
+def make_verdict(rel, comp, factual, config=None):
     """
     Determines PASS / WARN / FAIL based on thresholds.
     factual is the avg factuality score (float)
+    config: EvalConfig to judge against (current default profile when None)
     """
-    th = load_thresholds()
+    th = config or get_config()
 
-    rel_ok = rel >= th['relevance_min']
-    comp_ok = comp >= th['completeness_min']
-    fact_ok = factual >= th['factuality_min']
+    rel_ok = rel >= th.relevance_min
+    comp_ok = comp >= th.completeness_min
+    fact_ok = factual >= th.factuality_min
 
     # FAIL if factuality is too low
     if not fact_ok:
@@ -38,16 +41,17 @@ def make_verdict(rel, comp, factual):
     return 'PASS'
 
 
-def build_report(rel, comp, factual_report, latency, token_usage):
+def build_report(rel, comp, factual_report, latency, token_usage, config=None):
     """
     Final structured JSON report. Adds quality_score.
     """
+    config = config or get_config()
     fact_avg = factual_report['avg_score']
     fact_hall = factual_report['hallucinated_claims']
 
-    quality_score = compute_quality_score(rel, comp, fact_avg)
+    quality_score = compute_quality_score(rel, comp, fact_avg, config.weights)
 
-    verdict = make_verdict(rel, comp, fact_avg)
+    verdict = make_verdict(rel, comp, fact_avg, config)
 
     return {
         'scores': {
@@ -57,6 +61,7 @@ def build_report(rel, comp, factual_report, latency, token_usage):
                 'avg_score': fact_avg,
                 'claims': factual_report['claims'],
                 'claim_scores': factual_report['claim_scores'],
+                'claim_sources': factual_report.get('claim_sources', []),
                 'hallucinated_claims': fact_hall,
             },
             'quality_score': quality_score
@@ -64,4 +69,5 @@ def build_report(rel, comp, factual_report, latency, token_usage):
         'latency_seconds': latency,
         'token_usage': token_usage,
         'verdict': verdict,
+        'config_profile': config.profile,
     }
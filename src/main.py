@@ -1,81 +1,354 @@
 import json
-import yaml
-from src.utils.parsers import parse_chat, parse_context
+import asyncio
+from src.utils.parsers import parse_chat, parse_context, load_all, pair_turns
+from src.utils.embeddings import VectorTable, embed_many
+from src.utils.context_vectors import context_table
 from src.evaluators.relevance import relevance_score, completeness_check
-from src.evaluators.factuality import factuality_report
-from src.evaluators.latency_cost import count_tokens, estimate_cost, calculate_latency
+from src.evaluators.factuality import factuality_report, split_into_claims
+from src.evaluators.latency_cost import turn_latency
 from src.evaluators.reporter import build_report
-from src.utils.pii import detect_pii, redact_pii
+from src.utils.pii import analyze_pii
+from src.utils.config import get_config
+from src.utils.token_utils import count_tokens_batch, token_cost
+from src.utils.stages import StageRecorder, stage_span, run_in_span
+from src.utils.metrics import STAGE_LATENCY
 
+# Bump when a change to the evaluators alters scores: incremental batch runs
+# (src.batch_eval) then recompute every pair instead of reusing old results.
+EVALUATOR_VERSION = 1
 
 
-def evaluate(chat_path: str, ctx_path: str):
+def prepare_request(chat, ctx) -> dict:
     """
-    Full evaluation pipeline producing a canonical evaluation report.
+    Single-turn plan: the first user message and the assistant reply to it
+    (system messages are skipped).
     """
+    turns = pair_turns(chat.messages)
+    if not turns:
+        raise ValueError("Chat must contain a user message followed by an assistant reply.")
+    return prepare_turn(turns[0], ctx)
 
-    # Load chat + context files
-    chat = parse_chat(chat_path)
-    ctx = parse_context(ctx_path)
 
-    
+def prepare_turn(turn, ctx) -> dict:
+    """
+    Extracts and redacts one turn's messages, and lists every text that any
+    evaluator will need an embedding for (the turn's embedding plan).
+    """
     # Extract raw messages
-    user_msg_raw = chat.messages[0].content
-    assistant_msg_raw = chat.messages[1].content
+    user_msg_raw = turn.user.content
+    assistant_msg_raw = "\n".join(m.content for m in turn.replies)
+
+    # Detect and redact PII (one scan per message)
+    user_pii, user_msg = analyze_pii(user_msg_raw)
+    assistant_pii, assistant_msg = analyze_pii(assistant_msg_raw)
 
-    # Detect and redact PII
-    user_pii = detect_pii(user_msg_raw)
-    assistant_pii = detect_pii(assistant_msg_raw)
+    # Relevance needs user + assistant, completeness needs assistant + contexts,
+    # factuality needs claims + contexts.
+    texts = [user_msg, assistant_msg]
+    texts += split_into_claims(assistant_msg)
+    texts += [c.text for c in ctx.contexts]
 
-    user_msg = redact_pii(user_msg_raw)
-    assistant_msg = redact_pii(assistant_msg_raw)
+    return {
+        "user_msg": user_msg,
+        "assistant_msg": assistant_msg,
+        "latency_seconds": turn_latency(turn.user, turn.replies),
+        "user_pii": user_pii,
+        "assistant_pii": assistant_pii,
+        "texts": list(dict.fromkeys(texts)),
+    }
 
 
+def score_request(prepared: dict, ctx, vectors: VectorTable, recorder: StageRecorder = None, config=None):
+    """
+    Runs every evaluator against the shared VectorTable and builds the report.
+    recorder: optional StageRecorder collecting per-stage spans (None = no instrumentation).
+    config: EvalConfig (thresholds, pricing, weights); current default profile when None.
+    """
+    config = config or get_config()
+    user_msg = prepared["user_msg"]
+    assistant_msg = prepared["assistant_msg"]
+
     # 1️⃣ Relevance
-    rel = relevance_score(user_msg, assistant_msg)
+    with stage_span(recorder, "relevance"):
+        rel = relevance_score(user_msg, assistant_msg, vectors=vectors)
 
     # 2️⃣ Completeness
-    comp = completeness_check(assistant_msg, ctx.contexts)
+    with stage_span(recorder, "completeness"):
+        comp = completeness_check(assistant_msg, ctx.contexts, vectors=vectors)
 
     # 3️⃣ Factuality
-    fact = factuality_report(assistant_msg, ctx.contexts)
+    with stage_span(recorder, "factuality"):
+        fact = factuality_report(assistant_msg, ctx.contexts, vectors=vectors, config=config)
 
-    # 4️⃣ Token usage
-    user_tokens = count_tokens(user_msg)
-    assistant_tokens = count_tokens(assistant_msg)
+    # 4️⃣ Token usage (user = input tokens, assistant = output tokens)
+    with stage_span(recorder, "tokens"):
+        user_tokens, assistant_tokens = count_tokens_batch(
+            [user_msg, assistant_msg],
+            model=config.model,
+            approximate=config.token_counting == "approximate",
+        )
     total_tokens = user_tokens + assistant_tokens
 
-    with open("configs/thresholds.yaml", "r") as f:
-        config = yaml.safe_load(f)
-
-    cost_est = estimate_cost(total_tokens, config["price_per_1k_tokens"])
+    cost_est = token_cost(user_tokens, assistant_tokens, config.model, config)
 
     token_usage = {
         "user_tokens": user_tokens,
         "assistant_tokens": assistant_tokens,
         "total_tokens": total_tokens,
-        "estimated_cost_usd": cost_est
+        "estimated_cost_usd": cost_est,
+        "model": config.model,
     }
 
-    # 5️⃣ Latency (placeholder timestamps)
-    latency = calculate_latency("2024-01-01T12:00:00", "2024-01-01T12:00:05")
+    # 5️⃣ Latency (message timestamps; None when the chat has none)
+    latency = prepared.get("latency_seconds")
 
     # 6️⃣ Build complete report with verdict system
-    final_report = build_report(
-    rel,
-    comp,
-    fact,
-    latency,
-    token_usage
-)
+    with stage_span(recorder, "report"):
+        final_report = build_report(
+        rel,
+        comp,
+        fact,
+        latency,
+        token_usage,
+        config
+    )
 
     final_report["pii_detected"] = {
-    "user": user_pii,
-    "assistant": assistant_pii
+    "user": prepared["user_pii"],
+    "assistant": prepared["assistant_pii"]
 }
     return final_report
 
 
+def evaluate(chat_path: str, ctx_path: str, trace: bool = False, profile: str = None,
+             timings: bool = False):
+    """
+    Full evaluation pipeline producing a canonical evaluation report.
+    profile: named config profile from configs/thresholds.yaml (default when None).
+
+    Every string any evaluator needs is embedded up front in one batch and
+    shared through a VectorTable. With trace=True the report also carries
+    "embedding_trace": encoder calls per stage (expected total: at most 1).
+    With timings=True it carries "stage_timings": wall and CPU ms per stage.
+    Both off (the default) means no instrumentation cost beyond a None check.
+    """
+    recorder = StageRecorder() if trace or timings else None
+
+    # Load chat + context files
+    with stage_span(recorder, "parse"):
+        chat = parse_chat(chat_path)
+        ctx = parse_context(ctx_path)
+
+    return evaluate_documents(chat, ctx, trace=trace, config=get_config(profile),
+                              timings=timings, recorder=recorder)
+
+
+def evaluate_documents(chat, ctx, trace: bool = False, shared: VectorTable = None, config=None,
+                       timings: bool = False, recorder: StageRecorder = None):
+    """
+    Same as evaluate(), for already-parsed ChatDocument / ContextDocument objects.
+    shared: optional VectorTable (e.g. a batch's context texts) reused instead of re-embedding.
+    recorder: StageRecorder to continue (evaluate() passes one holding the parse span).
+    Context texts covered by a usable embeddings sidecar (ctx.embeddings) are read from it.
+    """
+    if recorder is None and (trace or timings):
+        recorder = StageRecorder()
+
+    with stage_span(recorder, "pii"):
+        prepared = prepare_request(chat, ctx)
+
+    # Embed the whole plan once
+    with stage_span(recorder, "embed"):
+        vectors = VectorTable.build(prepared["texts"], parent=context_table(ctx, shared))
+
+    final_report = score_request(prepared, ctx, vectors, recorder=recorder, config=config)
+
+    if trace:
+        _attach_trace(final_report, recorder)
+        final_report["embedding_trace"]["texts"] = len(prepared["texts"])
+    if timings:
+        _attach_timings(final_report, recorder)
+    return final_report
+
+
+def _attach_trace(report: dict, recorder: StageRecorder):
+    stages = recorder.encoder_trace()
+    report["embedding_trace"] = {
+        "stages": stages,
+        "encode_calls": sum(s["encode_calls"] for s in stages),
+    }
+
+
+def _attach_timings(report: dict, recorder: StageRecorder):
+    report["stage_timings"] = recorder.timings()
+    recorder.observe(STAGE_LATENCY)
+
+
+# -------------------------------
+# Multi-turn conversations
+# -------------------------------
+
+def prepare_conversation(chat, ctx) -> dict:
+    """Embedding plans for every user/assistant turn of a conversation."""
+    turns = pair_turns(chat.messages)
+    if not turns:
+        raise ValueError("Chat must contain a user message followed by an assistant reply.")
+    prepared = [prepare_turn(t, ctx) for t in turns]
+
+    return {
+        "turns": prepared,
+        "message_indices": [t.index for t in turns],
+        "unanswered": sum(m.role == "user" for m in chat.messages) - len(turns),
+        "texts": list(dict.fromkeys(text for p in prepared for text in p["texts"])),
+    }
+
+
+def score_conversation(prepared: dict, ctx, vectors: VectorTable, config=None,
+                       recorder: StageRecorder = None) -> dict:
+    """Per-turn reports plus a conversation summary."""
+    config = config or get_config()
+    reports = []
+    for i, (turn, msg_index) in enumerate(zip(prepared["turns"], prepared["message_indices"])):
+        report = score_request(turn, ctx, vectors, recorder=recorder, config=config)
+        report["turn"] = i
+        report["message_index"] = msg_index
+        reports.append(report)
+
+    return {
+        "turns": reports,
+        "summary": summarize_turns(reports, prepared["unanswered"]),
+        "config_profile": config.profile,
+    }
+
+
+def summarize_turns(reports, unanswered: int = 0) -> dict:
+    """
+    Conversation-level view of per-turn reports. The conversation verdict is
+    its worst turn (FAIL > WARN > PASS).
+    """
+    n = len(reports)
+    counts = {v: sum(r["verdict"] == v for r in reports) for v in ("PASS", "WARN", "FAIL")}
+    verdict = "FAIL" if counts["FAIL"] else ("WARN" if counts["WARN"] else "PASS")
+
+    def mean(values):
+        values = list(values)
+        return sum(values) / len(values) if values else 0.0
+
+    usage_keys = ("user_tokens", "assistant_tokens", "total_tokens", "estimated_cost_usd")
+    return {
+        "turns": n,
+        "unanswered_user_turns": unanswered,
+        "verdict": verdict,
+        "verdict_counts": counts,
+        "flagged_turns": [r["turn"] for r in reports if r["verdict"] != "PASS"],
+        "mean_scores": {
+            "relevance": mean(r["scores"]["relevance"] for r in reports),
+            "completeness": mean(r["scores"]["completeness"] for r in reports),
+            "factuality": mean(r["scores"]["factuality"]["avg_score"] for r in reports),
+            "quality_score": mean(r["scores"]["quality_score"] for r in reports),
+        },
+        "min_quality_score": min((r["scores"]["quality_score"] for r in reports), default=0.0),
+        "token_usage": {k: sum(r["token_usage"][k] for r in reports) for k in usage_keys},
+        "latency_seconds": _sum_known(r["latency_seconds"] for r in reports),
+        "pii_detected": any(
+            any(found for side in r["pii_detected"].values() for found in side.values())
+            for r in reports
+        ),
+    }
+
+
+def _sum_known(values):
+    """Sum of the non-None values; None when there are none."""
+    known = [v for v in values if v is not None]
+    return sum(known) if known else None
+
+
+def evaluate_conversations(documents, shared: VectorTable = None, config=None,
+                           recorder: StageRecorder = None):
+    """
+    Evaluates many (ChatDocument, ContextDocument) conversations. Every turn of
+    every conversation is planned first and the union of their texts is
+    embedded in a single batch before any scoring happens.
+    recorder: optional StageRecorder collecting per-stage spans (one per turn
+    for the scoring stages).
+    """
+    documents = list(documents)
+    with stage_span(recorder, "pii"):
+        plans = [prepare_conversation(chat, ctx) for chat, ctx in documents]
+
+    with stage_span(recorder, "embed"):
+        # Sidecar-backed context tables are chained in front of `shared`
+        seen = set()
+        for _, ctx in documents:
+            if ctx.embeddings is not None and id(ctx) not in seen:
+                seen.add(id(ctx))
+                shared = context_table(ctx, shared)
+
+        texts = list(dict.fromkeys(t for plan in plans for t in plan["texts"]))
+        vectors = VectorTable.build(texts, parent=shared)
+
+    return [
+        score_conversation(plan, ctx, vectors, config=config, recorder=recorder)
+        for plan, (_, ctx) in zip(plans, documents)
+    ]
+
+
+def evaluate_conversation(chat_path: str, ctx_path: str, profile: str = None, config=None,
+                          recorder: StageRecorder = None, trace: bool = False, timings: bool = False) -> dict:
+    """
+    Multi-turn variant of evaluate(): scores every turn of the chat file.
+    config: EvalConfig overriding `profile`; recorder: as in evaluate_conversations().
+    trace / timings: as in evaluate(), covering the whole conversation.
+    """
+    if recorder is None and (trace or timings):
+        recorder = StageRecorder()
+    chat, ctx = run_in_span(recorder, "parse", load_all, chat_path, ctx_path)
+    report = evaluate_conversations([(chat, ctx)], config=config or get_config(profile), recorder=recorder)[0]
+    if trace:
+        _attach_trace(report, recorder)
+    if timings:
+        _attach_timings(report, recorder)
+    return report
+
+
+async def embed_async(texts, batcher=None):
+    """Embeds through the shared MicroBatcher, or embed_many in a worker thread without one."""
+    texts = list(texts)
+    if batcher is None:
+        return await asyncio.to_thread(embed_many, texts)
+    return await batcher.embed(texts)
+
+
+async def evaluate_documents_async(chat, ctx, batcher=None, shared: VectorTable = None, config=None,
+                                   timings: bool = False, recorder: StageRecorder = None):
+    """
+    Async variant of evaluate_documents() for the API. PII/claim extraction and
+    scoring run in worker threads; the embedding plan goes through a shared
+    MicroBatcher so concurrent requests are encoded together.
+    """
+    if recorder is None and timings:
+        recorder = StageRecorder()
+
+    prepared = await asyncio.to_thread(run_in_span, recorder, "pii", prepare_request, chat, ctx)
+    if ctx.embeddings is not None:
+        shared = await asyncio.to_thread(context_table, ctx, shared)
+    texts = [t for t in prepared["texts"] if shared is None or t not in shared]
+    with stage_span(recorder, "embed"):
+        vectors = VectorTable(texts, await embed_async(texts, batcher), parent=shared)
+    report = await asyncio.to_thread(score_request, prepared, ctx, vectors, recorder, config)
+
+    if timings:
+        _attach_timings(report, recorder)
+    return report
+
+
+async def evaluate_async(chat_path: str, ctx_path: str, batcher=None, config=None, timings: bool = False):
+    """Async variant of evaluate() (file paths in, report out)."""
+    recorder = StageRecorder() if timings else None
+    chat, ctx = await asyncio.to_thread(run_in_span, recorder, "parse", load_all, chat_path, ctx_path)
+    return await evaluate_documents_async(chat, ctx, batcher, config=config, timings=timings, recorder=recorder)
+
+
 # -------------------------------
 # CLI ENTRY POINT
 # -------------------------------
@@ -85,8 +358,24 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="LLM Evaluation CLI")
     parser.add_argument("--chat", required=True, help="Path to chat JSON")
     parser.add_argument("--ctx", required=True, help="Path to context JSON")
+    parser.add_argument("--trace", action="store_true", help="Include per-stage encoder call trace")
+    parser.add_argument("--timings", action="store_true", help="Include per-stage wall/CPU timings")
+    parser.add_argument("--profile", help="Named config profile from configs/thresholds.yaml")
+    parser.add_argument("--conversation", action="store_true", help="Score every user/assistant turn, not just the first")
+    parser.add_argument("--no-daemon", action="store_true", help="Evaluate in-process even if a daemon is running")
 
     args = parser.parse_args()
 
-    result = evaluate(args.chat, args.ctx)
+    # Use the warm daemon (python -m src.daemon serve) when one is listening
+    result = None
+    if not args.no_daemon:
+        from src.daemon import request_daemon, evaluate_request
+        result = request_daemon(evaluate_request(args.chat, args.ctx, args.profile, args.trace,
+                                                 args.conversation, args.timings))
+
+    if result is None and args.conversation:
+        result = evaluate_conversation(args.chat, args.ctx, profile=args.profile, trace=args.trace,
+                                       timings=args.timings)
+    elif result is None:
+        result = evaluate(args.chat, args.ctx, trace=args.trace, profile=args.profile, timings=args.timings)
     print(json.dumps(result, indent=2))
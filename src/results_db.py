@@ -0,0 +1,360 @@
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+DB_PATH = Path("data/results.db")
+
+# Per-pair score columns compared between runs
+SCORE_COLUMNS = ("relevance", "completeness", "factuality", "quality_score")
+DEFAULT_LIMIT = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id        INTEGER PRIMARY KEY,
+    name          TEXT UNIQUE,
+    created_at    TEXT NOT NULL,
+    finished_at   TEXT,
+    config_profile TEXT,
+    config_hash   TEXT,
+    config_json   TEXT,
+    embedder      TEXT,
+    source        TEXT,
+    pairs         INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS pair_reports (
+    run_id        INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    pair_index    INTEGER NOT NULL,
+    chat_file     TEXT NOT NULL,
+    context_file  TEXT NOT NULL,
+    chat_path     TEXT NOT NULL,
+    context_path  TEXT NOT NULL,
+    occurrence    INTEGER NOT NULL,  -- 1 + earlier rows of the run with the same paths
+    relevance     REAL,
+    completeness  REAL,
+    factuality    REAL,
+    quality_score REAL,
+    verdict       TEXT NOT NULL,
+    latency       REAL,
+    total_tokens  INTEGER,
+    cost_usd      REAL,
+    PRIMARY KEY (run_id, pair_index)
+) WITHOUT ROWID;
+
+-- Run diffs join on (run, paths, occurrence); verdict and scores ride along so
+-- the join never touches the table itself.
+CREATE UNIQUE INDEX IF NOT EXISTS ix_pairs_run_path
+    ON pair_reports (run_id, chat_path, context_path, occurrence,
+                     pair_index, verdict, relevance, completeness, factuality, quality_score);
+CREATE INDEX IF NOT EXISTS ix_pairs_run_verdict ON pair_reports (run_id, verdict);
+CREATE INDEX IF NOT EXISTS ix_pairs_file ON pair_reports (chat_file);
+
+CREATE TABLE IF NOT EXISTS claims (
+    run_id        INTEGER NOT NULL,
+    pair_index    INTEGER NOT NULL,
+    claim_index   INTEGER NOT NULL,
+    claim         TEXT NOT NULL,
+    score         REAL,
+    source_id     TEXT,
+    hallucinated  INTEGER NOT NULL,
+    PRIMARY KEY (run_id, pair_index, claim_index),
+    FOREIGN KEY (run_id, pair_index) REFERENCES pair_reports(run_id, pair_index) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS ix_claims_hallucinated ON claims (run_id, hallucinated);
+
+-- Materialized pair-by-pair comparison of two runs (built once per run pair,
+-- rebuilt when either run's pair count changes). A pair listed n times in a
+-- run is matched occurrence by occurrence, so pair_a identifies a row.
+CREATE TABLE IF NOT EXISTS run_diffs (
+    run_a         INTEGER NOT NULL,
+    run_b         INTEGER NOT NULL,
+    pair_a        INTEGER NOT NULL,
+    pair_b        INTEGER NOT NULL,
+    chat_path     TEXT NOT NULL,
+    context_path  TEXT NOT NULL,
+    verdict_a     TEXT NOT NULL,
+    verdict_b     TEXT NOT NULL,
+    flipped       INTEGER NOT NULL,
+    quality_a     REAL,
+    quality_b     REAL,
+    delta_relevance     REAL,
+    delta_completeness  REAL,
+    delta_factuality    REAL,
+    delta_quality_score REAL,
+    PRIMARY KEY (run_a, run_b, pair_a)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS ix_diffs_flips ON run_diffs (run_a, run_b, flipped, verdict_a, verdict_b);
+CREATE INDEX IF NOT EXISTS ix_diffs_quality ON run_diffs (run_a, run_b, ABS(delta_quality_score));
+
+CREATE TABLE IF NOT EXISTS run_diff_summaries (
+    run_a         INTEGER NOT NULL,
+    run_b         INTEGER NOT NULL,
+    pairs_a       INTEGER NOT NULL,
+    pairs_b       INTEGER NOT NULL,
+    computed_at   TEXT NOT NULL,
+    summary_json  TEXT NOT NULL,
+    PRIMARY KEY (run_a, run_b)
+);
+"""
+
+PAIR_FIELDS = ("chat_file", "context_file", "chat_path", "context_path", "relevance", "completeness",
+               "factuality", "quality_score", "verdict", "latency", "total_tokens", "cost_usd")
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+# -----------------------------
+# Store
+# -----------------------------
+
+class ResultsDB:
+    """
+    SQLite results store (WAL mode: readers never block the batch writer).
+    One row per run, per evaluated pair and per factuality claim.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---- writes ----
+
+    def start_run(self, name: str = None, config=None, embedder: str = None, source: str = None) -> int:
+        """
+        Registers a run and returns its id. `config` is the EvalConfig the run
+        scores with. Raises ValueError if `name` is already taken.
+        """
+        with self._lock, self.conn:
+            if name is not None:
+                taken = self.conn.execute("SELECT run_id FROM runs WHERE name = ?", (name,)).fetchone()
+                if taken is not None:
+                    raise ValueError(f"Run name {name!r} is already used by run {taken['run_id']}; "
+                                     "pick another --run-name")
+            cur = self.conn.execute(
+                "INSERT INTO runs (name, created_at, config_profile, config_hash, config_json, embedder, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, _now(),
+                 config.profile if config else None,
+                 config.fingerprint() if config else None,
+                 json.dumps(config.to_dict(), sort_keys=True) if config else None,
+                 embedder, source),
+            )
+            return cur.lastrowid
+
+    def insert_pairs(self, run_id: int, rows, start_index: int = 0) -> int:
+        """
+        Bulk-inserts batch result rows (src.batch_eval.evaluate_pair output) and
+        their claims in one transaction. Rows get pair_index start_index,
+        start_index + 1, ... and an occurrence number among the run's rows for
+        the same chat + context paths. Returns the number of rows written.
+        """
+        pairs, claims = [], []
+        seen = {}  # (chat_path, context_path) -> rows of the run so far
+        with self._lock, self.conn:
+            for i, row in enumerate(rows, start_index):
+                paths = (row["chat_path"], row["context_path"])
+                if paths not in seen:
+                    seen[paths] = self.conn.execute(
+                        "SELECT COUNT(*) FROM pair_reports WHERE run_id = ? AND chat_path = ? AND context_path = ?",
+                        (run_id,) + paths).fetchone()[0]
+                seen[paths] += 1
+                pairs.append((run_id, i, seen[paths]) + tuple(row.get(f) for f in PAIR_FIELDS))
+                for j, c in enumerate(row.get("claims") or ()):
+                    claims.append((run_id, i, j, c["claim"], c["score"], c.get("source"), int(c["hallucinated"])))
+
+            self.conn.executemany(
+                f"INSERT INTO pair_reports (run_id, pair_index, occurrence, {', '.join(PAIR_FIELDS)}) "
+                f"VALUES ({', '.join('?' * (len(PAIR_FIELDS) + 3))})", pairs)
+            self.conn.executemany(
+                "INSERT INTO claims (run_id, pair_index, claim_index, claim, score, source_id, hallucinated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", claims)
+            self.conn.execute("UPDATE runs SET pairs = pairs + ? WHERE run_id = ?", (len(pairs), run_id))
+        return len(pairs)
+
+    def truncate_run(self, run_id: int, keep: int):
+        """Drops pairs (and claims) at pair_index >= keep, e.g. rows past a resumed checkpoint."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM claims WHERE run_id = ? AND pair_index >= ?", (run_id, keep))
+            self.conn.execute("DELETE FROM pair_reports WHERE run_id = ? AND pair_index >= ?", (run_id, keep))
+            self.conn.execute("UPDATE runs SET pairs = (SELECT COUNT(*) FROM pair_reports WHERE run_id = ?) "
+                              "WHERE run_id = ?", (run_id, run_id))
+            self.conn.execute("DELETE FROM run_diff_summaries WHERE run_a = ? OR run_b = ?", (run_id, run_id))
+
+    def finish_run(self, run_id: int):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (_now(), run_id))
+
+    # ---- reads ----
+
+    def runs(self) -> list:
+        rows = self.conn.execute(
+            "SELECT run_id, name, created_at, finished_at, config_profile, config_hash, embedder, source, pairs "
+            "FROM runs ORDER BY run_id").fetchall()
+        return [dict(r) for r in rows]
+
+    def resolve_run(self, ref) -> int:
+        """Run id from an id or a run name."""
+        row = self.conn.execute("SELECT run_id FROM runs WHERE run_id = ? OR name = ?",
+                                (ref if str(ref).isdigit() else None, str(ref))).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown run: {ref}")
+        return row["run_id"]
+
+    def pairs(self, run_id: int, verdict: str = None, chat_file: str = None,
+              limit: int = DEFAULT_LIMIT, offset: int = 0) -> list:
+        where, args = ["run_id = ?"], [run_id]
+        if verdict:
+            where.append("verdict = ?")
+            args.append(verdict)
+        if chat_file:
+            where.append("chat_file = ?")
+            args.append(chat_file)
+        rows = self.conn.execute(
+            f"SELECT pair_index, {', '.join(PAIR_FIELDS)} FROM pair_reports WHERE {' AND '.join(where)} "
+            "ORDER BY pair_index LIMIT ? OFFSET ?", args + [limit, offset]).fetchall()
+        return [dict(r) for r in rows]
+
+    def claims(self, run_id: int, pair_index: int) -> list:
+        rows = self.conn.execute(
+            "SELECT claim_index, claim, score, source_id, hallucinated FROM claims "
+            "WHERE run_id = ? AND pair_index = ? ORDER BY claim_index", (run_id, pair_index)).fetchall()
+        return [dict(r) for r in rows]
+
+    # ---- run diffs ----
+
+    def _pair_count(self, run_id: int) -> int:
+        row = self.conn.execute("SELECT pairs FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown run: {run_id}")
+        return row["pairs"]
+
+    def compare(self, run_a: int, run_b: int, refresh: bool = False) -> dict:
+        """
+        Materializes the comparison of run_b against run_a and returns its
+        summary. Pairs are matched on their chat + context paths; a pair listed
+        several times in a run is matched by occurrence (first with first, ...).
+        The join runs once per run pair; later calls, and the flip / delta
+        queries, read the indexed run_diffs rows. A run that gained or lost
+        pairs since is re-compared.
+        """
+        counts = self._pair_count(run_a), self._pair_count(run_b)
+        row = self.conn.execute(
+            "SELECT pairs_a, pairs_b, summary_json FROM run_diff_summaries WHERE run_a = ? AND run_b = ?",
+            (run_a, run_b)).fetchone()
+        if row is not None and not refresh and (row["pairs_a"], row["pairs_b"]) == counts:
+            return json.loads(row["summary_json"])
+
+        deltas = ", ".join(f"b.{c} - a.{c}" for c in SCORE_COLUMNS)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM run_diffs WHERE run_a = ? AND run_b = ?", (run_a, run_b))
+            self.conn.execute(
+                "INSERT INTO run_diffs SELECT a.run_id, b.run_id, a.pair_index, b.pair_index, "
+                "a.chat_path, a.context_path, "
+                f"a.verdict, b.verdict, a.verdict != b.verdict, a.quality_score, b.quality_score, {deltas} "
+                "FROM pair_reports a JOIN pair_reports b "
+                "ON b.run_id = :b AND b.chat_path = a.chat_path AND b.context_path = a.context_path "
+                "AND b.occurrence = a.occurrence "
+                "WHERE a.run_id = :a",
+                {"a": run_a, "b": run_b})
+
+            means = ", ".join(f"AVG(delta_{c}) AS mean_delta_{c}" for c in SCORE_COLUMNS)
+            totals = self.conn.execute(
+                f"SELECT COUNT(*) AS matched, COALESCE(SUM(flipped), 0) AS flips, {means} "
+                "FROM run_diffs WHERE run_a = ? AND run_b = ?", (run_a, run_b)).fetchone()
+            transitions = self.conn.execute(
+                "SELECT verdict_a, verdict_b, COUNT(*) AS n FROM run_diffs "
+                "WHERE run_a = ? AND run_b = ? AND flipped = 1 GROUP BY verdict_a, verdict_b",
+                (run_a, run_b)).fetchall()
+
+            summary = {"run_a": run_a, "run_b": run_b, "pairs_a": counts[0], "pairs_b": counts[1], **dict(totals)}
+            summary["transitions"] = {f"{r['verdict_a']}->{r['verdict_b']}": r["n"] for r in transitions}
+            self.conn.execute(
+                "INSERT OR REPLACE INTO run_diff_summaries VALUES (?, ?, ?, ?, ?, ?)",
+                (run_a, run_b, counts[0], counts[1], _now(), json.dumps(summary)))
+        return summary
+
+    def verdict_flips(self, run_a: int, run_b: int, from_verdict: str = None, to_verdict: str = None,
+                      limit: int = DEFAULT_LIMIT, offset: int = 0) -> list:
+        """Pairs whose verdict differs between run_a and run_b."""
+        self.compare(run_a, run_b)
+        sql = ("SELECT pair_a, pair_b, chat_path, context_path, verdict_a, verdict_b, quality_a, quality_b "
+               "FROM run_diffs "
+               "WHERE run_a = :a AND run_b = :b AND flipped = 1")
+        params = {"a": run_a, "b": run_b, "limit": limit, "offset": offset}
+        if from_verdict:
+            sql += " AND verdict_a = :from_v"
+            params["from_v"] = from_verdict
+        if to_verdict:
+            sql += " AND verdict_b = :to_v"
+            params["to_v"] = to_verdict
+        sql += " LIMIT :limit OFFSET :offset"
+        return [dict(r) for r in self.conn.execute(sql, params).fetchall()]
+
+    def score_deltas(self, run_a: int, run_b: int, metric: str = "quality_score",
+                     min_delta: float = 0.0, limit: int = DEFAULT_LIMIT) -> list:
+        """
+        Pairs ordered by the largest |run_b - run_a| change in `metric`
+        (quality_score is served from an index; other metrics scan the diff).
+        """
+        if metric not in SCORE_COLUMNS:
+            raise ValueError(f"metric must be one of {SCORE_COLUMNS}")
+        self.compare(run_a, run_b)
+        sql = (f"SELECT pair_a, pair_b, chat_path, context_path, verdict_a, verdict_b, delta_{metric} AS delta "
+               f"FROM run_diffs "
+               f"WHERE run_a = ? AND run_b = ? AND ABS(delta_{metric}) >= ? "
+               f"ORDER BY ABS(delta_{metric}) DESC LIMIT ?")
+        return [dict(r) for r in self.conn.execute(sql, (run_a, run_b, min_delta, limit)).fetchall()]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query the SQLite results store")
+    parser.add_argument("--db", default=str(DB_PATH), help="Results database")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("runs", help="List runs")
+
+    p_diff = sub.add_parser("diff", help="Summary of changes from run A to run B")
+    p_flips = sub.add_parser("flips", help="Pairs whose verdict changed")
+    p_deltas = sub.add_parser("deltas", help="Pairs with the largest score changes")
+    for p in (p_diff, p_flips, p_deltas):
+        p.add_argument("run_a", help="Baseline run id or name")
+        p.add_argument("run_b", help="Compared run id or name")
+    p_flips.add_argument("--from", dest="from_verdict", help="Only flips from this verdict")
+    p_flips.add_argument("--to", dest="to_verdict", help="Only flips to this verdict")
+    p_flips.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+    p_deltas.add_argument("--metric", default="quality_score", choices=SCORE_COLUMNS)
+    p_deltas.add_argument("--min-delta", type=float, default=0.0)
+    p_deltas.add_argument("--limit", type=int, default=DEFAULT_LIMIT)
+
+    args = parser.parse_args()
+    db = ResultsDB(args.db)
+
+    if args.command == "runs":
+        out = db.runs()
+    else:
+        a, b = db.resolve_run(args.run_a), db.resolve_run(args.run_b)
+        if args.command == "diff":
+            out = db.compare(a, b)
+        elif args.command == "flips":
+            out = db.verdict_flips(a, b, args.from_verdict, args.to_verdict, limit=args.limit)
+        else:
+            out = db.score_deltas(a, b, args.metric, args.min_delta, limit=args.limit)
+    print(json.dumps(out, indent=2))
@@ -0,0 +1,103 @@
+import asyncio
+import numpy as np
+from src.utils.embeddings import embed_many
+from src.utils.metrics import MICROBATCH_SIZE
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+
+
+class MicroBatcher:
+    """
+    Cross-request dynamic micro-batching for the encoder.
+
+    Requests `await batcher.embed(texts)`; their work goes on a shared queue.
+    A single background task drains the queue into one encoder batch, closing
+    the batch once it holds `max_batch_size` texts or `max_wait_ms` has passed
+    since its first item, then hands each request back its own rows.
+    """
+
+    def __init__(self, embed_fn=embed_many, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue = None
+        self._task = None
+
+        self.batches = 0
+        self.batched_texts = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def embed(self, texts) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return self.embed_fn([])
+        if self._task is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    async def _collect(self):
+        """Waits for the first item, then gathers more until size or time runs out."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        deadline = loop.time() + self.max_wait_ms / 1000
+
+        while size < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [t for item_texts, _ in batch for t in item_texts]
+
+            try:
+                # The encoder is blocking; keep it off the event loop
+                vectors = await loop.run_in_executor(None, self.embed_fn, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batched_texts += len(texts)
+            MICROBATCH_SIZE.observe(len(texts))
+
+            start = 0
+            for item_texts, future in batch:
+                end = start + len(item_texts)
+                if not future.done():
+                    future.set_result(vectors[start:end])
+                start = end
@@ -1,30 +1,679 @@
+import os
 import json
+import time
+import queue
+import atexit
 import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer only
+    fcntl = None
+
 
 CACHE_PATH = Path("data/cache")
-CACHE_PATH.mkdir(exist_ok=True)
+
+# Optional shared tier behind the local cache (e.g. redis://cache:6379/0); unset = local only
+REDIS_URL = os.environ.get("LLM_EVAL_REDIS_URL")
+REDIS_PREFIX = os.environ.get("LLM_EVAL_REDIS_PREFIX", "llm-eval:emb:")
+REDIS_TTL = int(os.environ.get("LLM_EVAL_REDIS_TTL", 7 * 24 * 3600))
+# Write-back stops above this fraction of the memory budget (maxmemory, or LLM_EVAL_REDIS_MAX_BYTES)
+REDIS_MAX_BYTES = int(os.environ.get("LLM_EVAL_REDIS_MAX_BYTES", 0)) or None
+REDIS_HIGH_WATER = 0.9
+
+ARENA_FILE = "vectors.f32"
+INDEX_FILE = "vectors.idx"
+DEFAULT_LRU_SIZE = 10_000
+
+# One fixed-size record per stored vector: sha256 digest -> byte offset in arena.
+INDEX_DTYPE = np.dtype([
+    ("key", "V32"),
+    ("offset", "<i8"),
+    ("dim", "<i4"),
+    ("flags", "<i4"),
+])
+_TOMBSTONE = 1
 
 
 def _hash_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def get_cached_vector(text: str):
-    key = _hash_text(text)
-    file = CACHE_PATH / f"{key}.json"
+def _key(text: str, namespace: str = None) -> bytes:
+    """32-byte cache key; `namespace` (an embedder identity) keeps backends apart."""
+    if namespace:
+        text = f"{namespace}\x00{text}"
+    return bytes.fromhex(_hash_text(text))
+
+
+# -----------------------------
+# Memory-mapped vector cache
+# -----------------------------
+
+class MmapVectorCache:
+    """
+    Embedding cache backed by two files:
+      vectors.f32 - append-only arena of raw float32 vectors (memory-mapped)
+      vectors.idx - append-only INDEX_DTYPE records (digest -> offset, dim)
+
+    A writer appends the vector bytes first and the index record second, so a
+    reader that sees a record always finds complete data behind it. Writers (and
+    compaction) take an exclusive flock on the index file. Readers only lock
+    (shared) to remap a grown arena, so a concurrent compaction cannot pair old
+    offsets with the new file. Recently used vectors are kept (read-only) in an
+    in-process LRU of at most `lru_size` items.
+    """
+
+    def __init__(self, path=CACHE_PATH, lru_size: int = DEFAULT_LRU_SIZE,
+                 max_entries: int = None, legacy_dir=None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.arena_path = self.path / ARENA_FILE
+        self.index_path = self.path / INDEX_FILE
+        self.arena_path.touch(exist_ok=True)
+        self.index_path.touch(exist_ok=True)
+
+        self.lru_size = lru_size
+        self.max_entries = max_entries
+        self.legacy_dir = Path(legacy_dir) if legacy_dir else None
+
+        self._lock = threading.RLock()
+        self._lru = OrderedDict()
+        self._index = {}
+        self._index_pos = 0
+        self._index_ino = None
+        self._dead_bytes = 0
+        self._mm = None
+        self._mm_size = 0
+
+        self.hits = 0
+        self.misses = 0
+
+        self._refresh()
+
+    # ---- index / arena maintenance ----
+
+    def _refresh(self):
+        """Applies index records appended (by any process) since the last read."""
+        st = os.stat(self.index_path)
+        if st.st_ino != self._index_ino or st.st_size < self._index_pos:
+            # First open, or the files were swapped by a compaction
+            self._index = {}
+            self._index_pos = 0
+            self._index_ino = st.st_ino
+            self._dead_bytes = 0
+            self._mm = None
+            self._mm_size = 0
+
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_pos)
+            data = f.read()
+
+        n = len(data) // INDEX_DTYPE.itemsize
+        if n == 0:
+            return
+        records = np.frombuffer(data[:n * INDEX_DTYPE.itemsize], dtype=INDEX_DTYPE)
+        self._index_pos += n * INDEX_DTYPE.itemsize
+
+        for rec in records:
+            key = bytes(rec["key"])
+            old = self._index.pop(key, None)
+            if old is not None:
+                self._dead_bytes += old[1] * 4
+            if rec["flags"] & _TOMBSTONE:
+                self._lru.pop(key, None)
+            else:
+                self._index[key] = (int(rec["offset"]), int(rec["dim"]))
+
+    def _map_arena(self):
+        """Maps the arena file as it is now (callers make sure the index matches it)."""
+        size = os.path.getsize(self.arena_path)
+        self._mm = np.memmap(self.arena_path, dtype=np.uint8, mode="r", shape=(size,)) if size else None
+        self._mm_size = size
+
+    def _sync_arena(self):
+        """
+        Refreshes the index and remaps the arena under a shared lock on the
+        current index file. No compaction can run meanwhile, so the offsets and
+        the mapping come from the same pair of files.
+        """
+        while True:
+            with open(self.index_path, "rb") as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+                if os.fstat(f.fileno()).st_ino != os.stat(self.index_path).st_ino:
+                    continue  # swapped by a compaction while we waited
+                self._refresh()
+                self._map_arena()
+                return
+
+    def _locate(self, key: bytes):
+        """(offset, dim) of a key whose bytes are inside the current mapping, or None."""
+        loc = self._index.get(key)
+        if loc is not None and loc[0] + loc[1] * 4 > self._mm_size:
+            self._sync_arena()
+            loc = self._index.get(key)
+        return loc
+
+    def _read(self, offset: int, dim: int) -> np.ndarray:
+        return np.frombuffer(self._mm[offset:offset + dim * 4].tobytes(), dtype=np.float32)
+
+    def _remember(self, key: bytes, vec: np.ndarray):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def _writer_lock(self, f):
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    # ---- public API ----
+
+    def get(self, key: bytes):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        """Bulk lookup. Returns a list aligned with `keys` (None for misses)."""
+        with self._lock:
+            out = [None] * len(keys)
+            pending = []
+
+            for i, key in enumerate(keys):
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    out[i] = vec
+                else:
+                    pending.append(i)
+
+            if pending and any(keys[i] not in self._index for i in pending):
+                self._refresh()
+
+            for i in pending:
+                key = keys[i]
+                loc = self._locate(key)
+                if loc is not None:
+                    vec = self._read(*loc)
+                elif self.legacy_dir is not None:
+                    vec = self._read_legacy(key)
+                else:
+                    vec = None
+                if vec is not None:
+                    self._remember(key, vec)
+                out[i] = vec
+
+            found = sum(v is not None for v in out)
+            self.hits += found
+            self.misses += len(keys) - found
+            return out
+
+    def put(self, key: bytes, vector):
+        self.put_many([(key, vector)])
+
+    def put_many(self, items):
+        """Appends many vectors with one arena write and one index write."""
+        items = [(k, np.array(v, dtype=np.float32).ravel()) for k, v in items]  # copies: callers keep theirs
+        if not items:
+            return
+        for _, vec in items:
+            vec.flags.writeable = False
+
+        with self._lock:
+            with open(self.index_path, "ab") as idx_f:
+                self._writer_lock(idx_f)
+                self._refresh()
+                items = [(k, v) for k, v in items if k not in self._index]
+                if not items:
+                    return
+
+                with open(self.arena_path, "ab") as arena_f:
+                    offset = arena_f.seek(0, os.SEEK_END)
+                    records = np.zeros(len(items), dtype=INDEX_DTYPE)
+                    for r, (key, vec) in enumerate(items):
+                        records[r] = (key, offset, vec.shape[0], 0)
+                        offset += vec.nbytes
+                    arena_f.write(b"".join(v.tobytes() for _, v in items))
+                    arena_f.flush()
+                    os.fsync(arena_f.fileno())
+
+                idx_f.write(records.tobytes())
+                idx_f.flush()
+
+            self._refresh()
+            for key, vec in items:
+                self._remember(key, vec)
+
+            if self.max_entries is not None and len(self._index) > self.max_entries:
+                self.evict(self.max_entries)
+
+    def delete_many(self, keys):
+        """Tombstones keys; their arena bytes are reclaimed by compact()."""
+        with self._lock:
+            with open(self.index_path, "ab") as idx_f:
+                self._writer_lock(idx_f)
+                self._refresh()
+                keys = [k for k in keys if k in self._index]
+                records = np.zeros(len(keys), dtype=INDEX_DTYPE)
+                for r, key in enumerate(keys):
+                    records[r] = (key, -1, 0, _TOMBSTONE)
+                idx_f.write(records.tobytes())
+                idx_f.flush()
+            self._refresh()
+            return len(keys)
+
+    def evict(self, max_entries: int):
+        """
+        Drops the oldest entries (append order) until at most `max_entries` remain,
+        then compacts once dead bytes outweigh live ones.
+        """
+        with self._lock:
+            self._refresh()
+            excess = len(self._index) - max_entries
+            if excess > 0:
+                oldest = sorted(self._index, key=lambda k: self._index[k][0])[:excess]
+                self.delete_many(oldest)
+            live_bytes = sum(dim * 4 for _, dim in self._index.values())
+            if self._dead_bytes > live_bytes:
+                self.compact()
+            return max(excess, 0)
+
+    def compact(self):
+        """Rewrites the arena with live vectors only and swaps both files in atomically."""
+        with self._lock:
+            with open(self.index_path, "ab") as idx_f:
+                self._writer_lock(idx_f)
+                self._refresh()
+
+                self._map_arena()
+
+                tmp_arena = self.arena_path.with_suffix(".f32.tmp")
+                tmp_index = self.index_path.with_suffix(".idx.tmp")
+                records = np.zeros(len(self._index), dtype=INDEX_DTYPE)
+
+                with open(tmp_arena, "wb") as out:
+                    offset = 0
+                    for r, (key, (old_offset, dim)) in enumerate(sorted(self._index.items(), key=lambda kv: kv[1][0])):
+                        out.write(self._read(old_offset, dim).tobytes())
+                        records[r] = (key, offset, dim, 0)
+                        offset += dim * 4
+                    out.flush()
+                    os.fsync(out.fileno())
+
+                with open(tmp_index, "wb") as out:
+                    out.write(records.tobytes())
+                    out.flush()
+                    os.fsync(out.fileno())
+
+                self._mm = None
+                os.replace(tmp_arena, self.arena_path)
+                os.replace(tmp_index, self.index_path)
+
+            self._index_ino = None
+            self._refresh()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return {
+                "entries": len(self._index),
+                "lru_entries": len(self._lru),
+                "arena_bytes": os.path.getsize(self.arena_path),
+                "dead_bytes": self._dead_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    # ---- legacy JSON cache ----
+
+    def _read_legacy(self, key: bytes):
+        """Read-through for the old one-JSON-file-per-vector layout."""
+        file = self.legacy_dir / f"{key.hex()}.json"
+        if not file.exists():
+            return None
+        with open(file, "r") as f:
+            vec = np.asarray(json.load(f)["vector"], dtype=np.float32)
+        self.put(key, vec)
+        return vec
+
+
+# -----------------------------
+# Shared Redis tier
+# -----------------------------
 
-    if file.exists():
+def _redis_errors() -> tuple:
+    try:
+        from redis.exceptions import RedisError
+    except ImportError:
+        return (OSError,)
+    return (RedisError, OSError)
+
+
+class RedisVectorTier:
+    """
+    Embedding cache shared by every replica and worker through Redis.
+
+    Vectors are stored as raw little-endian float32 blobs (dim = len / 4)
+    under `prefix` + hex digest, each with a TTL. Lookups are pipelined MGETs
+    of `mget_chunk` keys. Writes go on a bounded queue that a background thread
+    flushes as pipelined SETs, so callers never wait on Redis. They are dropped
+    when the queue is full or Redis memory is above `high_water` of its budget
+    (`max_bytes`, else the server's maxmemory). Give the server a volatile-*
+    maxmemory-policy so it evicts these expiring keys first under pressure.
+
+    Any Redis error marks the tier down for `retry_seconds`. While it is
+    down, lookups miss and writes are dropped, so the local cache keeps working.
+    """
+
+    def __init__(self, client=None, url: str = None, prefix: str = REDIS_PREFIX, ttl: int = REDIS_TTL,
+                 max_bytes: int = REDIS_MAX_BYTES, high_water: float = REDIS_HIGH_WATER,
+                 mget_chunk: int = 512, queue_size: int = 10_000, retry_seconds: float = 30.0,
+                 memory_check_seconds: float = 5.0):
+        self.url = url
+        self.prefix = prefix.encode("utf-8")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.high_water = high_water
+        self.mget_chunk = mget_chunk
+        self.queue_size = queue_size
+        self.retry_seconds = retry_seconds
+        self.memory_check_seconds = memory_check_seconds
+
+        self._client = client
+        self._pid = os.getpid()
+        self._errors = _redis_errors()
+        self._lock = threading.Lock()
+        self._queue = None
+        self._writer = None
+        self._down_until = 0.0
+        self._memory_checked = 0.0
+        self._memory_full = False
+        self.stats_counters = {"hits": 0, "misses": 0, "writes": 0, "dropped": 0, "skipped_full": 0, "errors": 0}
+
+    # ---- connection / failure handling ----
+
+    def _redis(self):
+        if self._pid != os.getpid():
+            # Forked worker: sockets and the writer thread belong to the parent
+            self._pid = os.getpid()
+            self._queue = self._writer = None
+            if self.url:
+                self._client = None
+        if self._client is None:
+            import redis
+            self._client = redis.Redis.from_url(self.url, socket_connect_timeout=0.5, socket_timeout=1.0)
+        return self._client
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _failed(self):
+        with self._lock:
+            self.stats_counters["errors"] += 1
+            self._down_until = time.monotonic() + self.retry_seconds
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.stats_counters[name] += n
+
+    # ---- lookups ----
+
+    def get_many(self, keys):
+        """Bulk lookup; a list aligned with `keys` (None for misses, or everything when Redis is down)."""
+        if not keys or not self.available:
+            return [None] * len(keys)
+        names = [self.prefix + k.hex().encode("ascii") for k in keys]
+        try:
+            pipe = self._redis().pipeline(transaction=False)
+            for i in range(0, len(names), self.mget_chunk):
+                pipe.mget(names[i:i + self.mget_chunk])
+            blobs = [b for chunk in pipe.execute() for b in chunk]
+        except self._errors:
+            self._failed()
+            return [None] * len(keys)
+
+        out = [None if b is None or len(b) % 4 else np.frombuffer(b, dtype="<f4") for b in blobs]
+        found = sum(v is not None for v in out)
+        self._count("hits", found)
+        self._count("misses", len(keys) - found)
+        return out
+
+    # ---- asynchronous write-back ----
+
+    def put_many(self, items):
+        """Queues (key, vector) pairs for the background writer; never blocks on Redis."""
+        if not self.available:
+            self._count("dropped", len(items))
+            return
+        self._redis()
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._queue = queue.Queue(self.queue_size)
+                self._writer = threading.Thread(target=self._write_loop, name="redis-cache-writer", daemon=True)
+                self._writer.start()
+            q = self._queue
+        for key, vec in items:
+            blob = np.ascontiguousarray(vec, dtype="<f4").tobytes()
+            try:
+                q.put_nowait((self.prefix + key.hex().encode("ascii"), blob))
+            except queue.Full:
+                self._count("dropped")
+
+    def _write_loop(self):
+        q = self._queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < 512:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    q.task_done()
+
+    def _write(self, batch):
+        if not self.available:
+            self._count("dropped", len(batch))
+            return
+        try:
+            if self._over_memory():
+                self._count("skipped_full", len(batch))
+                return
+            pipe = self._redis().pipeline(transaction=False)
+            for name, blob in batch:
+                pipe.set(name, blob, ex=self.ttl)
+            pipe.execute()
+            self._count("writes", len(batch))
+        except self._errors:
+            self._failed()
+            self._count("dropped", len(batch))
+
+    def _over_memory(self) -> bool:
+        """Checks INFO memory at most every memory_check_seconds."""
+        now = time.monotonic()
+        if now - self._memory_checked >= self.memory_check_seconds:
+            info = self._redis().info("memory")
+            budget = self.max_bytes or int(info.get("maxmemory", 0))
+            self._memory_full = bool(budget) and info.get("used_memory", 0) >= self.high_water * budget
+            self._memory_checked = now
+        return self._memory_full
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Waits (up to `timeout` s) until queued writes have been sent. True when drained."""
+        q = self._queue
+        if q is None:
+            return True
+        deadline = time.monotonic() + timeout
+        while q.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self.stats_counters)
+        out["queued"] = self._queue.qsize() if self._queue is not None else 0
+        out["available"] = self.available
+        return out
+
+
+class TieredVectorCache:
+    """
+    Local MmapVectorCache in front of a shared RedisVectorTier. Local misses
+    are looked up in Redis and hits are copied into the local cache. New
+    vectors go to both, to Redis in the background.
+    """
+
+    def __init__(self, local: MmapVectorCache, remote: RedisVectorTier):
+        self.local = local
+        self.remote = remote
+
+    def get(self, key: bytes):
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        out = self.local.get_many(keys)
+        pending = [i for i, v in enumerate(out) if v is None]
+        if pending:
+            found = self.remote.get_many([keys[i] for i in pending])
+            promote = []
+            for i, vec in zip(pending, found):
+                if vec is not None:
+                    out[i] = vec
+                    promote.append((keys[i], vec))
+            self.local.put_many(promote)
+        return out
+
+    def put(self, key: bytes, vector):
+        self.put_many([(key, vector)])
+
+    def put_many(self, items):
+        items = list(items)
+        self.local.put_many(items)
+        self.remote.put_many(items)
+
+    def stats(self) -> dict:
+        return {**self.local.stats(), "redis": self.remote.stats()}
+
+    def __len__(self):
+        return len(self.local)
+
+
+def migrate_json_cache(src_dir=CACHE_PATH, cache: MmapVectorCache = None, remove: bool = False) -> int:
+    """
+    One-shot migration of a legacy `<sha256>.json` cache directory into the
+    memory-mapped arena. Returns the number of vectors imported.
+    """
+    src_dir = Path(src_dir)
+    if cache is None:
+        cache = get_cache()
+    files = sorted(src_dir.glob("*.json"))
+
+    items = []
+    for file in files:
         with open(file, "r") as f:
-            return json.load(f)["vector"]
+            vec = np.asarray(json.load(f)["vector"], dtype=np.float32)
+        items.append((bytes.fromhex(file.stem), vec))
+    cache.put_many(items)
+
+    if remove:
+        for file in files:
+            file.unlink()
+    return len(items)
+
+
+# -----------------------------
+# Module-level helpers
+# -----------------------------
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """
+    Process-wide default cache under CACHE_PATH, with the shared Redis tier
+    behind it when $LLM_EVAL_REDIS_URL is set.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                local = MmapVectorCache(CACHE_PATH, legacy_dir=CACHE_PATH)
+                if REDIS_URL:
+                    remote = RedisVectorTier(url=REDIS_URL)
+                    atexit.register(remote.flush)
+                    _cache = TieredVectorCache(local, remote)
+                else:
+                    _cache = local
+    return _cache
+
+
+def get_remote_stats():
+    """Counters of the shared Redis tier, or None when there is none."""
+    remote = getattr(_cache, "remote", None)
+    return remote.stats() if remote is not None else None
+
+
+def get_cached_vector(text: str, namespace: str = None):
+    return get_cache().get(_key(text, namespace))
+
+
+def store_vector(text: str, vector, namespace: str = None):
+    get_cache().put(_key(text, namespace), vector)
+
+
+def get_cached_vectors(texts, namespace: str = None):
+    """Bulk lookup; returns a list aligned with `texts` (None for misses)."""
+    return get_cache().get_many([_key(t, namespace) for t in texts])
+
+
+def store_vectors(texts, vectors, namespace: str = None):
+    get_cache().put_many([(_key(t, namespace), v) for t, v in zip(texts, vectors)])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Embedding cache maintenance")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_mig = sub.add_parser("migrate", help="Import legacy <sha256>.json files")
+    p_mig.add_argument("--src", default=str(CACHE_PATH))
+    p_mig.add_argument("--remove", action="store_true", help="Delete JSON files after import")
+
+    sub.add_parser("compact", help="Reclaim space from evicted vectors")
+
+    p_evict = sub.add_parser("evict", help="Keep only the newest N vectors")
+    p_evict.add_argument("--max-entries", type=int, required=True)
 
-    return None
+    sub.add_parser("stats", help="Print cache statistics")
 
+    args = parser.parse_args()
+    # Maintenance applies to this node's files; the Redis tier manages itself (TTL + eviction)
+    cache = getattr(get_cache(), "local", get_cache())
 
-def store_vector(text: str, vector):
-    key = _hash_text(text)
-    file = CACHE_PATH / f"{key}.json"
+    if args.cmd == "migrate":
+        n = migrate_json_cache(args.src, cache, remove=args.remove)
+        print(f"Migrated {n} vectors into {cache.arena_path}")
+    elif args.cmd == "compact":
+        cache.compact()
+    elif args.cmd == "evict":
+        print(f"Evicted {cache.evict(args.max_entries)} vectors")
 
-    with open(file, "w") as f:
-        json.dump({"vector": vector.tolist()}, f)
+    print(json.dumps(cache.stats(), indent=2))
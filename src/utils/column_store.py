@@ -0,0 +1,303 @@
+import os
+import csv
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+STORE_SUFFIX = ".cols"
+META_FILE = "meta.json"
+
+# Rows per chunk when converting a CSV / JSONL results file
+CHUNK_ROWS = 1 << 18
+
+# Low-cardinality text columns are dictionary-encoded (uint8 codes + labels);
+# other text columns are stored Arrow-style (int64 offsets + utf-8 bytes).
+# Anything not listed here is numeric (float64, NaN = missing).
+CATEGORY_COLUMNS = ("verdict",)
+STRING_COLUMNS = ("chat_file", "context_file")
+MAX_CATEGORIES = 255
+
+
+def column_kind(name: str) -> str:
+    if name in CATEGORY_COLUMNS:
+        return "category"
+    if name in STRING_COLUMNS:
+        return "string"
+    return "float64"
+
+
+def store_path_for(results) -> Path:
+    """data/batch_results.csv -> data/batch_results.cols"""
+    return Path(results).with_suffix(STORE_SUFFIX)
+
+
+def source_signature(path) -> dict:
+    """Identifies one version of a results file; any rewrite changes it."""
+    st = os.stat(path)
+    return {"path": str(Path(path).resolve()), "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+
+class ColumnStoreWriter:
+    """
+    Streams result rows into a column store directory: one raw little-endian
+    file per column plus meta.json. Everything is written to <path>.tmp and
+    moved into place on close(), so readers never see a half-written store.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(self.path.name + ".tmp")
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        self.tmp.mkdir(parents=True)
+        self.rows = 0
+        self._kinds = {}
+        self._files = {}
+        self._categories = {}
+        self._string_end = {}
+
+    def _open(self, name: str, kind: str):
+        self._kinds[name] = kind
+        if kind == "string":
+            offsets = open(self.tmp / f"{name}.off", "wb")
+            offsets.write(np.zeros(1, dtype="<i8").tobytes())
+            self._files[name] = (offsets, open(self.tmp / f"{name}.str", "wb"))
+            self._string_end[name] = 0
+        else:
+            self._files[name] = (open(self.tmp / f"{name}.bin", "wb"),)
+            if kind == "category":
+                self._categories[name] = {}
+
+    def append(self, columns: dict):
+        """Appends a block of rows given as {column: sequence}; all sequences have equal length."""
+        n = len(next(iter(columns.values()))) if columns else 0
+        for name, values in columns.items():
+            if name not in self._kinds:
+                if self.rows:
+                    raise ValueError(f"Column {name} appeared after the first block.")
+                self._open(name, column_kind(name))
+            kind = self._kinds[name]
+            files = self._files[name]
+
+            if kind == "category":
+                labels = self._categories[name]
+                text = np.array(["" if v is None or v != v else str(v) for v in values], dtype=str)
+                uniques, inverse = np.unique(text, return_inverse=True)
+                for label in uniques.tolist():
+                    if label not in labels:
+                        if len(labels) >= MAX_CATEGORIES:
+                            raise ValueError(f"Column {name} has more than {MAX_CATEGORIES} distinct values.")
+                        labels[label] = len(labels)
+                lookup = np.array([labels[label] for label in uniques.tolist()], dtype=np.uint8)
+                files[0].write(lookup[inverse].tobytes())
+            elif kind == "string":
+                encoded = [("" if v is None or v != v else str(v)).encode("utf-8") for v in values]
+                lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=n)
+                ends = self._string_end[name] + np.cumsum(lengths)
+                files[0].write(ends.astype("<i8").tobytes())
+                files[1].write(b"".join(encoded))
+                if n:
+                    self._string_end[name] = int(ends[-1])
+            else:
+                data = np.asarray([np.nan if v is None or v == "" else v for v in values]
+                                  if not isinstance(values, np.ndarray) else values, dtype="<f8")
+                files[0].write(data.tobytes())
+        self.rows += n
+
+    def close(self, source: dict = None) -> Path:
+        for files in self._files.values():
+            for f in files:
+                f.close()
+        meta = {
+            "rows": self.rows,
+            "columns": {name: kind for name, kind in self._kinds.items()},
+            "categories": {name: list(labels) for name, labels in self._categories.items()},
+            "source": source,
+        }
+        with open(self.tmp / META_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self.tmp, self.path)
+        return self.path
+
+
+def _iter_blocks(path: Path, chunk_rows: int):
+    """Yields {column: sequence} blocks from a CSV (pandas C parser when installed) or JSONL file."""
+    if path.suffix not in (".jsonl", ".ndjson"):
+        try:
+            import pandas as pd
+        except ImportError:
+            pd = None
+        if pd is not None:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                header = next(csv.reader(f), [])
+            dtypes = {c: ("float64" if column_kind(c) == "float64" else "str") for c in header}
+            for chunk in pd.read_csv(path, dtype=dtypes, chunksize=chunk_rows, engine="c",
+                                     keep_default_na=False, na_values={
+                                         c: [""] for c, t in dtypes.items() if t == "float64"}):
+                yield {c: chunk[c].to_numpy() for c in chunk.columns}
+            return
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.suffix in (".jsonl", ".ndjson"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        block = []
+        for r in rows:
+            block.append(r)
+            if len(block) == chunk_rows:
+                yield {c: [row.get(c) for row in block] for c in block[0]}
+                block = []
+        if block:
+            yield {c: [row.get(c) for row in block] for c in block[0]}
+
+
+def build_store(results, store=None, chunk_rows: int = CHUNK_ROWS) -> Path:
+    """Converts a batch results file (.csv / .jsonl) into a column store; returns its path."""
+    results = Path(results)
+    store = Path(store) if store else store_path_for(results)
+    signature = source_signature(results)
+    writer = ColumnStoreWriter(store)
+    for block in _iter_blocks(results, chunk_rows):
+        writer.append(block)
+    return writer.close(source=signature)
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+
+class ColumnStore:
+    """
+    Read-only view of a column store. Columns are memory-mapped, so opening a
+    10M-row store costs nothing and a query only pages in the columns it touches.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / META_FILE, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.rows = self.meta["rows"]
+        self.kinds = self.meta["columns"]
+        self.columns = list(self.kinds)
+        self._maps = {}
+
+    def _map(self, filename: str, dtype, count: int):
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        if filename not in self._maps:
+            self._maps[filename] = np.memmap(self.path / filename, dtype=dtype, mode="r", shape=(count,))
+        return self._maps[filename]
+
+    def column(self, name: str) -> np.ndarray:
+        """Numeric values (float64) or category codes (uint8) for every row."""
+        kind = self.kinds[name]
+        if kind == "string":
+            raise ValueError(f"Column {name} holds text; use values({name!r}, rows).")
+        return self._map(f"{name}.bin", "<f8" if kind == "float64" else np.uint8, self.rows)
+
+    def categories(self, name: str) -> list:
+        return self.meta["categories"][name]
+
+    def codes_for(self, name: str, labels) -> np.ndarray:
+        """Category codes of `labels` (labels absent from the store are ignored)."""
+        lookup = {label: i for i, label in enumerate(self.categories(name))}
+        return np.array([lookup[label] for label in labels if label in lookup], dtype=np.uint8)
+
+    def values(self, name: str, rows) -> list:
+        """Decoded values of one column for the given row indices."""
+        rows = np.asarray(rows, dtype=np.int64)
+        kind = self.kinds[name]
+        if kind == "float64":
+            return self.column(name)[rows].tolist()
+        if kind == "category":
+            labels = self.categories(name)
+            return [labels[c] for c in self.column(name)[rows].tolist()]
+
+        offsets = self._map(f"{name}.off", "<i8", self.rows + 1)
+        data = self._map(f"{name}.str", np.uint8, int(offsets[-1])) if self.rows else b""
+        starts, ends = offsets[rows].tolist(), offsets[rows + 1].tolist()
+        return [bytes(data[s:e]).decode("utf-8") for s, e in zip(starts, ends)]
+
+    def take(self, rows, columns=None) -> dict:
+        """{column: values} for the given row indices (defaults to every column)."""
+        return {c: self.values(c, rows) for c in (columns or self.columns)}
+
+    def is_fresh(self, results) -> bool:
+        """True when the store was built from the current version of `results`."""
+        return self.meta.get("source") == source_signature(results)
+
+
+def open_store(results, rebuild: bool = True) -> ColumnStore:
+    """
+    Column store for a results file. `results` may be the store directory
+    itself, or a CSV / JSONL file whose sibling .cols store is (re)built when
+    missing or older than the file.
+    """
+    results = Path(results)
+    if results.is_dir():
+        return ColumnStore(results)
+    store = store_path_for(results)
+    if (store / META_FILE).exists():
+        current = ColumnStore(store)
+        if current.is_fresh(results) or not rebuild:
+            return current
+    return ColumnStore(build_store(results, store))
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+
+def filter_mask(store: ColumnStore, categories: dict = None, ranges: dict = None,
+                derived: dict = None) -> np.ndarray:
+    """
+    Boolean row mask, evaluated column by column on the mapped data.
+    categories: {column: allowed labels}; ranges: {column: (lo, hi)} inclusive;
+    derived: extra {name: array} columns `ranges` may refer to (e.g. quality_score).
+    NaN values never pass a range filter.
+    """
+    mask = np.ones(store.rows, dtype=bool)
+    for name, labels in (categories or {}).items():
+        mask &= np.isin(store.column(name), store.codes_for(name, labels))
+    for name, (lo, hi) in (ranges or {}).items():
+        values = derived[name] if derived and name in derived else store.column(name)
+        mask &= (values >= lo) & (values <= hi)
+    return mask
+
+
+def bin_2d(x, y, bins=(60, 40), x_range=None, y_range=None, groups=None, n_groups: int = 1) -> dict:
+    """
+    Server-side scatter: counts of (x, y) points per rectangular bin (and per
+    group code when `groups` is given), computed with one bincount.
+    Returns {"x_edges", "y_edges", "counts"} with counts shaped (n_groups, bx, by).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    ok = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[ok], y[ok]
+    bx, by = bins
+
+    def edges(v, rng, n):
+        lo, hi = rng if rng else ((float(v.min()), float(v.max())) if v.size else (0.0, 1.0))
+        if hi <= lo:
+            hi = lo + 1.0
+        return np.linspace(lo, hi, n + 1)
+
+    x_edges, y_edges = edges(x, x_range, bx), edges(y, y_range, by)
+
+    xi = np.clip(((x - x_edges[0]) / (x_edges[-1] - x_edges[0]) * bx).astype(np.int64), 0, bx - 1)
+    yi = np.clip(((y - y_edges[0]) / (y_edges[-1] - y_edges[0]) * by).astype(np.int64), 0, by - 1)
+    flat = xi * by + yi
+    if groups is not None:
+        flat = np.asarray(groups)[ok].astype(np.int64) * (bx * by) + flat
+
+    counts = np.bincount(flat, minlength=n_groups * bx * by).reshape(n_groups, bx, by)
+    return {"x_edges": x_edges, "y_edges": y_edges, "counts": counts}
+
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from dataclasses import dataclass, field, asdict, fields
+from pathlib import Path
+
+import yaml
+
+CONFIG_PATH = Path("configs/thresholds.yaml")
+DEFAULT_PROFILE = "default"
+
+# How often (seconds) get_config() may stat the file to look for edits
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+# -----------------------------
+# Immutable config objects
+# -----------------------------
+
+@dataclass(frozen=True)
+class Weights:
+    """Quality score weights: relevance / completeness / factuality."""
+    relevance: float = 0.4
+    completeness: float = 0.3
+    factuality: float = 0.3
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """USD per 1k tokens, split by direction."""
+    input: float
+    output: float
+
+
+@dataclass(frozen=True)
+class EvalConfig:
+    relevance_min: float = 0.65
+    completeness_min: float = 0.60
+    factuality_min: float = 0.55
+    price_per_1k_tokens: float = 0.002
+    hallucination_threshold: float = 0.55
+    weights: Weights = field(default_factory=Weights)
+    # Token accounting: tokenizer/pricing model and "exact" or "approximate" counting
+    model: str = "gpt-3.5-turbo"
+    token_counting: str = "exact"
+    pricing: dict = field(default_factory=dict)
+    # Embedding backend (src/utils/embedders.py); process-wide, top level only
+    embedder: str = "sentence-transformers"
+    profile: str = DEFAULT_PROFILE
+
+    @classmethod
+    def from_dict(cls, raw: dict, profile: str = DEFAULT_PROFILE) -> "EvalConfig":
+        nested = {"weights", "pricing"}
+        strings = {"model", "token_counting", "embedder"}
+        known = {f.name for f in fields(cls)} - {"profile"}
+        unknown = set(raw) - known
+        if unknown:
+            raise ValueError(f"Unknown config keys: {sorted(unknown)}")
+        if raw.get("token_counting", "exact") not in ("exact", "approximate"):
+            raise ValueError("token_counting must be 'exact' or 'approximate'")
+
+        values = {k: (str(v) if k in strings else float(v)) for k, v in raw.items() if k not in nested}
+        pricing = {m: ModelPrice(float(p["input"]), float(p["output"])) for m, p in (raw.get("pricing") or {}).items()}
+        return cls(weights=Weights(**raw.get("weights", {})), pricing=pricing, profile=profile, **values)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def fingerprint(self) -> str:
+        """Short hash of every setting that affects scores (the profile name excluded)."""
+        settings = {k: v for k, v in self.to_dict().items() if k != "profile"}
+        return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _merge(base: dict, override: dict) -> dict:
+    merged = dict(base)
+    for k, v in override.items():
+        if isinstance(v, dict) and isinstance(merged.get(k), dict):
+            merged[k] = {**merged[k], **v}
+        else:
+            merged[k] = v
+    return merged
+
+
+# -----------------------------
+# Registry with hot reload
+# -----------------------------
+
+class ConfigRegistry:
+    """
+    Loads the YAML once and hands out immutable EvalConfig objects per profile.
+    The file is re-read when its mtime/size changes (checked at most every
+    `check_interval` seconds). A broken edit keeps the last good config.
+    """
+
+    def __init__(self, path=CONFIG_PATH, check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.path = Path(path)
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._next_check = 0.0
+        self._configs = {}
+
+    def _load(self):
+        with open(self.path, "r") as f:
+            raw = yaml.safe_load(f) or {}
+
+        profiles = raw.pop("profiles", {}) or {}
+        configs = {DEFAULT_PROFILE: EvalConfig.from_dict(raw)}
+        for name, override in profiles.items():
+            if "embedder" in (override or {}):
+                raise ValueError(f"Profile {name!r} cannot override 'embedder' (it is process-wide)")
+            configs[name] = EvalConfig.from_dict(_merge(raw, override or {}), profile=name)
+        return configs
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if self._configs and now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+
+        st = os.stat(self.path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return
+        try:
+            self._configs = self._load()
+        except Exception:
+            if not self._configs:
+                raise
+            return  # keep serving the last good config
+        self._stamp = stamp
+
+    def get(self, profile: str = None) -> EvalConfig:
+        with self._lock:
+            self._maybe_reload()
+            name = profile or DEFAULT_PROFILE
+            if name not in self._configs:
+                raise ValueError(f"Unknown config profile: {name}")
+            return self._configs[name]
+
+    def profiles(self):
+        with self._lock:
+            self._maybe_reload()
+            return sorted(self._configs)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ConfigRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ConfigRegistry()
+    return _registry
+
+
+def get_config(profile: str = None) -> EvalConfig:
+    """Current config for `profile` (default profile when None)."""
+    return get_registry().get(profile)
@@ -0,0 +1,118 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from src.utils.embeddings import VectorTable, embed_many, get_embedder
+
+# Sidecar rows must agree with the active embedder on this probe (first context text)
+PROBE_MIN_COSINE = 0.99
+
+# Opened (or rejected) sidecars kept per process, keyed by file version
+MAX_OPEN = 256
+
+_lock = threading.Lock()
+_opened = OrderedDict()  # (path, mtime_ns, size, model, rows, embedder) -> memmap or rejection reason
+_stats = {"loaded": 0, "rejected": 0}
+
+
+def _map(path: Path, rows: int, dim: int = None) -> np.ndarray:
+    """Memory-maps a sidecar as a read-only (rows, dim) float32 matrix."""
+    if path.suffix == ".npy":
+        vectors = np.load(path, mmap_mode="r", allow_pickle=False)
+        if vectors.dtype != np.float32:
+            raise ValueError(f"dtype {vectors.dtype}, expected float32")
+    else:
+        size = path.stat().st_size
+        if dim is None:
+            dim = size // 4 // rows if rows else 0
+        if not dim or size != rows * dim * 4:
+            raise ValueError(f"{size} bytes is not {rows} float32 rows")
+        vectors = np.memmap(path, dtype="<f4", mode="r", shape=(rows, dim))
+    if vectors.ndim != 2 or vectors.shape[0] != rows:
+        raise ValueError(f"shape {vectors.shape}, expected ({rows}, dim)")
+    if dim is not None and vectors.shape[1] != dim:
+        raise ValueError(f"dim {vectors.shape[1]}, expected {dim}")
+    return vectors
+
+
+def _check(vectors: np.ndarray, text: str):
+    """Embeds one context text (through the cache) and compares it with its sidecar row."""
+    expected = embed_many([text])[0]
+    if expected.shape[0] != vectors.shape[1]:
+        raise ValueError(f"dim {vectors.shape[1]}, embedder produces {expected.shape[0]}")
+    a = np.asarray(vectors[0], dtype=np.float64)
+    b = np.asarray(expected, dtype=np.float64)
+    denom = np.linalg.norm(a) * np.linalg.norm(b)
+    cos = np.dot(a, b) / denom if denom else float(not a.any() and not b.any())
+    if cos < PROBE_MIN_COSINE:
+        raise ValueError("vectors do not match the embedder's output")
+
+
+def load_context_vectors(ctx):
+    """
+    Precomputed vectors for ctx.contexts (a read-only memmap, one row per item)
+    or None when the document has no sidecar or it cannot be used: a missing or
+    malformed file, a row count that does not match the contexts, another
+    model than the active embedder, or rows that disagree with the embedder on
+    the first context text. Callers then embed the texts as usual.
+    """
+    spec = getattr(ctx, "embeddings", None)
+    if spec is None or not ctx.contexts:
+        return None
+    embedder = get_embedder()
+    path = Path(spec.path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    key = (str(path), st and st.st_mtime_ns, st and st.st_size, spec.model, len(ctx.contexts), embedder.name)
+
+    with _lock:
+        if key in _opened:
+            _opened.move_to_end(key)
+            found = _opened[key]
+            return None if isinstance(found, str) else found
+
+    try:
+        if spec.model != embedder.name:
+            raise ValueError(f"made by {spec.model}, active embedder is {embedder.name}")
+        if st is None:
+            raise ValueError("file not found")
+        vectors = _map(path, len(ctx.contexts), spec.dim)
+        _check(vectors, ctx.contexts[0].text)
+        found = vectors
+    except (OSError, ValueError) as e:
+        found = f"{path}: {e}"
+
+    with _lock:
+        _opened[key] = found
+        while len(_opened) > MAX_OPEN:
+            _opened.popitem(last=False)
+        _stats["rejected" if isinstance(found, str) else "loaded"] += 1
+    return None if isinstance(found, str) else found
+
+
+def sidecar_rejections() -> list:
+    """Why recently seen sidecars were not used (one message per file version)."""
+    with _lock:
+        return [v for v in _opened.values() if isinstance(v, str)]
+
+
+def get_sidecar_stats() -> dict:
+    """Counters since start: sidecars loaded and rejected (each file version counted once)."""
+    with _lock:
+        return dict(_stats)
+
+
+def context_table(ctx, parent: VectorTable = None) -> VectorTable:
+    """
+    VectorTable over ctx's context texts backed by its sidecar, chained to
+    `parent`; just `parent` when there is no usable sidecar. Evaluators looking
+    up context texts through it read the mapped rows instead of embedding.
+    """
+    vectors = load_context_vectors(ctx)
+    if vectors is None:
+        return parent
+    return VectorTable([c.text for c in ctx.contexts], vectors, parent)
@@ -0,0 +1,141 @@
+import os
+import re
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Protocol
+
+import numpy as np
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_BACKEND = "sentence-transformers"
+
+# Torch device for the sentence-transformers backend ("cpu", "cuda", ...);
+# unset lets SentenceTransformer pick (GPU when available)
+DEVICE = os.environ.get("LLM_EVAL_DEVICE") or None
+
+# Hashing backend: output size matches all-MiniLM-L6-v2
+HASHING_DIM = 384
+HASHING_SEED = 0
+# Projection rows kept per hashing embedder (~1.5 KB each at 384 dims)
+HASHING_CACHE_ROWS = 16384
+
+_WORD = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    """
+    Anything that turns texts into a (len(texts), dim) float32 matrix.
+    `name` identifies the backend + weights; it namespaces cache keys and
+    FAISS index keys, so two backends never share vectors.
+    """
+
+    name: str
+
+    def encode(self, texts, convert_to_numpy: bool = True) -> np.ndarray:
+        ...
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+
+class SentenceTransformerEmbedder:
+    """
+    The reference fp32 SentenceTransformer. The model loads on first encode (or
+    load()), on `device` (default: DEVICE, i.e. SentenceTransformer's choice).
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, device: str = None):
+        self.model_name = model_name
+        self.name = model_name
+        self.device = device or DEVICE
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.model_name, device=self.device)
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._build()
+        return self._model
+
+    def encode(self, texts, convert_to_numpy: bool = True) -> np.ndarray:
+        vectors = self.load().encode(list(texts), convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class QuantizedEmbedder(SentenceTransformerEmbedder):
+    """
+    Same model with its Linear layers dynamically quantized to int8
+    (torch.ao.quantization.quantize_dynamic). CPU only; weights are quantized once
+    at load, activations per batch.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        super().__init__(model_name, device="cpu")
+        self.name = f"{model_name}+int8-dynamic"
+
+    def _build(self):
+        import torch
+        from torch.ao.quantization import quantize_dynamic
+        model = super()._build()
+        return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class HashingEmbedder:
+    """
+    Deterministic, dependency-free embedder for tests and offline runs.
+
+    Bag of lowercased words and word bigrams, randomly projected to `dim`: each
+    feature's projection row is drawn from a generator seeded by its hash, so
+    the (huge, implicit) projection matrix is never materialized. Texts sharing
+    words get similar vectors; there is no semantics beyond that. The most
+    recently used `cache_rows` rows are kept; others are regenerated on demand.
+    """
+
+    def __init__(self, dim: int = HASHING_DIM, seed: int = HASHING_SEED, cache_rows: int = HASHING_CACHE_ROWS):
+        self.dim = dim
+        self.seed = seed
+        self.name = f"hashing-{dim}-seed{seed}"
+        self._row = lru_cache(maxsize=cache_rows)(self._make_row)
+
+    def _make_row(self, feature: str) -> np.ndarray:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8,
+                                 key=self.seed.to_bytes(8, "little")).digest()
+        rng = np.random.default_rng(int.from_bytes(digest, "little"))
+        row = rng.standard_normal(self.dim).astype(np.float32)
+        row.flags.writeable = False
+        return row
+
+    def _features(self, text: str):
+        words = _WORD.findall(text.lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def encode(self, texts, convert_to_numpy: bool = True) -> np.ndarray:
+        texts = list(texts)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for feature in self._features(text):
+                out[i] += self._row(feature)
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+BACKENDS = {
+    "sentence-transformers": SentenceTransformerEmbedder,
+    "int8": QuantizedEmbedder,
+    "hashing": HashingEmbedder,
+}
+
+
+def create_embedder(backend: str = DEFAULT_BACKEND) -> Embedder:
+    """New embedder for a backend name from BACKENDS."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedder backend: {backend} (choose from {sorted(BACKENDS)})")
+    return BACKENDS[backend]()
@@ -1,53 +1,245 @@
-from sentence_transformers import SentenceTransformer
+import os
 import numpy as np
-from src.utils.caching import get_cached_vector, store_vector
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from src.utils.caching import get_cached_vectors, store_vectors
+from src.utils.embedders import MODEL_NAME, create_embedder
+from src.utils.metrics import ENCODER_BATCH_SIZE
 
-_model = None
+# Overrides the config's `embedder` backend for this process
+EMBEDDER_ENV = "LLM_EVAL_EMBEDDER"
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"texts": 0, "duplicates": 0, "hits": 0, "misses": 0, "encode_calls": 0}
+
+# Encoder calls of the current thread / asyncio task (see track_encode_calls)
+_call_tally = ContextVar("encode_call_tally", default=None)
+
+
+def get_embedder():
+    """
+    The process-wide Embedder, chosen once from $LLM_EVAL_EMBEDDER or the
+    `embedder` key of configs/thresholds.yaml. Creating it is cheap; backends
+    load their weights on first encode.
+    """
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                from src.utils.config import get_config
+                _embedder = create_embedder(os.environ.get(EMBEDDER_ENV) or get_config().embedder)
+    return _embedder
+
+
+def set_embedder(embedder):
+    """Replaces the process-wide embedder (benchmarks, offline runs). Returns the previous one."""
+    global _embedder
+    with _embedder_lock:
+        previous, _embedder = _embedder, embedder
+    return previous
 
 
 def get_model():
     """
-    Loads the embedding model once, then reuses it (faster).
+    Returns the embedder with its weights loaded (used to warm workers and
+    the daemon). sentence_transformers/torch are imported at this point at the earliest.
     """
-    global _model
-    if _model is None:
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
-    return _model
+    embedder = get_embedder()
+    if hasattr(embedder, "load"):
+        embedder.load()
+    return embedder
+
+
+def embedder_name() -> str:
+    """Identity of the active backend (namespaces caches and index keys)."""
+    return get_embedder().name
+
+
+def _cache_namespace():
+    # The reference model keeps the bare text keys it has always used, so
+    # existing caches stay valid; every other backend gets its own key space.
+    name = embedder_name()
+    return None if name == MODEL_NAME else name
 
 
 def embed_text(text: str) -> np.ndarray:
     """
-    Embeds a single text string and caches the vector.
+    Embeds a single text string (cached).
     """
-    # 1️⃣ Try cache first
-    cached = get_cached_vector(text)
-    if cached:
-        return np.array(cached)
+    return embed_many([text])[0]
 
-    # 2️⃣ Compute new embedding
-    model = get_model()
-    vec = model.encode([text], convert_to_numpy=True)[0]
 
-    # 3️⃣ Store in cache for next time
-    store_vector(text, vec)
+def embed_many(texts) -> np.ndarray:
+    """
+    Single batched embedding entry point. Returns one row per input, in input order.
+
+    1. Duplicate texts are collapsed so each unique string is handled once.
+    2. All unique texts are looked up in the cache in bulk.
+    3. Misses are encoded together in a single model.encode call.
+    4. New vectors are written back to the cache in bulk.
+    """
+    texts = list(texts)
+    unique = list(dict.fromkeys(texts))
+
+    namespace = _cache_namespace()
+
+    # 1️⃣ Bulk cache lookup
+    cached = get_cached_vectors(unique, namespace)
+    vectors = dict(zip(unique, cached))
+    missing = [t for t in unique if vectors[t] is None]
+
+    # 2️⃣ Encode only the misses, in one call
+    if missing:
+        encoded = get_embedder().encode(missing, convert_to_numpy=True)
+        ENCODER_BATCH_SIZE.observe(len(missing))
+        vectors.update(zip(missing, encoded))
+
+        # 3️⃣ Bulk write-back
+        store_vectors(missing, encoded, namespace)
 
-    return vec
+    with _stats_lock:
+        _stats["texts"] += len(texts)
+        _stats["duplicates"] += len(texts) - len(unique)
+        _stats["hits"] += len(unique) - len(missing)
+        _stats["misses"] += len(missing)
+        if missing:
+            _stats["encode_calls"] += 1
+    tally = _call_tally.get()
+    if missing and tally is not None:
+        tally[0] += 1
+
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack([vectors[t] for t in texts])
 
 
 def embed_batch(texts):
     """
     Embeds a list of texts at once (faster for FAISS building).
-    No caching is applied here because FAISS is usually batch-based.
+    Goes through the same cached, deduplicating path as embed_text.
+    """
+    return embed_many(texts)
+
+
+def get_embedding_stats() -> dict:
+    """
+    Counters since start (or the last reset):
+    texts, duplicates, hits, misses, encode_calls.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_embedding_stats():
+    with _stats_lock:
+        for k in _stats:
+            _stats[k] = 0
+
+
+@contextmanager
+def track_encode_calls():
+    """
+    Counts the encoder calls made by the current thread (or asyncio task)
+    while active, unlike the process-wide encode_calls counter. Yields a
+    one-item list holding the count.
+    """
+    tally = [0]
+    token = _call_tally.set(tally)
+    try:
+        yield tally
+    finally:
+        _call_tally.reset(token)
+
+
+class VectorTable:
+    """
+    Shared text -> vector lookup for one request.
+    Built with a single embed_many call so evaluators never embed the same string twice.
+
+    `parent` is an optional table shared by many requests (e.g. the context
+    documents of a batch); texts found there are not stored again.
+    """
+
+    def __init__(self, texts, vectors: np.ndarray, parent: "VectorTable" = None):
+        self._rows = {t: i for i, t in enumerate(texts)}
+        self.vectors = vectors
+        self.parent = parent
+
+    @classmethod
+    def build(cls, texts, parent: "VectorTable" = None) -> "VectorTable":
+        unique = [t for t in dict.fromkeys(texts) if parent is None or t not in parent]
+        return cls(unique, embed_many(unique), parent)
+
+    def __contains__(self, text) -> bool:
+        return text in self._rows or (self.parent is not None and text in self.parent)
+
+    def __len__(self) -> int:
+        return len(self._rows) + (len(self.parent) if self.parent is not None else 0)
+
+    def get(self, text: str) -> np.ndarray:
+        return self.matrix([text])[0]
+
+    def matrix(self, texts) -> np.ndarray:
+        """
+        Rows for `texts` in order. Texts missing from the table are embedded
+        on the fly (one extra batched call) rather than failing.
+        """
+        texts = list(texts)
+        missing = [t for t in dict.fromkeys(texts) if t not in self]
+        if missing:
+            extra = embed_many(missing)
+            base = len(self.vectors)
+            self.vectors = np.vstack([self.vectors, extra]) if base else extra
+            for i, t in enumerate(missing):
+                self._rows[t] = base + i
+        if not texts:
+            return np.zeros((0, self.vectors.shape[1] if self.vectors.ndim == 2 else 0), dtype=np.float32)
+        if self.parent is None:
+            return self.vectors[[self._rows[t] for t in texts]]
+        return np.vstack([
+            self.vectors[self._rows[t]] if t in self._rows else self.parent.get(t)
+            for t in texts
+        ])
+
+
+def lookup_vectors(texts, vectors: VectorTable = None) -> np.ndarray:
+    """
+    Rows for `texts` from a precomputed VectorTable, or from embed_many when none is given.
     """
-    model = get_model()
-    vectors = model.encode(texts, convert_to_numpy=True)
-    return vectors
+    if vectors is None:
+        return embed_many(texts)
+    return vectors.matrix(texts)
 
 
 def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     """
-    Computes cosine similarity between two vectors.
+    Computes cosine similarity between two vectors (in float64, since cached
+    vectors come back as float32).
     """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
     if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
         return 0.0
     return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def cosine_similarity_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Computes the full (len(a) x len(b)) cosine similarity matrix with one
+    matmul. Rows with zero norm get similarity 0.0, matching
+    cosine_similarity().
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+
+    a_norm = np.linalg.norm(a, axis=1)
+    b_norm = np.linalg.norm(b, axis=1)
+
+    # Same operation order as cosine_similarity(): dot / (|a| * |b|)
+    dots = a @ b.T
+    denom = np.outer(a_norm, b_norm)
+    return np.divide(dots, denom, out=np.zeros_like(dots), where=denom != 0)
@@ -0,0 +1,105 @@
+import bisect
+import threading
+
+# Prometheus default latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Texts per encoder call
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# -----------------------------
+# Histogram
+# -----------------------------
+
+class Histogram:
+    """Minimal thread-safe Prometheus histogram with optional labels."""
+
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labelvalues):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for values, counts in sorted(series.items()):
+            cumulative = 0
+            for le, n in zip(self.buckets, counts):
+                cumulative += n
+                bucket = _labels(self.labelnames, values, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            bucket = _labels(self.labelnames, values, 'le="+Inf"')
+            plain = _labels(self.labelnames, values)
+            lines.append(f"{self.name}_bucket{bucket} {counts[-1]}")
+            lines.append(f"{self.name}_sum{plain} {_fmt(float(counts[-2]))}")
+            lines.append(f"{self.name}_count{plain} {counts[-1]}")
+        return lines
+
+
+def render_family(name: str, kind: str, help: str, samples) -> list:
+    """Text lines for a counter/gauge computed at scrape time; samples = [(labels dict, value)]."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_fmt(value)}")
+    return lines
+
+
+# -----------------------------
+# Process-wide metrics
+# -----------------------------
+
+REQUEST_LATENCY = Histogram(
+    "llm_eval_request_duration_seconds", "HTTP request latency.", labelnames=("method", "path", "status"))
+STAGE_LATENCY = Histogram(
+    "llm_eval_stage_duration_seconds", "Wall time per evaluation stage (requests with timings on).",
+    labelnames=("stage",))
+ENCODER_BATCH_SIZE = Histogram(
+    "llm_eval_encoder_batch_size", "Texts per encoder call (cache misses only).", buckets=BATCH_SIZE_BUCKETS)
+MICROBATCH_SIZE = Histogram(
+    "llm_eval_microbatch_size", "Texts per cross-request micro-batch.", buckets=BATCH_SIZE_BUCKETS)
+
+HISTOGRAMS = [REQUEST_LATENCY, STAGE_LATENCY, ENCODER_BATCH_SIZE, MICROBATCH_SIZE]
+
+
+def render(extra_families=()) -> str:
+    """Prometheus text exposition (format 0.0.4) of every histogram plus `extra_families` line lists."""
+    lines = []
+    for h in HISTOGRAMS:
+        lines += h.render()
+    for family in extra_families:
+        lines += family
+    return "\n".join(lines) + "\n"
@@ -1,7 +1,20 @@
+import os
+import re
 import json
+from collections import namedtuple
+from datetime import datetime
 from pathlib import Path
-from pydantic import BaseModel, ValidationError, Field
-from typing import List
+from pydantic import BaseModel, ValidationError, Field, TypeAdapter
+from typing import List, Optional
+
+# Trusted input: context items are checked structurally (id and text are
+# strings) instead of being validated into pydantic models.
+TRUSTED_INPUT = os.environ.get("LLM_EVAL_TRUSTED_INPUT", "0") == "1"
+
+# Characters read per refill while streaming a context file
+STREAM_BLOCK = 1 << 20
+# Context items validated per pydantic call
+VALIDATE_BATCH = 4096
 
 
 # -----------------------------
@@ -11,16 +24,38 @@ from typing import List
 class Message(BaseModel):
     role: str = Field(..., pattern="^(user|assistant|system)$")
     content: str
+    timestamp: Optional[datetime] = None  # ISO-8601, when the source log records it
 
 class ChatDocument(BaseModel):
     messages: List[Message]
 
+# One user message and the assistant message(s) answering it.
+# index = position of the user message in ChatDocument.messages
+Turn = namedtuple("Turn", ["index", "user", "replies"])
+
 class ContextItem(BaseModel):
     id: str
     text: str
 
+class ContextEmbeddings(BaseModel):
+    """
+    Optional pointer to precomputed context vectors: a .npy file or raw
+    little-endian float32 rows, one per context item, in order. `path` is
+    relative to the context file. `model` must name the embedder that produced
+    them (see src.utils.context_vectors).
+    """
+    path: str
+    model: str
+    dim: Optional[int] = None  # raw files only; derived from the file size when omitted
+
 class ContextDocument(BaseModel):
     contexts: List[ContextItem]
+    embeddings: Optional[ContextEmbeddings] = None
+
+# Trusted-mode context item: same fields as ContextItem, no validation cost.
+ContextChunk = namedtuple("ContextChunk", ["id", "text"])
+
+_CONTEXT_ITEMS = TypeAdapter(List[ContextItem])
 
 
 # -----------------------------
@@ -50,17 +85,214 @@ def parse_chat(path: str) -> ChatDocument:
         raise ValueError(f"Invalid chat schema: {e}")
 
 
-def parse_context(path: str) -> ContextDocument:
-    """Parses and normalizes context vector JSON."""
+def parse_context(path: str, trusted: bool = None) -> ContextDocument:
+    """
+    Parses and normalizes context vector JSON.
+
+    The `contexts` array is streamed item by item, so the file text and the
+    parsed document are never in memory at the same time. Items are validated
+    in batches of VALIDATE_BATCH; with trusted=True (default: TRUSTED_INPUT)
+    they only get a structural check and come back as ContextChunk tuples.
+    Anything unexpected falls back to the plain loader below, so errors are the
+    same as ever.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {path}")
+    trusted = TRUSTED_INPUT if trusted is None else trusted
+    header = {}
+    try:
+        items = _read_contexts(path, trusted, header)
+        embeddings = header.get("embeddings")
+        if embeddings is not None:
+            embeddings = ContextEmbeddings.model_validate(embeddings)
+    except (ValueError, KeyError, TypeError):  # includes JSONDecodeError / ValidationError
+        items = None
+    if items is None:
+        return _parse_context_document(path)
+    return _resolve_embeddings(ContextDocument.model_construct(contexts=items, embeddings=embeddings), path)
+
+
+def _parse_context_document(path) -> ContextDocument:
+    """Whole-file loader with full pydantic validation (and the reference error messages)."""
     raw = load_json(path)
 
     if "contexts" not in raw:
         raise ValueError("Context JSON must contain a 'contexts' field.")
 
     try:
-        return ContextDocument(**raw)
+        doc = ContextDocument(**raw)
     except ValidationError as e:
         raise ValueError(f"Invalid context schema: {e}")
+    return _resolve_embeddings(doc, path)
+
+
+def _resolve_embeddings(doc: ContextDocument, path) -> ContextDocument:
+    """Makes a relative sidecar path relative to the context file."""
+    if doc.embeddings is not None:
+        doc.embeddings.path = str(Path(path).parent / doc.embeddings.path)
+    return doc
+
+
+# -----------------------------
+# Streaming context reader
+# -----------------------------
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class _JsonStream:
+    """Decodes one JSON value at a time from a text file, refilling a bounded buffer."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.f.read(STREAM_BLOCK)
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def next_char(self) -> str:
+        """Consumes and returns the next non-whitespace character ("" at end of file)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                self.pos += 1
+                return self.buf[self.pos - 1]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def value(self):
+        """Decodes the next value; only accepted once input follows it (a number may continue)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            if end < len(self.buf) or self.eof:
+                self.pos = end
+                return obj
+            self._fill()
+
+    def array_items(self):
+        """
+        Yields the values of an array whose '[' was just consumed. Decodes every
+        complete item in the buffer in a tight loop and refills only when an
+        item runs past the end of it.
+        """
+        if self.next_char() == "]":
+            return
+        self.pos -= 1
+        scan, sep_match = _decoder.scan_once, _SEPARATOR.match
+        while True:
+            buf = self.buf
+            pos = _WHITESPACE.match(buf, self.pos).end()
+            try:
+                while True:
+                    obj, end = scan(buf, pos)
+                    m = sep_match(buf, end)
+                    if m is None:
+                        if _WHITESPACE.match(buf, end).end() < len(buf):
+                            raise ValueError("expected ',' or ']'")
+                        break  # the separator is not buffered yet
+                    if m.group(1) == "]":
+                        yield obj
+                        self.pos = m.end(1)
+                        return
+                    yield obj
+                    pos = m.end()
+            except (StopIteration, json.JSONDecodeError):  # no complete value at pos
+                pass
+            self.pos = pos
+            if self.eof:
+                raise ValueError("unterminated array")
+            self._fill()
+
+
+def _iter_context_items(path, header: dict = None):
+    """
+    Yields the raw items of the top-level `contexts` array without loading the
+    whole file. The top-level `embeddings` value, if any, is stored in `header`.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f)
+        if stream.next_char() != "{":
+            raise ValueError("not a JSON object")
+        found = False
+        sep = stream.next_char()
+        while sep != "}":
+            if sep != '"':
+                raise ValueError("expected a key")
+            stream.pos -= 1  # give back the key's opening quote
+            key = stream.value()
+            if stream.next_char() != ":":
+                raise ValueError("expected ':'")
+            if key == "contexts":
+                if found:
+                    raise ValueError("duplicate 'contexts' key")
+                found = True
+                if stream.next_char() != "[":
+                    raise ValueError("'contexts' is not an array")
+                yield from stream.array_items()
+            elif key == "embeddings" and header is not None:
+                header[key] = stream.value()
+            else:
+                stream.value()
+            sep = stream.next_char()
+            if sep == ",":
+                sep = stream.next_char()
+            elif sep != "}":
+                raise ValueError("expected ',' or '}'")
+        if stream.next_char() != "":
+            raise ValueError("extra data after document")
+        if not found:
+            raise KeyError("contexts")
+
+
+def _read_contexts(path, trusted: bool, header: dict = None) -> list:
+    items, batch = [], []
+    for raw in _iter_context_items(path, header):
+        if trusted:
+            if type(raw) is not dict or type(raw.get("id")) is not str or type(raw.get("text")) is not str:
+                raise TypeError("context item needs string 'id' and 'text'")
+            items.append(ContextChunk(raw["id"], raw["text"]))
+        else:
+            batch.append(raw)
+            if len(batch) == VALIDATE_BATCH:
+                items += _CONTEXT_ITEMS.validate_python(batch)
+                batch = []
+    if batch:
+        items += _CONTEXT_ITEMS.validate_python(batch)
+    return items
+
+
+def pair_turns(messages) -> List[Turn]:
+    """
+    Pairs every user message with the assistant reply that follows it.
+    System messages are skipped, consecutive assistant messages form one reply,
+    and a user message that never gets a reply is dropped.
+    """
+    turns = []
+    pending = None
+    for i, msg in enumerate(messages):
+        if msg.role == "user":
+            pending = Turn(i, msg, [])
+            turns.append(pending)
+        elif msg.role == "assistant" and pending is not None:
+            pending.replies.append(msg)
+    return [t for t in turns if t.replies]
 
 
 # -----------------------------
@@ -1,4 +1,6 @@
 import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Basic PII patterns
 EMAIL_PATTERN = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
@@ -6,26 +8,124 @@ PHONE_PATTERN = r"\+?\d[\d\s\-]{7,}\d"
 NAME_PATTERN  = r"\b([A-Z][a-z]+(?:\s[A-Z][a-z]+)?)\b"
 ID_PATTERN    = r"\b\d{6,}\b"
 
+# Order = precedence when two patterns match at the same position
+PII_TYPES = ("email", "phone", "id", "name")
+
+PLACEHOLDERS = {
+    "email": "[REDACTED_EMAIL]",
+    "phone": "[REDACTED_PHONE]",
+    "id": "[REDACTED_ID]",
+    "name": "[REDACTED_NAME]",
+}
+
+_DETECT_KEYS = {"email": "emails", "phone": "phones", "id": "ids", "name": "names"}
+
+# One alternation, compiled once. A name directly followed by e-mail local-part
+# characters and "@" belongs to the e-mail, not to the name.
+_COMBINED = re.compile("|".join([
+    f"(?P<email>{EMAIL_PATTERN})",
+    f"(?P<phone>{PHONE_PATTERN})",
+    f"(?P<id>{ID_PATTERN})",
+    r"(?P<name>\b[A-Z][a-z]+(?:\s[A-Z][a-z]+)?\b(?![\w.%+-]*@))",
+]))
+
+PiiSpan = namedtuple("PiiSpan", ["type", "start", "end", "text"])
+
+# Chunked scanning: longest PII match assumed to fit in the overlap
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_OVERLAP = 1024
+
+
+# -----------------------------
+# Single-pass scanner
+# -----------------------------
+
+def scan_pii(text: str):
+    """
+    Single pass over `text`; returns non-overlapping typed spans in order.
+    Overlaps resolve leftmost-first, then by PII_TYPES precedence.
+    """
+    return [PiiSpan(m.lastgroup, m.start(), m.end(), m.group()) for m in _COMBINED.finditer(text)]
+
+
+def iter_pii_chunked(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_OVERLAP):
+    """
+    Yields the same spans as scan_pii() for a multi-megabyte text, scanning at
+    most chunk_size + overlap characters per regex call. Exact as long as no
+    single PII match is longer than `overlap`.
+    """
+    pos = 0
+    n = len(text)
+    for chunk_start in range(0, n, chunk_size):
+        chunk_end = chunk_start + chunk_size
+        pos = max(pos, chunk_start)
+        for m in _COMBINED.finditer(text, pos, min(n, chunk_end + overlap)):
+            if m.start() >= chunk_end:
+                break
+            pos = m.end()
+            yield PiiSpan(m.lastgroup, m.start(), m.end(), m.group())
+
+
+def redact_spans(text: str, spans) -> str:
+    """Replaces each span with its placeholder (spans must be sorted and non-overlapping)."""
+    out = []
+    last = 0
+    for span in spans:
+        out.append(text[last:span.start])
+        out.append(PLACEHOLDERS[span.type])
+        last = span.end
+    out.append(text[last:])
+    return "".join(out)
+
+
+def spans_to_detected(spans) -> dict:
+    detected = {key: [] for key in _DETECT_KEYS.values()}
+    for span in spans:
+        detected[_DETECT_KEYS[span.type]].append(span.text)
+    return detected
+
+
+def analyze_pii(text: str, chunked: bool = False):
+    """One scan -> (detected dict, redacted text)."""
+    spans = list(iter_pii_chunked(text)) if chunked else scan_pii(text)
+    return spans_to_detected(spans), redact_spans(text, spans)
+
+
+# -----------------------------
+# Public helpers (same output shape as before)
+# -----------------------------
 
 def detect_pii(text: str):
     """
     Detect possible PII: emails, phone numbers, IDs, names.
     Returns a dictionary.
     """
-    return {
-        "emails": re.findall(EMAIL_PATTERN, text),
-        "phones": re.findall(PHONE_PATTERN, text),
-        "ids": re.findall(ID_PATTERN, text),
-        "names": re.findall(NAME_PATTERN, text)
-    }
+    return spans_to_detected(scan_pii(text))
 
 
 def redact_pii(text: str):
     """
     Replace PII with placeholder tokens.
     """
-    text = re.sub(EMAIL_PATTERN, "[REDACTED_EMAIL]", text)
-    text = re.sub(PHONE_PATTERN, "[REDACTED_PHONE]", text)
-    text = re.sub(ID_PATTERN, "[REDACTED_ID]", text)
-    text = re.sub(NAME_PATTERN, "[REDACTED_NAME]", text)
-    return text
+    return redact_spans(text, scan_pii(text))
+
+
+# -----------------------------
+# Batch API
+# -----------------------------
+
+def analyze_pii_many(texts, workers: int = None, processes: bool = False, chunksize: int = 64):
+    """
+    analyze_pii() over many texts, in input order. `re` holds the GIL, so use
+    processes=True for real parallelism on large batches; threads only help
+    when the caller is already I/O bound.
+    """
+    texts = list(texts)
+    if workers == 1 or len(texts) <= chunksize:
+        return [analyze_pii(t) for t in texts]
+
+    pool_cls = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with pool_cls(max_workers=workers) as pool:
+        if processes:
+            return list(pool.map(analyze_pii, texts, chunksize=chunksize))
+        return list(pool.map(analyze_pii, texts))
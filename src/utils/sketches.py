@@ -0,0 +1,153 @@
+import math
+
+import numpy as np
+
+# Quantile estimates are within ±1% of the true value
+DEFAULT_RELATIVE_ACCURACY = 0.01
+# Bucket cap; ~2048 buckets at 1% cover 18 orders of magnitude before the
+# lowest buckets are collapsed
+DEFAULT_MAX_BUCKETS = 2048
+# Values at or below this (including negatives from clock skew) count as zero
+MIN_INDEXABLE = 1e-9
+
+
+class QuantileSketch:
+    """
+    Mergeable relative-error quantile sketch (DDSketch). Values are counted in
+    logarithmic buckets, so any quantile is returned within `relative_accuracy`
+    of the true value. Memory is bounded by `max_buckets` regardless of how
+    many values are added, and two sketches with the same accuracy merge
+    exactly by adding bucket counts (shards summarize independently).
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_buckets: int = DEFAULT_MAX_BUCKETS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1).")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets = {}  # bucket key -> count
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    # -----------------------------
+    # Updates
+    # -----------------------------
+
+    def add(self, value: float):
+        value = float(value)
+        if math.isnan(value):
+            return
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= MIN_INDEXABLE:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def add_many(self, values):
+        """Vectorized add() for an array of values; NaNs are skipped."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.count += int(values.size)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > MIN_INDEXABLE]
+        self.zero_count += int(values.size - positive.size)
+        keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, n in zip(keys.tolist(), counts.tolist()):
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def merge(self, other: "QuantileSketch"):
+        """Adds another sketch's values into this one (in place)."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy.")
+        for key, n in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+        return self
+
+    def _collapse(self):
+        """Folds the lowest buckets into one; only the smallest values lose accuracy."""
+        keys = sorted(self.buckets)
+        excess = keys[:len(keys) - self.max_buckets + 1]
+        target = excess[-1]
+        self.buckets[target] = sum(self.buckets.pop(k) for k in excess[:-1]) + self.buckets[target]
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+
+    def quantile(self, q: float):
+        """Estimated q-quantile (0 <= q <= 1); None for an empty sketch."""
+        if not self.count:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return min(max(0.0, self.min), self.max)
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                value = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    # -----------------------------
+    # Serialization
+    # -----------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "zero_count": self.zero_count,
+            "buckets": {str(k): n for k, n in sorted(self.buckets.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "QuantileSketch":
+        sketch = cls(state["relative_accuracy"], state.get("max_buckets", DEFAULT_MAX_BUCKETS))
+        sketch.count = state["count"]
+        sketch.sum = state["sum"]
+        sketch.min = math.inf if state["min"] is None else state["min"]
+        sketch.max = -math.inf if state["max"] is None else state["max"]
+        sketch.zero_count = state["zero_count"]
+        sketch.buckets = {int(k): n for k, n in state["buckets"].items()}
+        return sketch
@@ -0,0 +1,75 @@
+import time
+from contextlib import nullcontext
+from src.utils.embeddings import track_encode_calls
+
+# Shared no-op span: with instrumentation off a stage costs one call and a None check
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "wall", "cpu", "tracker", "calls")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.tracker = track_encode_calls()
+        self.calls = self.tracker.__enter__()
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        self.tracker.__exit__(*exc)
+        self.recorder.spans.append({
+            "stage": self.name,
+            "wall_ms": wall * 1000,
+            "cpu_ms": cpu * 1000,
+            "encode_calls": self.calls[0],
+        })
+
+
+class StageRecorder:
+    """
+    Per-request stage spans: wall time, CPU time of the thread that ran the
+    stage, and encoder calls made inside it by that thread, so concurrent
+    requests never show up in each other's trace. Awaited stages (e.g.
+    embeddings through the micro-batcher) show wall time but little CPU and
+    no encoder calls, since the work happens on another thread.
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    def span(self, name: str):
+        return _Span(self, name)
+
+    def timings(self) -> dict:
+        stages = [{k: s[k] for k in ("stage", "wall_ms", "cpu_ms")} for s in self.spans]
+        return {
+            "stages": stages,
+            "total_wall_ms": sum(s["wall_ms"] for s in stages),
+            "total_cpu_ms": sum(s["cpu_ms"] for s in stages),
+        }
+
+    def encoder_trace(self) -> list:
+        return [{"stage": s["stage"], "encode_calls": s["encode_calls"]} for s in self.spans]
+
+    def observe(self, histogram):
+        for s in self.spans:
+            histogram.observe(s["wall_ms"] / 1000, s["stage"])
+
+
+def stage_span(recorder, name: str):
+    """Context manager timing `name` into `recorder`; a shared no-op when recorder is None."""
+    if recorder is None:
+        return _NOOP
+    return recorder.span(name)
+
+
+def run_in_span(recorder, name: str, fn, *args):
+    """fn(*args) inside a span (for stages handed to worker threads)."""
+    with stage_span(recorder, name):
+        return fn(*args)
@@ -0,0 +1,136 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+FALLBACK_ENCODING = "cl100k_base"
+
+# Approximate mode: UTF-8 bytes per token for cl100k-style BPE on English prose.
+APPROX_BYTES_PER_TOKEN = 4.0
+
+# Texts per task in count_tokens_batch
+BATCH_CHUNK_SIZE = 256
+
+_encodings = {}
+_lock = threading.Lock()
+
+
+# -----------------------------
+# Encoders (cached per model)
+# -----------------------------
+
+def register_encoding(model: str, encoding):
+    """
+    Registers an encoding for `model` (anything with .encode(text) -> list).
+    Used for offline runs and tests; registered encodings win over tiktoken.
+    """
+    with _lock:
+        _encodings[model] = encoding
+
+
+def get_encoding(model: str = DEFAULT_MODEL):
+    """
+    Returns the tokenizer for `model`, loading it once per process.
+    Unknown models fall back to cl100k_base.
+    """
+    enc = _encodings.get(model)
+    if enc is not None:
+        return enc
+
+    with _lock:
+        if model not in _encodings:
+            import tiktoken
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding(FALLBACK_ENCODING)
+        return _encodings[model]
+
+
+def _encode(enc, text: str):
+    # encode_ordinary treats special-token strings as plain text instead of raising
+    return getattr(enc, "encode_ordinary", enc.encode)(text)
+
+
+# -----------------------------
+# Counting
+# -----------------------------
+
+def approx_count_tokens(text: str) -> int:
+    """
+    Fast estimate: ceil(utf8_bytes / APPROX_BYTES_PER_TOKEN), no BPE at all.
+
+    Error bound:
+      * Hard: every BPE token covers at least one byte, so the exact count is
+        never more than utf8_bytes, i.e. never more than 4x this estimate.
+      * Empirical: ~4 bytes/token is the usual rule of thumb for English prose
+        on cl100k_base; per-text error is largest on short, code, digit-heavy
+        or non-Latin text and largely cancels out when summed over a big run.
+        Run calibrate_approximation() on a sample of your own data to get the
+        actual bound before relying on approximate costs.
+    """
+    n = len(text.encode("utf-8"))
+    return math.ceil(n / APPROX_BYTES_PER_TOKEN) if n else 0
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL, approximate: bool = False) -> int:
+    if approximate:
+        return approx_count_tokens(text)
+    return len(_encode(get_encoding(model), text))
+
+
+def count_tokens_batch(texts, model: str = DEFAULT_MODEL, approximate: bool = False,
+                       workers: int = None):
+    """
+    Token counts for many texts, in input order. Exact counting is spread over
+    a thread pool (tiktoken's BPE core releases the GIL); workers=1 stays serial.
+    """
+    texts = list(texts)
+    if approximate:
+        return [approx_count_tokens(t) for t in texts]
+
+    enc = get_encoding(model)
+
+    def count_chunk(chunk):
+        return [len(_encode(enc, t)) for t in chunk]
+
+    if workers == 1 or len(texts) <= BATCH_CHUNK_SIZE:
+        return count_chunk(texts)
+
+    chunks = [texts[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(texts), BATCH_CHUNK_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [n for counts in pool.map(count_chunk, chunks) for n in counts]
+
+
+def calibrate_approximation(texts, model: str = DEFAULT_MODEL) -> dict:
+    """
+    Measures approx_count_tokens against exact counts on a sample.
+    Returns the worst per-text relative error and the error of the total.
+    """
+    texts = [t for t in texts if t]
+    exact = count_tokens_batch(texts, model)
+    approx = count_tokens_batch(texts, model, approximate=True)
+
+    per_text = [abs(a - e) / e for a, e in zip(approx, exact) if e]
+    total_exact = sum(exact)
+    return {
+        "texts": len(texts),
+        "max_relative_error": max(per_text) if per_text else 0.0,
+        "mean_relative_error": sum(per_text) / len(per_text) if per_text else 0.0,
+        "total_relative_error": abs(sum(approx) - total_exact) / total_exact if total_exact else 0.0,
+    }
+
+
+# -----------------------------
+# Pricing
+# -----------------------------
+
+def token_cost(input_tokens: int, output_tokens: int, model: str, config) -> float:
+    """
+    Cost in USD using config.pricing[model] (separate input/output prices per
+    1k tokens). Models without an entry use the flat config.price_per_1k_tokens.
+    """
+    price = config.pricing.get(model)
+    if price is None:
+        return (input_tokens + output_tokens) / 1000 * config.price_per_1k_tokens
+    return input_tokens / 1000 * price.input + output_tokens / 1000 * price.output
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+import src.utils.caching as caching
+import src.utils.embeddings as embeddings
+import infra.faiss_index as faiss_index
+import src.utils.token_utils as token_utils
+
+
+class CountingModel:
+    """Deterministic stand-in embedder that records encode calls."""
+
+    name = "counting"
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+
+class StubEncoding:
+    """Offline stand-in for a tiktoken encoding: one token per whitespace-separated word."""
+
+    def encode(self, text):
+        return text.split()
+
+
+@pytest.fixture
+def stub_encoding(monkeypatch):
+    monkeypatch.setattr(token_utils, "_encodings", {})
+    encoding = StubEncoding()
+    token_utils.register_encoding(token_utils.DEFAULT_MODEL, encoding)
+    return encoding
+
+
+@pytest.fixture
+def fake_model(tmp_path, monkeypatch, stub_encoding):
+    model = CountingModel()
+    monkeypatch.setattr(embeddings, "_embedder", model)
+    monkeypatch.setattr(caching, "_cache", caching.MmapVectorCache(tmp_path / "cache"))
+    monkeypatch.setattr(faiss_index, "_registry", faiss_index.IndexRegistry(tmp_path / "indexes"))
+    embeddings.reset_embedding_stats()
+    return model
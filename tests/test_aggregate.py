@@ -0,0 +1,74 @@
+import json
+import numpy as np
+import pytest
+from src.utils.sketches import QuantileSketch
+from src.evaluators.aggregate import StreamingAggregator, aggregate_file
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    values = np.random.default_rng(0).lognormal(0.7, 0.8, 50_000)
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    sketch.add_many(values[:25_000])
+    for v in values[25_000:26_000]:
+        sketch.add(v)
+    sketch.add_many(values[26_000:])
+
+    assert sketch.count == values.size
+    assert sketch.mean == pytest.approx(values.mean())
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(values, q, method="lower")
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+
+
+def test_sketch_memory_is_bounded():
+    sketch = QuantileSketch(relative_accuracy=0.01, max_buckets=64)
+    sketch.add_many(np.geomspace(1e-6, 1e6, 10_000))
+    assert len(sketch.buckets) <= 64
+    assert sketch.quantile(0.99) == pytest.approx(np.quantile(np.geomspace(1e-6, 1e6, 10_000), 0.99), rel=0.011)
+
+
+def test_sharded_aggregates_merge_to_the_whole():
+    rng = np.random.default_rng(1)
+    rows = [{"verdict": rng.choice(["PASS", "FAIL"]), "latency": float(rng.exponential(2.0)),
+             "total_tokens": int(rng.integers(10, 500)), "cost_usd": float(rng.uniform(0, 0.01))}
+            for _ in range(3000)]
+    rows[0]["latency"] = None
+
+    whole = StreamingAggregator(group_by="verdict")
+    shards = [StreamingAggregator(group_by="verdict") for _ in range(3)]
+    for i, row in enumerate(rows):
+        whole.add(row)
+        shards[i % 3].add(row)
+
+    merged = StreamingAggregator.from_dict(json.loads(json.dumps(shards[0].to_dict())))
+    merged.merge(shards[1]).merge(shards[2])
+
+    summary, combined = whole.summary(), merged.summary()
+    for expected, got in [(summary["overall"], combined["overall"])] + [
+            (summary["groups"][g], combined["groups"][g]) for g in ("PASS", "FAIL")]:
+        for metric, stats in expected.items():
+            assert got[metric] == pytest.approx(stats)
+    assert summary["rows"] == 3000
+    assert summary["overall"]["latency"]["count"] == 2999
+    assert set(summary["groups"]) == {"PASS", "FAIL"}
+
+
+def test_aggregate_file_csv_and_jsonl_agree(tmp_path):
+    rows = [{"verdict": "PASS" if i % 4 else "WARN", "latency": "" if i == 5 else i / 10,
+             "total_tokens": i, "cost_usd": i / 1000} for i in range(1, 200)]
+    csv_path = tmp_path / "r.csv"
+    csv_path.write_text("verdict,latency,total_tokens,cost_usd\n" + "".join(
+        f"{r['verdict']},{r['latency']},{r['total_tokens']},{r['cost_usd']}\n" for r in rows))
+    jsonl_path = tmp_path / "r.jsonl"
+    jsonl_path.write_text("".join(json.dumps({**r, "latency": r["latency"] or None}) + "\n" for r in rows))
+
+    a = aggregate_file(csv_path, group_by="verdict", chunk_rows=50).summary()
+    b = aggregate_file(jsonl_path, group_by="verdict", chunk_rows=50).summary()
+
+    assert a["overall"]["latency"]["count"] == 198
+    assert a["overall"]["total_tokens"]["p50"] == pytest.approx(100, rel=0.011)
+    assert a["groups"]["WARN"]["total_tokens"]["count"] == 49
+    assert a.keys() == b.keys()
+    for metric in ("latency", "total_tokens", "cost_usd"):
+        assert a["overall"][metric]["count"] == b["overall"][metric]["count"]
+        assert a["overall"][metric]["p99"] == pytest.approx(b["overall"][metric]["p99"])
@@ -0,0 +1,78 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from src.app import create_app
+
+CHAT = {"messages": [
+    {"role": "user", "content": "What is AI?"},
+    {"role": "assistant", "content": "AI means artificial intelligence."},
+]}
+CTX = {"contexts": [
+    {"id": "ctx1", "text": "AI is the simulation of human intelligence."},
+    {"id": "ctx2", "text": "Machine learning is a subset of AI."},
+]}
+
+
+@pytest.fixture
+def client(fake_model):
+    with TestClient(create_app(batching=True)) as c:
+        yield c
+
+
+def test_inline_endpoint(client):
+    resp = client.post("/evaluate/inline", json={"chat": CHAT, "context": CTX})
+    assert resp.status_code == 200
+    assert resp.json()["verdict"] in {"PASS", "WARN", "FAIL"}
+    assert resp.json()["scores"]["factuality"]["claims"] == ["AI means artificial intelligence"]
+
+
+def test_inline_endpoint_validates_payload(client):
+    resp = client.post("/evaluate/inline", json={"chat": {"messages": [{"role": "bot", "content": "x"}]}, "context": CTX})
+    assert resp.status_code == 422
+
+
+def test_batch_streams_ndjson_and_embeds_shared_context_once(client, fake_model):
+    pairs = [
+        {"id": f"p{i}", "chat": {"messages": [
+            {"role": "user", "content": f"Question {i}?"},
+            {"role": "assistant", "content": f"Answer {i}."},
+        ]}, "context_ref": "shared"}
+        for i in range(3)
+    ]
+    resp = client.post("/evaluate/batch", json={"contexts": {"shared": CTX}, "pairs": pairs})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert sorted(line["id"] for line in lines) == ["p0", "p1", "p2"]
+    assert all("report" in line for line in lines)
+
+    encoded = [t for call in fake_model.calls for t in call]
+    for c in CTX["contexts"]:
+        assert encoded.count(c["text"]) == 1
+
+
+def test_batch_rejects_unknown_context_ref(client):
+    resp = client.post("/evaluate/batch", json={"pairs": [{"chat": CHAT, "context_ref": "nope"}]})
+    assert resp.status_code == 422
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client):
+    resp = client.post("/evaluate/inline", json={"chat": CHAT, "context": CTX, "timings": True})
+    stages = [s["stage"] for s in resp.json()["stage_timings"]["stages"]]
+    assert stages[:2] == ["pii", "embed"]
+
+    body = client.get("/metrics").text
+    assert 'llm_eval_request_duration_seconds_count{method="POST",path="/evaluate/inline",status="200"}' in body
+    for name in ("llm_eval_encoder_batch_size_bucket", "llm_eval_embedding_cache_hit_ratio",
+                 "llm_eval_faiss_index_reuse_ratio", "llm_eval_batcher_queue_depth",
+                 'llm_eval_stage_duration_seconds_count{stage="embed"}'):
+        assert name in body
+
+
+def test_request_latency_is_labelled_by_route(client):
+    for i in range(3):
+        assert client.get(f"/nope/{i}").status_code == 404
+    body = client.get("/metrics").text
+    assert 'path="/nope/' not in body
+    assert 'llm_eval_request_duration_seconds_count{method="GET",path="unmatched",status="404"} 3' in body
@@ -0,0 +1,186 @@
+import json
+import pytest
+from src.batch_eval import run_batch
+
+
+@pytest.fixture
+def sample_folder(tmp_path, fake_model):
+    folder = tmp_path / "samples"
+    folder.mkdir()
+    for i in range(5):
+        chat = {"messages": [
+            {"role": "user", "content": f"What is topic {i}?"},
+            {"role": "assistant", "content": "Topic " * (i + 1) + "is covered. It is documented."},
+        ]}
+        ctx = {"contexts": [{"id": "c1", "text": f"Topic {i} is covered here."}, {"id": "c2", "text": "Unrelated."}]}
+        (folder / f"sample-chat-conversation-{i:02d}.json").write_text(json.dumps(chat))
+        (folder / f"sample_context_vectors-{i:02d}.json").write_text(json.dumps(ctx))
+    return folder
+
+
+@pytest.mark.parametrize("workers,threads", [(2, True), (2, False)])
+def test_parallel_matches_serial(sample_folder, tmp_path, workers, threads):
+    serial_out = tmp_path / "serial.csv"
+    parallel_out = tmp_path / "parallel.csv"
+
+    run_batch(folder=sample_folder, output=serial_out, chunk_size=2)
+    stats = run_batch(workers=workers, threads=threads, folder=sample_folder, output=parallel_out, chunk_size=2)
+
+    assert parallel_out.read_text() == serial_out.read_text()
+    assert stats["pairs"] == 5
+    assert stats["worker_utilization"]
+
+
+def test_resume_after_crash(sample_folder, tmp_path, monkeypatch):
+    import src.batch_eval as batch_eval
+
+    clean_out = tmp_path / "clean.csv"
+    run_batch(folder=sample_folder, output=clean_out)
+
+    out = tmp_path / "resumed.csv"
+    real_evaluate_pair = batch_eval.evaluate_pair
+    calls = []
+
+    def crashing(pair, profile=None):
+        calls.append(pair)
+        if len(calls) == 4:
+            raise RuntimeError("boom")
+        return real_evaluate_pair(pair, profile)
+
+    monkeypatch.setattr(batch_eval, "evaluate_pair", crashing)
+    with pytest.raises(RuntimeError):
+        run_batch(folder=sample_folder, output=out, chunk_size=1, flush_every=2)
+    assert batch_eval.checkpoint_path(out).exists()
+
+    monkeypatch.setattr(batch_eval, "evaluate_pair", real_evaluate_pair)
+    stats = run_batch(folder=sample_folder, output=out, chunk_size=1, flush_every=2)
+
+    assert stats["skipped"] == 2
+    assert stats["pairs"] == 3
+    assert out.read_text() == clean_out.read_text()
+    # Sketches from before the crash come back from the checkpoint
+    assert stats["summary"]["overall"]["total_tokens"]["count"] == 5
+    assert batch_eval.sketch_path(out).exists()
+    assert not batch_eval.checkpoint_path(out).exists()
+
+    # Resuming with another --group-by rebuilds the sketches from the rows already written
+    calls.clear()
+    monkeypatch.setattr(batch_eval, "evaluate_pair", crashing)
+    with pytest.raises(RuntimeError):
+        run_batch(folder=sample_folder, output=out, chunk_size=1, flush_every=2, force=True)
+    monkeypatch.setattr(batch_eval, "evaluate_pair", real_evaluate_pair)
+    stats = run_batch(folder=sample_folder, output=out, chunk_size=1, flush_every=2, group_by="verdict")
+    assert stats["skipped"] == 2
+    assert stats["summary"]["overall"]["total_tokens"]["count"] == 5
+    assert sum(g["total_tokens"]["count"] for g in stats["summary"]["groups"].values()) == 5
+
+
+def test_checkpoint_of_another_input_is_not_resumed(sample_folder, tmp_path, monkeypatch):
+    import src.batch_eval as batch_eval
+
+    out = tmp_path / "out.jsonl"
+    real_evaluate_pair = batch_eval.evaluate_pair
+    calls = []
+
+    def crashing(pair, profile=None):
+        calls.append(pair)
+        if len(calls) == 4:
+            raise RuntimeError("boom")
+        return real_evaluate_pair(pair, profile)
+
+    monkeypatch.setattr(batch_eval, "evaluate_pair", crashing)
+    with pytest.raises(RuntimeError):
+        run_batch(folder=sample_folder, output=out, chunk_size=1, flush_every=2)
+    monkeypatch.setattr(batch_eval, "evaluate_pair", real_evaluate_pair)
+
+    manifest = tmp_path / "pairs.jsonl"
+    manifest.write_text(json.dumps({"chat": str(sample_folder / "sample-chat-conversation-04.json"),
+                                    "ctx": str(sample_folder / "sample_context_vectors-04.json")}) + "\n")
+    stats = run_batch(manifest=manifest, output=out, chunk_size=1, flush_every=2)
+
+    assert (stats["skipped"], stats["pairs"]) == (0, 1)
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["chat_file"] for r in rows] == ["sample-chat-conversation-04.json"]
+
+
+def test_manifest_to_jsonl(sample_folder, tmp_path):
+    manifest = tmp_path / "pairs.jsonl"
+    manifest.write_text("\n".join(
+        json.dumps({"chat": str(sample_folder / f"sample-chat-conversation-{i:02d}.json"),
+                    "ctx": str(sample_folder / f"sample_context_vectors-{i:02d}.json")})
+        for i in (3, 1)
+    ) + "\n")
+
+    out = tmp_path / "out.jsonl"
+    run_batch(manifest=manifest, output=out)
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["chat_file"] for r in rows] == ["sample-chat-conversation-03.json", "sample-chat-conversation-01.json"]
+
+
+def test_incremental_reuses_unchanged_pairs(sample_folder, tmp_path, monkeypatch):
+    import src.batch_eval as batch_eval
+
+    out = tmp_path / "out.csv"
+    first = run_batch(folder=sample_folder, output=out, chunk_size=2)
+    assert (first["reused"], first["recomputed"]) == (0, 5)
+
+    chat = sample_folder / "sample-chat-conversation-02.json"
+    chat.write_text(chat.read_text().replace("What is topic 2?", "Is topic 2 covered?"))
+    evaluated = []
+    real_evaluate_pair = batch_eval.evaluate_pair
+
+    def recording(pair, profile=None):
+        evaluated.append(pair[0].name)
+        return real_evaluate_pair(pair, profile)
+
+    monkeypatch.setattr(batch_eval, "evaluate_pair", recording)
+
+    second = run_batch(folder=sample_folder, output=out, chunk_size=2, workers=2, threads=True)
+    assert (second["reused"], second["recomputed"]) == (4, 1)
+    assert evaluated == [chat.name]
+    incremental = out.read_text()
+
+    forced = run_batch(folder=sample_folder, output=out, chunk_size=2, force=True)
+    assert (forced["reused"], forced["recomputed"]) == (0, 5)
+    assert out.read_text() == incremental
+
+    monkeypatch.setattr(batch_eval, "EVALUATOR_VERSION", batch_eval.EVALUATOR_VERSION + 1)
+    assert run_batch(folder=sample_folder, output=out)["recomputed"] == 5
+
+
+def test_reused_rows_stream_with_workers(tmp_path):
+    from src.batch_eval import PairTask, iter_rows
+
+    consumed = []
+
+    def tasks():
+        for i in range(1000):
+            consumed.append(i)
+            yield PairTask((tmp_path / f"c{i}.json", tmp_path / "ctx.json"), f"k{i}", {"verdict": "PASS"})
+
+    rows = iter_rows(tasks(), workers=2, threads=True, chunk_size=10)
+    first = next(rows)
+    assert first["pair_key"] == "k0" and first["reused"]
+    assert len(consumed) <= 10
+    assert len(list(rows)) == 999
+
+
+def test_plan_pairs_hashes_shared_files_once(sample_folder, tmp_path, monkeypatch):
+    import src.batch_eval as batch_eval
+
+    ctx = sample_folder / "sample_context_vectors-01.json"
+    pairs = [(c, ctx) for c in sorted(sample_folder.glob("sample-chat-conversation-*.json"))]
+    opened = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(str(path))
+        return real_open(path, *args, **kwargs)
+
+    manifest = batch_eval.ContentManifest(tmp_path / "hashes.db")
+    manifest.begin()
+    monkeypatch.setattr(batch_eval, "open", counting_open, raising=False)
+    tasks = list(batch_eval.plan_pairs(pairs, manifest, "v"))
+    manifest.close()
+
+    assert len(tasks) == 5 and opened.count(str(ctx)) == 1
@@ -0,0 +1,52 @@
+import asyncio
+import numpy as np
+from src.utils.batching import MicroBatcher
+
+
+def _recording_embed(calls):
+    def embed(texts):
+        calls.append(list(texts))
+        return np.array([[len(t)] for t in texts], dtype=np.float32)
+    return embed
+
+
+def test_concurrent_requests_share_one_encoder_batch():
+    calls = []
+
+    async def scenario():
+        batcher = MicroBatcher(_recording_embed(calls), max_batch_size=100, max_wait_ms=50)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.embed(["x" * i, "y"]) for i in range(1, 6)))
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [r[:, 0].tolist() for r in results] == [[i, 1] for i in range(1, 6)]
+
+
+def test_batches_close_at_max_size():
+    calls = []
+
+    async def scenario():
+        batcher = MicroBatcher(_recording_embed(calls), max_batch_size=4, max_wait_ms=50)
+        await asyncio.gather(*(batcher.embed(["a", "b"]) for _ in range(4)))
+        await batcher.stop()
+
+    asyncio.run(scenario())
+    assert [len(c) for c in calls] == [4, 4]
+
+
+def test_async_endpoint_uses_batcher(fake_model):
+    from fastapi.testclient import TestClient
+    from src.app import create_app
+
+    app = create_app(batching=True)
+    with TestClient(app) as client:
+        resp = client.post("/evaluate", json={
+            "chat_path": "data/samples/sample-chat-conversation-01.json",
+            "ctx_path": "data/samples/sample_context_vectors-01.json",
+        })
+    assert resp.status_code == 200
+    assert resp.json()["verdict"] in {"PASS", "WARN", "FAIL"}
+    assert app.state.batcher.batches == 1
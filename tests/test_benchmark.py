@@ -0,0 +1,22 @@
+import copy
+from src.benchmark import STAGES, compare_results, generate_dataset, load_manifest, run_benchmark
+
+
+def test_benchmark_runs_offline_and_flags_regressions(tmp_path):
+    manifest = generate_dataset(tmp_path / "data", pairs=6, turns=2, contexts=3, shared_contexts=2)
+    assert len(load_manifest(manifest)) == 6
+
+    results = run_benchmark(manifest, passes=2, work_dir=tmp_path)
+    cold, warm = results["passes"]
+    assert cold["turns"] == 12 and set(cold["stages"]) == set(STAGES)
+    assert cold["cache"]["index_builds"] == 2
+    assert warm["cache"]["embedding_hit_rate"] == 1.0
+    assert warm["cache"]["encode_calls"] == 0
+    assert sum(warm["verdicts"].values()) == 6
+
+    assert compare_results(results, results)[0] == []
+    slower = copy.deepcopy(results)
+    slower["passes"][0]["stages"]["embed"]["seconds"] = results["passes"][0]["stages"]["embed"]["seconds"] * 2 + 1
+    slower["passes"][0]["pairs_per_sec"] /= 2
+    flagged = {r["metric"] for r in compare_results(results, slower)[0]}
+    assert flagged == {"pass1.stage.embed", "pass1.pairs_per_sec"}
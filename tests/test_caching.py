@@ -0,0 +1,149 @@
+import json
+import numpy as np
+from src.utils.caching import MmapVectorCache, migrate_json_cache, _key
+
+
+def test_roundtrip_float32(tmp_path):
+    cache = MmapVectorCache(tmp_path)
+    cache.put(_key("hello"), np.arange(4, dtype=np.float64))
+    vec = cache.get(_key("hello"))
+    assert vec.dtype == np.float32
+    assert vec.tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert cache.get(_key("missing")) is None
+
+
+def test_second_reader_sees_new_vectors(tmp_path):
+    writer = MmapVectorCache(tmp_path)
+    reader = MmapVectorCache(tmp_path, lru_size=1)
+    writer.put_many([(_key("a"), np.ones(3)), (_key("b"), np.zeros(3))])
+    assert reader.get_many([_key("b"), _key("a")])[1].tolist() == [1.0, 1.0, 1.0]
+
+
+def test_evict_and_compact(tmp_path):
+    cache = MmapVectorCache(tmp_path)
+    cache.put_many([(_key(str(i)), np.full(8, i)) for i in range(10)])
+    cache.evict(4)
+    assert len(cache) == 4
+    assert cache.stats()["arena_bytes"] == 4 * 8 * 4
+    assert cache.get(_key("0")) is None
+    assert cache.get(_key("9")).tolist() == [9.0] * 8
+
+
+def test_reader_remaps_after_another_process_compacts(tmp_path):
+    writer = MmapVectorCache(tmp_path)
+    reader = MmapVectorCache(tmp_path, lru_size=1)
+    writer.put_many([(_key(str(i)), np.full(8, i)) for i in range(10)])
+    assert reader.get(_key("0")).tolist() == [0.0] * 8  # maps the 10-vector arena
+
+    writer.put(_key("new"), np.full(8, 42))
+    assert len(reader) == 11  # index now runs past the reader's mapping
+    writer.delete_many([_key(str(i)) for i in range(6)])
+    writer.compact()
+
+    assert reader.get(_key("new")).tolist() == [42.0] * 8
+    assert reader.get(_key("0")) is None
+
+
+def test_put_copies_caller_arrays(tmp_path):
+    cache = MmapVectorCache(tmp_path)
+    vec = np.ones(4, dtype=np.float32)
+    cache.put(_key("v"), vec)
+    vec[:] = 7
+    assert cache.get(_key("v")).tolist() == [1.0] * 4
+
+
+def test_migrate_json_cache(tmp_path):
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    with open(legacy / f"{_key('x').hex()}.json", "w") as f:
+        json.dump({"vector": [0.5, 0.25]}, f)
+
+    cache = MmapVectorCache(tmp_path / "arena")
+    assert migrate_json_cache(legacy, cache) == 1
+    assert cache.get(_key("x")).tolist() == [0.5, 0.25]
+
+
+class FakeRedis:
+    """In-process stand-in for the redis-py calls RedisVectorTier makes."""
+
+    def __init__(self, maxmemory=0):
+        self.data = {}
+        self.ttls = {}
+        self.maxmemory = maxmemory
+        self.down = False
+        self.mget_calls = 0
+
+    def _check(self):
+        if self.down:
+            from redis.exceptions import ConnectionError
+            raise ConnectionError("connection refused")
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def info(self, section=None):
+        self._check()
+        return {"used_memory": sum(len(v) for v in self.data.values()), "maxmemory": self.maxmemory}
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def mget(self, names):
+        self.ops.append(("mget", names))
+
+    def set(self, name, value, ex=None):
+        self.ops.append(("set", name, value, ex))
+
+    def execute(self):
+        c = self.client
+        c._check()
+        out = []
+        for op in self.ops:
+            if op[0] == "mget":
+                c.mget_calls += 1
+                out.append([c.data.get(n) for n in op[1]])
+            else:
+                c.data[op[1]], c.ttls[op[1]] = op[2], op[3]
+                out.append(True)
+        return out
+
+
+def test_redis_tier_shares_vectors_between_nodes(tmp_path):
+    from src.utils.caching import RedisVectorTier, TieredVectorCache
+    server = FakeRedis()
+    node_a = TieredVectorCache(MmapVectorCache(tmp_path / "a"), RedisVectorTier(server, ttl=60, mget_chunk=2))
+    node_b = TieredVectorCache(MmapVectorCache(tmp_path / "b"), RedisVectorTier(server, ttl=60, mget_chunk=2))
+
+    keys = [_key(str(i)) for i in range(5)]
+    node_a.put_many([(k, np.full(3, i)) for i, k in enumerate(keys)])
+    assert node_a.remote.flush()
+    assert all(len(blob) == 3 * 4 and ttl == 60 for blob, ttl in zip(server.data.values(), server.ttls.values()))
+
+    found = node_b.get_many(keys + [_key("missing")])
+    assert [v.tolist() for v in found[:5]] == [[float(i)] * 3 for i in range(5)]
+    assert found[5] is None
+    assert server.mget_calls == 3  # one pipeline, ceil(6 / 2) MGETs
+    assert len(node_b.local) == 5  # promoted into the local tier
+
+
+def test_redis_tier_degrades_and_respects_memory(tmp_path):
+    from src.utils.caching import RedisVectorTier, TieredVectorCache
+    server = FakeRedis()
+    cache = TieredVectorCache(MmapVectorCache(tmp_path), RedisVectorTier(server, retry_seconds=60))
+
+    server.down = True
+    assert cache.get_many([_key("x")]) == [None]
+    assert not cache.remote.available
+    cache.put(_key("x"), np.ones(2))  # local only while Redis is down
+    assert cache.get(_key("x")).tolist() == [1.0, 1.0]
+    assert cache.remote.stats()["errors"] == 1 and not server.data
+
+    full = FakeRedis(maxmemory=1)
+    full.data["other"] = b"xx"
+    tier = RedisVectorTier(full)
+    tier.put_many([(_key("y"), np.ones(2))])
+    assert tier.flush()
+    assert tier.stats()["skipped_full"] == 1 and list(full.data) == ["other"]
@@ -0,0 +1,76 @@
+import os
+import json
+import numpy as np
+from src.utils.column_store import (
+    ColumnStore, build_store, open_store, store_path_for, filter_mask, bin_2d,
+)
+from src.evaluators.columnar import load_score_columns
+
+HEADER = "chat_file,context_file,relevance,completeness,factuality,verdict,latency,total_tokens,cost_usd\n"
+
+
+def _write_results(path, n, verdicts=("PASS", "WARN", "FAIL")):
+    lines = [HEADER]
+    for i in range(n):
+        latency = "" if i % 7 == 0 else f"{i / 10}"
+        lines.append(f"chat-{i:05d}.json,ctx-é{i % 3}.json,{i / n},{1 - i / n},0.5,"
+                     f"{verdicts[i % len(verdicts)]},{latency},{i * 2},{i / 1e5}\n")
+    path.write_text("".join(lines), encoding="utf-8")
+
+
+def test_store_round_trips_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "results.csv"
+    _write_results(csv_path, 50)
+    store = ColumnStore(build_store(csv_path, chunk_rows=16))
+
+    assert store.rows == 50
+    assert store.categories("verdict") == ["FAIL", "PASS", "WARN"]
+    assert store.values("verdict", [0, 1, 2]) == ["PASS", "WARN", "FAIL"]
+    assert store.values("chat_file", [0, 49]) == ["chat-00000.json", "chat-00049.json"]
+    assert store.values("context_file", [4]) == ["ctx-é1.json"]
+    assert np.isnan(store.column("latency")[0]) and store.column("latency")[1] == 0.1
+    assert store.column("total_tokens")[10] == 20.0
+
+    jsonl_path = tmp_path / "results.jsonl"
+    rows = [dict(zip(HEADER.strip().split(","), line.strip().split(",")))
+            for line in csv_path.read_text(encoding="utf-8").splitlines()[1:]]
+    jsonl_path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    other = ColumnStore(build_store(jsonl_path, tmp_path / "j.cols", chunk_rows=16))
+    assert other.take([3, 17]) == store.take([3, 17], other.columns)
+
+    scores = load_score_columns(store.path)
+    assert scores["relevance"].tolist() == [i / 50 for i in range(50)]
+
+
+def test_open_store_rebuilds_when_results_change(tmp_path):
+    csv_path = tmp_path / "results.csv"
+    _write_results(csv_path, 10)
+    assert open_store(csv_path).rows == 10
+    assert store_path_for(csv_path).is_dir()
+
+    _write_results(csv_path, 12)
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert open_store(csv_path).rows == 12
+    assert open_store(store_path_for(csv_path)).rows == 12
+
+
+def test_filters_and_bins(tmp_path):
+    csv_path = tmp_path / "results.csv"
+    _write_results(csv_path, 300)
+    store = open_store(csv_path)
+    quality = np.linspace(0, 1, 300)
+
+    mask = filter_mask(store, categories={"verdict": ["PASS", "FAIL", "MISSING"]},
+                       ranges={"quality_score": (0.5, 1.0), "latency": (0.0, 100.0)},
+                       derived={"quality_score": quality})
+    verdict = np.array(store.values("verdict", range(300)))
+    latency = store.column("latency")
+    expected = np.isin(verdict, ["PASS", "FAIL"]) & (quality >= 0.5) & ~np.isnan(latency)
+    assert (mask == expected).all()
+
+    codes = store.column("verdict")
+    bins = bin_2d(store.column("total_tokens"), quality, bins=(8, 5), groups=codes, n_groups=3)
+    assert bins["counts"].shape == (3, 8, 5)
+    assert bins["counts"].sum() == 300
+    assert bins["counts"].sum(axis=(1, 2)).tolist() == np.bincount(codes, minlength=3).tolist()
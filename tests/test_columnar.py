@@ -0,0 +1,69 @@
+import numpy as np
+from src.evaluators.columnar import (
+    load_score_columns, quality_scores, verdicts, verdict_codes, sweep_thresholds, sweep_weights,
+)
+from src.evaluators.reporter import compute_quality_score, make_verdict
+from src.utils.config import EvalConfig, get_config
+
+
+def _scores(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.2, 1.0, size=(3, n))
+
+
+def test_vectorized_matches_row_by_row():
+    rel, comp, fact = _scores()
+    cfg = get_config("strict")
+    expected = [make_verdict(r, c, f, cfg) for r, c, f in zip(rel, comp, fact)]
+    assert verdicts(rel, comp, fact, cfg).tolist() == expected
+
+    q = quality_scores(rel, comp, fact, cfg.weights)
+    assert np.allclose(q, [compute_quality_score(r, c, f, cfg.weights) for r, c, f in zip(rel, comp, fact)])
+
+
+def test_threshold_sweep_matches_brute_force():
+    rel, comp, fact = _scores()
+    grid_r, grid_c, grid_f = [0.5, 0.65, 0.8], [0.4, 0.6], [0.3, 0.55, 0.7, 0.9]
+    res = sweep_thresholds(rel, comp, fact, grid_r, grid_c, grid_f)
+
+    for i, r in enumerate(grid_r):
+        for j, c in enumerate(grid_c):
+            for k, f in enumerate(grid_f):
+                cfg = EvalConfig(relevance_min=r, completeness_min=c, factuality_min=f)
+                codes = verdict_codes(rel, comp, fact, cfg)
+                assert res["pass_rate"][i, j, k] == np.mean(codes == 0)
+                assert res["fail_rate"][i, j, k] == np.mean(codes == 2)
+                assert np.isclose(res["warn_rate"][i, j, k], np.mean(codes == 1))
+
+
+def test_threshold_sweep_fails_missing_scores_like_make_verdict():
+    rel, comp, fact = _scores(n=12)
+    rel[0], comp[1], fact[2] = np.nan, np.nan, np.nan
+    rel[3] = comp[3] = fact[3] = np.nan
+    grid = [0.3, 0.6, 0.9]
+    res = sweep_thresholds(rel, comp, fact, grid, grid, grid)
+
+    for i, r in enumerate(grid):
+        for j, c in enumerate(grid):
+            for k, f in enumerate(grid):
+                cfg = EvalConfig(relevance_min=r, completeness_min=c, factuality_min=f)
+                expected = [make_verdict(*row, cfg) for row in zip(rel, comp, fact)]
+                assert verdicts(rel, comp, fact, cfg).tolist() == expected
+                assert res["pass_rate"][i, j, k] == expected.count("PASS") / 12
+                assert res["fail_rate"][i, j, k] == expected.count("FAIL") / 12
+
+
+def test_weight_sweep_and_results_loading(tmp_path):
+    path = tmp_path / "results.csv"
+    path.write_text(
+        "chat_file,context_file,relevance,completeness,factuality,verdict,latency,total_tokens\r\n"
+        "a,b,0.9,0.8,0.7,PASS,1.0,10\r\n"
+        "c,d,0.2,0.4,0.1,FAIL,1.0,10\r\n"
+    )
+    cols = load_score_columns(path)
+    assert cols["factuality"].tolist() == [0.7, 0.1]
+
+    res = sweep_weights(cols["relevance"], cols["completeness"], cols["factuality"],
+                        [[1, 0, 0], [0, 0, 1]], quality_min=[0.5])
+    assert np.allclose(res["mean_quality"], [0.55, 0.4])
+    assert res["pass_rate"][:, 0].tolist() == [0.5, 0.5]
@@ -0,0 +1,41 @@
+import os
+import pytest
+from src.utils.config import ConfigRegistry, get_config
+from src.evaluators.reporter import compute_quality_score, make_verdict
+
+
+def test_default_config_matches_yaml():
+    cfg = get_config()
+    assert cfg.factuality_min == 0.55
+    assert (cfg.weights.relevance, cfg.weights.completeness, cfg.weights.factuality) == (0.4, 0.3, 0.3)
+
+
+def test_profiles_override_defaults():
+    strict = get_config("strict")
+    assert strict.profile == "strict"
+    assert strict.factuality_min > get_config().factuality_min
+    assert strict.price_per_1k_tokens == get_config().price_per_1k_tokens
+    assert make_verdict(0.9, 0.8, 0.6) == "PASS"
+    assert make_verdict(0.9, 0.8, 0.6, strict) == "FAIL"
+    with pytest.raises(ValueError):
+        get_config("no-such-profile")
+
+
+def test_reload_on_change(tmp_path):
+    path = tmp_path / "thresholds.yaml"
+    path.write_text("relevance_min: 0.5\nweights: {relevance: 1.0, completeness: 0.0, factuality: 0.0}\n")
+    registry = ConfigRegistry(path, check_interval=0)
+
+    first = registry.get()
+    assert first.relevance_min == 0.5
+    assert registry.get() is first  # unchanged file -> same immutable object
+    assert compute_quality_score(0.7, 0.1, 0.1, first.weights) == 0.7
+
+    path.write_text("relevance_min: 0.8\nprofiles: {fast: {relevance_min: 0.1}}\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    assert registry.get().relevance_min == 0.8
+    assert registry.get("fast").relevance_min == 0.1
+
+    path.write_text("relevance_min: [broken\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2 * 10**9))
+    assert registry.get().relevance_min == 0.8
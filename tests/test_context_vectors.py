@@ -0,0 +1,60 @@
+import json
+import numpy as np
+import src.main as main
+import src.utils.context_vectors as context_vectors
+from src.utils.parsers import parse_context
+
+CHAT = "data/samples/sample-chat-conversation-01.json"
+CTX = "data/samples/sample_context_vectors-01.json"
+
+
+def _with_sidecar(folder, embedder, vectors=None, name="ctx.npy", **spec):
+    """Copy of the sample context file pointing at a sidecar of `vectors` (default: the embedder's own)."""
+    folder.mkdir(exist_ok=True)
+    doc = json.loads(open(CTX, encoding="utf-8").read())
+    texts = [c["text"] for c in doc["contexts"]]
+    if vectors is None:
+        vectors = embedder.encode(texts)
+    if name.endswith(".npy"):
+        np.save(folder / name, vectors)
+    else:
+        np.asarray(vectors).tofile(folder / name)
+    embedder.calls.clear()
+    doc["embeddings"] = {"path": name, "model": embedder.name, **spec}
+    path = folder / "ctx.json"
+    path.write_text(json.dumps(doc), encoding="utf-8")
+    return path, texts
+
+
+def test_sidecar_replaces_context_embedding(fake_model, tmp_path):
+    reports = []
+    for name in ("ctx.npy", "ctx.f32"):
+        path, texts = _with_sidecar(tmp_path / name, fake_model, name=name)
+        ctx = parse_context(path)
+        assert ctx.embeddings.path == str(tmp_path / name / name)
+        assert isinstance(context_vectors.load_context_vectors(ctx), np.memmap)
+
+        reports.append(main.evaluate(CHAT, str(path)))
+        encoded = {t for call in fake_model.calls for t in call}
+        assert not set(texts[1:]) & encoded  # the first text is only embedded as a probe
+
+    expected = main.evaluate(CHAT, CTX)
+    assert all(r["scores"] == expected["scores"] for r in reports)
+
+
+def test_incompatible_sidecars_fall_back(fake_model, tmp_path):
+    expected = main.evaluate(CHAT, CTX)
+    cases = [
+        {"vectors": np.ones((5, 3), dtype=np.float32)},                   # row count
+        {"vectors": np.ones((2, 4), dtype=np.float32)},                   # dim
+        {"vectors": np.ones((2, 3), dtype=np.float64)},                   # dtype
+        {"vectors": -np.ones((2, 3), dtype=np.float32)},                  # not this model's vectors
+        {"vectors": np.ones((2, 3), dtype=np.float32), "name": "x.f32", "dim": 2},
+        {"model": "other-model"},
+    ]
+    for i, case in enumerate(cases):
+        path, _ = _with_sidecar(tmp_path / str(i), fake_model, **case)
+        ctx = parse_context(path)
+        assert context_vectors.load_context_vectors(ctx) is None
+        assert main.evaluate(CHAT, str(path))["scores"] == expected["scores"]
+    assert len(context_vectors.sidecar_rejections()) >= len(cases)
@@ -0,0 +1,40 @@
+import sys
+import threading
+import subprocess
+import pytest
+import src.main as main
+from src.daemon import DaemonError, EvalDaemon, evaluate_request, ping, request_daemon
+
+CHAT = "data/samples/sample-chat-conversation-01.json"
+CTX = "data/samples/sample_context_vectors-01.json"
+
+
+def test_heavy_modules_are_not_imported_up_front():
+    code = (
+        "import sys, src.main, src.utils.caching;"
+        "print(sorted(m for m in ('sentence_transformers', 'faiss', 'tiktoken', 'torch') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_daemon_serves_same_report_and_falls_back(fake_model, tmp_path):
+    sock = tmp_path / "eval.sock"
+    assert request_daemon(evaluate_request(CHAT, CTX), sock) is None  # nothing listening
+
+    server = EvalDaemon(sock)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert ping(sock)["served"] == 0
+        assert sock.stat().st_mode & 0o777 == 0o600
+        remote = request_daemon(evaluate_request(CHAT, CTX), sock)
+        assert remote == main.evaluate(CHAT, CTX)
+        assert ping(sock)["served"] == 1
+
+        with pytest.raises(DaemonError, match="File not found"):
+            request_daemon(evaluate_request(tmp_path / "missing.json", CTX), sock)
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
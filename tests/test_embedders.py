@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+import src.utils.caching as caching
+import src.utils.embeddings as embeddings
+from src.utils.embedders import HashingEmbedder, create_embedder
+from src.utils.embeddings import cosine_similarity
+
+
+def test_hashing_embedder_is_deterministic_and_lexical():
+    a, b = HashingEmbedder(), HashingEmbedder()
+    texts = ["AI means artificial intelligence.", "Artificial intelligence is AI.", "Bananas are yellow."]
+    va, vb = a.encode(texts), b.encode(texts)
+
+    assert va.dtype == np.float32 and va.shape == (3, 384)
+    assert np.array_equal(va, vb)
+    assert cosine_similarity(va[0], va[1]) > cosine_similarity(va[0], va[2])
+    assert not np.array_equal(HashingEmbedder(seed=1).encode(texts[:1]), va[:1])
+
+    # Rows past the cache bound are regenerated, not kept
+    small = HashingEmbedder(cache_rows=4)
+    assert np.array_equal(small.encode(texts), va)
+    assert small._row.cache_info().currsize == 4
+
+    with pytest.raises(ValueError):
+        create_embedder("no-such-backend")
+
+
+def test_cache_keys_are_namespaced_by_backend(fake_model, monkeypatch):
+    embeddings.embed_many(["shared text"])
+    assert len(fake_model.calls) == 1
+
+    hashing = HashingEmbedder()
+    monkeypatch.setattr(embeddings, "_embedder", hashing)
+    vec = embeddings.embed_many(["shared text"])[0]
+
+    # The hashing backend did not get the counting model's cached row
+    assert np.allclose(vec, hashing.encode(["shared text"])[0])
+    assert caching.get_cached_vector("shared text", hashing.name) is not None
+    assert caching.get_cached_vector("shared text", "counting") is not None
@@ -0,0 +1,25 @@
+import src.utils.embeddings as embeddings
+
+
+def test_embed_many_dedupes_and_keeps_order(fake_model):
+    vecs = embeddings.embed_many(["aa", "b", "aa", "ccc"])
+    assert vecs[:, 0].tolist() == [2.0, 1.0, 2.0, 3.0]
+    assert fake_model.calls == [["aa", "b", "ccc"]]
+
+
+def test_embed_many_encodes_only_misses(fake_model):
+    embeddings.embed_many(["aa", "b"])
+    embeddings.embed_many(["b", "dddd", "dddd"])
+    assert fake_model.calls == [["aa", "b"], ["dddd"]]
+
+    stats = embeddings.get_embedding_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["duplicates"] == 1
+    assert stats["encode_calls"] == 2
+
+
+def test_embed_text_and_batch_share_cache(fake_model):
+    embeddings.embed_batch(["aa", "b"])
+    assert embeddings.embed_text("aa").tolist() == [2.0, 1.0, 0.0]
+    assert len(fake_model.calls) == 1
@@ -5,3 +5,26 @@ def test_factuality():
     ctx = parse_context("data/samples/sample_context_vectors-01.json")
     report = factuality_report("AI means artificial intelligence.", ctx.contexts)
     assert report["avg_score"] > 0.3
+
+
+def test_factuality_reports_best_source():
+    ctx = parse_context("data/samples/sample_context_vectors-01.json")
+    report = factuality_report("AI means artificial intelligence.", ctx.contexts)
+    assert report["claim_sources"] == ["ctx1"]
+
+
+def test_similarity_matrix_matches_scalar_cosine():
+    import numpy as np
+    import pytest
+    from src.utils.embeddings import cosine_similarity, cosine_similarity_matrix
+
+    rng = np.random.default_rng(0)
+    a = rng.normal(size=(3, 8))
+    b = rng.normal(size=(4, 8))
+    b[2] = 0.0
+
+    sims = cosine_similarity_matrix(a, b)
+    assert sims.shape == (3, 4)
+    for i in range(3):
+        for j in range(4):
+            assert sims[i, j] == pytest.approx(cosine_similarity(a[i], b[j]), abs=1e-12)
@@ -0,0 +1,73 @@
+import numpy as np
+from infra.faiss_index import IndexRegistry, search_index, normalize_rows
+
+
+def _vectors(n, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def test_registry_reuses_index(tmp_path):
+    registry = IndexRegistry(tmp_path)
+    texts = ["a", "b", "c"]
+    first = registry.get_or_build(texts, _vectors(3))
+    assert registry.get_or_build(texts, _vectors(3)) is first
+    assert registry.stats()["builds"] == 1
+    assert registry.stats()["hits"] == 1
+
+
+def test_registry_loads_from_disk(tmp_path):
+    vecs = _vectors(5)
+    IndexRegistry(tmp_path).get_or_build(list("abcde"), vecs)
+
+    other = IndexRegistry(tmp_path)
+    index = other.get_or_build(list("abcde"))
+    assert other.stats()["loads"] == 1
+    sims, ids = search_index(index, normalize_rows(vecs[2]), top_k=1)
+    assert ids[0][0] == 2
+    assert abs(sims[0][0] - 1.0) < 1e-5
+
+
+def test_registry_switches_to_hnsw_and_evicts(tmp_path):
+    import faiss
+
+    registry = IndexRegistry(tmp_path, memory_budget=1, hnsw_threshold=10, persist=False)
+    big = registry.get_or_build([str(i) for i in range(20)], _vectors(20))
+    assert isinstance(big, faiss.IndexHNSW)
+
+    registry.get_or_build(["x", "y"], _vectors(2))
+    assert registry.stats()["indexes"] == 1
+
+
+def test_batched_search():
+    registry = IndexRegistry(persist=False)
+    vecs = _vectors(6)
+    index = registry.get_or_build(list("abcdef"), vecs)
+    _, ids = search_index(index, normalize_rows(vecs[[4, 1, 3]]), top_k=1)
+    assert ids[:, 0].tolist() == [4, 1, 3]
+
+
+def test_concurrent_builds_of_one_context(tmp_path):
+    import threading
+
+    shared = IndexRegistry(tmp_path)
+    registries = [shared] * 4 + [IndexRegistry(tmp_path) for _ in range(4)]
+    barrier = threading.Barrier(len(registries))
+    results, errors = [], []
+
+    def build(registry):
+        barrier.wait()
+        try:
+            results.append((registry, registry.get_or_build(list("abcd"), _vectors(4))))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=build, args=(r,)) for r in registries]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert shared.stats()["builds"] + shared.stats()["loads"] == 1
+    assert len({id(index) for registry, index in results if registry is shared}) == 1
+    assert [p.name for p in tmp_path.iterdir()] == [p.name for p in tmp_path.glob("*.faiss")]
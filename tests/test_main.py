@@ -0,0 +1,118 @@
+import src.main as main
+from src.utils.parsers import ChatDocument, parse_context
+
+CHAT = "data/samples/sample-chat-conversation-01.json"
+CTX = "data/samples/sample_context_vectors-01.json"
+
+
+def test_evaluate_encodes_once_per_request(fake_model):
+    report = main.evaluate(CHAT, CTX, trace=True)
+
+    trace = report["embedding_trace"]
+    assert trace["encode_calls"] == 1
+    assert [s["stage"] for s in trace["stages"]] == [
+        "parse", "pii", "embed", "relevance", "completeness", "factuality", "tokens", "report",
+    ]
+    assert [s["stage"] for s in trace["stages"] if s["encode_calls"]] == ["embed"]
+    assert len(fake_model.calls) == 1
+    assert report["verdict"] in {"PASS", "WARN", "FAIL"}
+
+
+def test_encoder_trace_ignores_other_threads(fake_model):
+    import threading
+    from src.utils.embeddings import embed_many, get_embedding_stats
+    from src.utils.stages import StageRecorder
+
+    recorder = StageRecorder()
+    with recorder.span("embed"):
+        other = threading.Thread(target=embed_many, args=(["another request"],))
+        other.start()
+        other.join()
+        embed_many(["this request"])
+
+    assert recorder.encoder_trace() == [{"stage": "embed", "encode_calls": 1}]
+    assert get_embedding_stats()["encode_calls"] == 2
+
+
+def test_stage_timings_only_when_enabled(fake_model):
+    plain = main.evaluate(CHAT, CTX)
+    assert "stage_timings" not in plain and "embedding_trace" not in plain
+
+    report = main.evaluate(CHAT, CTX, timings=True)
+    timings = report["stage_timings"]
+    assert [s["stage"] for s in timings["stages"]][:3] == ["parse", "pii", "embed"]
+    assert all(s["wall_ms"] >= 0 and s["cpu_ms"] >= 0 for s in timings["stages"])
+    assert timings["total_wall_ms"] == sum(s["wall_ms"] for s in timings["stages"])
+
+
+def test_conversation_trace_and_timings(fake_model):
+    report = main.evaluate_conversation(CHAT, CTX, trace=True, timings=True)
+    assert report["embedding_trace"]["encode_calls"] == 1
+    assert [s["stage"] for s in report["stage_timings"]["stages"]][:3] == ["parse", "pii", "embed"]
+
+    plain = main.evaluate_conversation(CHAT, CTX)
+    assert "stage_timings" not in plain and "embedding_trace" not in plain
+
+
+def _chat(*pairs, system=None):
+    messages = [{"role": "system", "content": system}] if system else []
+    for user, assistant in pairs:
+        messages += [{"role": "user", "content": user}, {"role": "assistant", "content": assistant}]
+    return ChatDocument(messages=messages)
+
+
+def test_system_message_first_is_skipped(fake_model):
+    ctx = parse_context("data/samples/sample_context_vectors-01.json")
+    chat = _chat(("what is ai?", "ai is artificial intelligence."), system="You are helpful.")
+    prepared = main.prepare_request(chat, ctx)
+    assert prepared["user_msg"] == "what is ai?"
+    assert prepared["assistant_msg"] == "ai is artificial intelligence."
+
+
+def test_conversations_embed_in_one_batch(fake_model):
+    ctx = parse_context("data/samples/sample_context_vectors-01.json")
+    first = _chat(("What is AI?", "AI is artificial intelligence."),
+                  ("Who builds it?", "Researchers build it. Engineers deploy it."),
+                  system="You are helpful.")
+    second = _chat(("Is it safe?", "Mostly, with care."))
+
+    results = main.evaluate_conversations([(first, ctx), (second, ctx)])
+
+    assert len(fake_model.calls) == 1
+    assert [len(r["turns"]) for r in results] == [2, 1]
+    assert [t["message_index"] for t in results[0]["turns"]] == [1, 3]
+
+    summary = results[0]["summary"]
+    assert summary["turns"] == 2
+    assert sum(summary["verdict_counts"].values()) == 2
+    assert summary["token_usage"]["total_tokens"] == sum(t["token_usage"]["total_tokens"] for t in results[0]["turns"])
+
+
+def test_latency_comes_from_message_timestamps(fake_model):
+    ctx = parse_context(CTX)
+    chat = ChatDocument(messages=[
+        {"role": "user", "content": "what is ai?", "timestamp": "2024-05-01T09:00:00"},
+        {"role": "assistant", "content": "ai is", "timestamp": "2024-05-01T09:00:01.5"},
+        {"role": "assistant", "content": "artificial intelligence.", "timestamp": "2024-05-01T09:00:02.25"},
+        {"role": "user", "content": "thanks"},
+        {"role": "assistant", "content": "you are welcome."},
+    ])
+
+    result = main.evaluate_conversations([(chat, ctx)])[0]
+
+    assert [t["latency_seconds"] for t in result["turns"]] == [2.25, None]
+    assert result["summary"]["latency_seconds"] == 2.25
+
+
+def test_latency_normalizes_timezones(fake_model):
+    ctx = parse_context(CTX)
+    chat = ChatDocument(messages=[
+        {"role": "user", "content": "what is ai?", "timestamp": "2024-05-01T09:00:00Z"},
+        {"role": "assistant", "content": "ai is", "timestamp": "2024-05-01T09:00:01.5"},
+        {"role": "user", "content": "thanks", "timestamp": "2024-05-01T11:00:00+02:00"},
+        {"role": "assistant", "content": "you are welcome.", "timestamp": "2024-05-01T09:00:03"},
+    ])
+
+    result = main.evaluate_conversations([(chat, ctx)])[0]
+
+    assert [t["latency_seconds"] for t in result["turns"]] == [1.5, 3.0]
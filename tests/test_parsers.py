@@ -1,4 +1,4 @@
-from src.utils.parsers import parse_chat, parse_context
+from src.utils.parsers import ChatDocument, pair_turns, parse_chat, parse_context
 
 def test_parse_chat():
     chat = parse_chat("data/samples/sample-chat-conversation-01.json")
@@ -7,3 +7,54 @@ def test_parse_chat():
 def test_parse_context():
     ctx = parse_context("data/samples/sample_context_vectors-01.json")
     assert len(ctx.contexts) >= 1
+
+def test_pair_turns_skips_system_and_unanswered():
+    chat = ChatDocument(messages=[
+        {"role": "system", "content": "Be brief."},
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Hello."},
+        {"role": "assistant", "content": "How can I help?"},
+        {"role": "user", "content": "Unanswered"},
+        {"role": "user", "content": "What is AI?"},
+        {"role": "assistant", "content": "Artificial intelligence."},
+    ])
+    turns = pair_turns(chat.messages)
+    assert [t.index for t in turns] == [1, 5]
+    assert [len(t.replies) for t in turns] == [2, 1]
+
+def _write(tmp_path, text, name="ctx.json"):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+def test_parse_context_streams_small_blocks(tmp_path, monkeypatch):
+    import json
+    from src.utils import parsers
+    monkeypatch.setattr(parsers, "VALIDATE_BATCH", 2)
+    items = [{"id": f"c{i}", "text": "t é \\\" ]," * i, "score": 1.5 * i} for i in range(5)]
+    for block, indent in [(1, None), (7, None), (1, 2), (5, 2), (1 << 20, 2)]:
+        monkeypatch.setattr(parsers, "STREAM_BLOCK", block)
+        path = _write(tmp_path, json.dumps({"meta": {"a": [1, 2]}, "contexts": items, "n": 12}, indent=indent))
+        expected = parsers._parse_context_document(path)
+        for trusted in (False, True):
+            ctx = parse_context(path, trusted=trusted)
+            assert [(c.id, c.text) for c in ctx.contexts] == [(c.id, c.text) for c in expected.contexts]
+        assert isinstance(parse_context(path, trusted=True).contexts[0], parsers.ContextChunk)
+    assert parse_context(_write(tmp_path, '{"contexts": [ ]}')).contexts == []
+
+def test_parse_context_errors_unchanged(tmp_path):
+    import pytest
+    with pytest.raises(ValueError, match="must contain a 'contexts' field"):
+        parse_context(_write(tmp_path, '{"other": []}'))
+    with pytest.raises(ValueError, match="Invalid context schema"):
+        parse_context(_write(tmp_path, '{"contexts": [{"id": "a"}]}'), trusted=True)
+    with pytest.raises(ValueError):  # json.JSONDecodeError
+        parse_context(_write(tmp_path, '{"contexts": [{"id": "a", "text": "b"}'))
+    with pytest.raises(FileNotFoundError):
+        parse_context(tmp_path / "missing.json")
+
+def test_parse_chat_rejects_unparseable_timestamps(tmp_path):
+    import pytest
+    path = _write(tmp_path, '{"messages": [{"role": "user", "content": "hi", "timestamp": "yesterday"}]}', "chat.json")
+    with pytest.raises(ValueError, match="Invalid chat schema"):
+        parse_chat(path)
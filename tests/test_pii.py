@@ -8,3 +8,23 @@ def test_redact_phone():
     s = 'Call at +1 555 222 3333'
     out = redact_pii(s)
     assert '[REDACTED_PHONE]' in out
+
+
+def test_detection_and_redaction_share_spans():
+    from src.utils.pii import analyze_pii
+    detected, redacted = analyze_pii('Mail John.Smith@example.com or call +1 555 222 3333')
+    assert detected['emails'] == ['John.Smith@example.com']
+    assert detected['names'] == ['Mail']
+    assert redacted == '[REDACTED_NAME] [REDACTED_EMAIL] or call [REDACTED_PHONE]'
+
+
+def test_chunked_scan_matches_full_scan():
+    from src.utils.pii import scan_pii, iter_pii_chunked
+    text = 'Ticket 12345678 from Alice Brown, alice@example.com. ' * 200
+    assert list(iter_pii_chunked(text, chunk_size=97, overlap=64)) == scan_pii(text)
+
+
+def test_batch_api_keeps_order():
+    from src.utils.pii import analyze_pii, analyze_pii_many
+    texts = [f'User {i}: id {1000000 + i}' for i in range(100)]
+    assert analyze_pii_many(texts, workers=2, chunksize=10) == [analyze_pii(t) for t in texts]
@@ -0,0 +1,117 @@
+import pytest
+from src.results_db import ResultsDB
+from src.utils.config import get_config
+
+
+def _row(i, verdict, quality, folder="set"):
+    return {"chat_file": f"chat-{i}.json", "context_file": "ctx.json", "chat_path": f"{folder}/chat-{i}.json",
+            "context_path": f"{folder}/ctx.json", "relevance": quality,
+            "completeness": quality, "factuality": quality, "quality_score": quality, "verdict": verdict,
+            "latency": None, "total_tokens": 10, "cost_usd": 0.001,
+            "claims": [{"claim": "it is so.", "score": quality, "source": "c1", "hallucinated": quality < 0.5}]}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = ResultsDB(tmp_path / "results.db")
+    yield db
+    db.close()
+
+
+def test_wal_schema_and_bulk_insert(db):
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    run = db.start_run("baseline", config=get_config())
+    db.insert_pairs(run, [_row(i, "PASS", 0.9) for i in range(3)])
+    db.insert_pairs(run, [_row(3, "FAIL", 0.2)], start_index=3)
+    db.finish_run(run)
+
+    (info,) = db.runs()
+    assert info["pairs"] == 4 and info["config_hash"] == get_config().fingerprint()
+    assert db.resolve_run("baseline") == db.resolve_run(str(run)) == run
+    assert [p["pair_index"] for p in db.pairs(run, verdict="FAIL")] == [3]
+    assert db.claims(run, 3)[0]["hallucinated"] == 1
+
+
+def test_run_diff_flips_and_deltas(db):
+    a = db.start_run("a")
+    b = db.start_run("b")
+    db.insert_pairs(a, [_row(0, "PASS", 0.9), _row(1, "PASS", 0.8), _row(2, "WARN", 0.6), _row(3, "FAIL", 0.1)])
+    db.insert_pairs(b, [_row(0, "PASS", 0.95), _row(1, "FAIL", 0.3), _row(2, "PASS", 0.7), _row(9, "PASS", 1.0)])
+
+    summary = db.compare(a, b)
+    assert summary["matched"] == 3
+    assert summary["flips"] == 2
+    assert summary["transitions"] == {"PASS->FAIL": 1, "WARN->PASS": 1}
+    assert summary["mean_delta_quality_score"] == pytest.approx((0.05 - 0.5 + 0.1) / 3)
+
+    flips = db.verdict_flips(a, b, from_verdict="PASS")
+    assert [(f["chat_path"], f["verdict_b"]) for f in flips] == [("set/chat-1.json", "FAIL")]
+
+    deltas = db.score_deltas(a, b, min_delta=0.08)
+    assert [d["chat_path"] for d in deltas] == ["set/chat-1.json", "set/chat-2.json"]
+    assert deltas[0]["delta"] == pytest.approx(-0.5)
+
+    # A changed run is re-compared instead of served from the stale diff
+    db.truncate_run(b, 1)
+    db.insert_pairs(b, [_row(1, "PASS", 0.8)], start_index=1)
+    assert db.compare(a, b)["flips"] == 0
+
+
+def test_run_diff_matches_repeated_and_same_named_pairs(db):
+    a = db.start_run("a")
+    b = db.start_run("b")
+    # The same pair listed twice, plus a chat-0.json from another folder
+    db.insert_pairs(a, [_row(0, "PASS", 0.9), _row(0, "PASS", 0.9), _row(0, "FAIL", 0.1, folder="other")])
+    db.insert_pairs(b, [_row(0, "PASS", 0.9), _row(0, "FAIL", 0.2), _row(0, "FAIL", 0.1, folder="other")])
+
+    summary = db.compare(a, b)
+    assert summary["matched"] == 3
+    assert summary["transitions"] == {"PASS->FAIL": 1}
+    (flip,) = db.verdict_flips(a, b)
+    assert (flip["pair_a"], flip["pair_b"], flip["chat_path"]) == (1, 1, "set/chat-0.json")
+
+
+def test_batch_run_records_pairs_and_claims(tmp_path, fake_model, monkeypatch):
+    import json
+    import src.batch_eval as batch_eval
+
+    folder = tmp_path / "samples"
+    folder.mkdir()
+    for i in range(4):
+        chat = {"messages": [{"role": "user", "content": f"what is topic {i}?"},
+                             {"role": "assistant", "content": f"topic {i} is covered. it is documented."}]}
+        ctx = {"contexts": [{"id": "c1", "text": f"topic {i} is covered here."}]}
+        (folder / f"sample-chat-conversation-{i:02d}.json").write_text(json.dumps(chat))
+        (folder / f"sample_context_vectors-{i:02d}.json").write_text(json.dumps(ctx))
+
+    real = batch_eval.evaluate_pair
+    calls = []
+
+    def crashing(pair, profile=None):
+        calls.append(pair)
+        if len(calls) == 4:
+            raise RuntimeError("boom")
+        return real(pair, profile)
+
+    out, db_path = tmp_path / "out.csv", tmp_path / "results.db"
+    monkeypatch.setattr(batch_eval, "evaluate_pair", crashing)
+    with pytest.raises(RuntimeError):
+        batch_eval.run_batch(folder=folder, output=out, chunk_size=1, flush_every=2, db=db_path, run_name="r1")
+    monkeypatch.setattr(batch_eval, "evaluate_pair", real)
+    stats = batch_eval.run_batch(folder=folder, output=out, chunk_size=1, flush_every=2, db=db_path, run_name="r1")
+
+    db = ResultsDB(db_path)
+    (run,) = db.runs()
+    assert run["run_id"] == stats["run_id"] and run["name"] == "r1" and run["finished_at"]
+    assert run["pairs"] == 4 and run["embedder"] == "counting"
+    pairs = db.pairs(run["run_id"])
+    assert [p["chat_file"] for p in pairs] == [f"sample-chat-conversation-{i:02d}.json" for i in range(4)]
+    assert len(db.claims(run["run_id"], 3)) == 2
+    db.close()
+
+    # A taken name is refused before anything is evaluated
+    monkeypatch.setattr(batch_eval, "evaluate_pair", crashing)
+    calls.clear()
+    with pytest.raises(ValueError, match="already used by run"):
+        batch_eval.run_batch(folder=folder, output=tmp_path / "again.csv", db=db_path, run_name="r1")
+    assert calls == []
@@ -0,0 +1,59 @@
+import pytest
+from src.utils import token_utils
+from src.utils.config import get_config
+
+
+def test_encoder_is_cached_per_model(stub_encoding):
+    assert token_utils.get_encoding() is stub_encoding
+    assert token_utils.count_tokens("one two three") == 3
+
+
+def test_batch_counts_match_single_counts(stub_encoding, monkeypatch):
+    monkeypatch.setattr(token_utils, "BATCH_CHUNK_SIZE", 3)
+    texts = [" ".join(["w"] * i) for i in range(10)]
+    assert token_utils.count_tokens_batch(texts, workers=4) == list(range(10))
+
+
+def _local_bpe():
+    """Small byte-level BPE (all 256 bytes plus a few merges) for offline runs."""
+    import tiktoken
+    ranks = {bytes([i]): i for i in range(256)}
+    for word in ("the ", "token", "naïve", "café", " caf", "世界", "東京", "こんにちは"):
+        raw = word.encode("utf-8")
+        for end in range(2, len(raw) + 1):
+            ranks.setdefault(raw[:end], len(ranks))
+    return tiktoken.Encoding(name="local-bpe", pat_str=r"\s*\S+", mergeable_ranks=ranks, special_tokens={})
+
+
+@pytest.fixture(params=["cl100k_base", "local-bpe"])
+def bpe(request, monkeypatch):
+    import tiktoken
+    if request.param == "cl100k_base":
+        try:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # no network and no cached BPE file
+            pytest.skip("cl100k_base is not available offline")
+    else:
+        encoding = _local_bpe()
+    monkeypatch.setattr(token_utils, "_encodings", {})
+    token_utils.register_encoding(token_utils.DEFAULT_MODEL, encoding)
+    return encoding
+
+
+@pytest.mark.parametrize("text", [
+    "The token counter estimates the cost of every turn. " * 20,
+    "naïve café, crème brûlée, Ærøskøbing, São Paulo. " * 20,
+    "世界の東京でこんにちは。人工知能の評価。" * 20,
+    "x",
+])
+def test_approximate_mode_respects_hard_bound(bpe, text):
+    exact = token_utils.count_tokens(text)
+    approx = token_utils.count_tokens(text, approximate=True)
+    assert 0 < exact <= 4 * approx
+
+
+def test_per_model_pricing():
+    cfg = get_config()
+    price = cfg.pricing["gpt-3.5-turbo"]
+    assert token_utils.token_cost(1000, 2000, "gpt-3.5-turbo", cfg) == price.input + 2 * price.output
+    assert token_utils.token_cost(500, 500, "unknown-model", cfg) == cfg.price_per_1k_tokens